@@ -0,0 +1,584 @@
+"""
+Benchmark suite for scheduler_core.py.
+
+Generates synthetic managers.xlsx / shift_settings.xlsx stores in a temp
+folder and times what the app and the CLI do with them: loading a store
+(from its binary snapshot and by parsing the workbook), adding, updating
+and deleting managers through ManagerRepository, saving shift settings
+and generating the schedule, on the Excel store and on a SQLite copy of
+it. Results print as a table and can be saved as JSON, so
+a later run (or another version) can be compared against them.
+
+    python benchmark.py                            # 10 to 10k managers
+    python benchmark.py 10 1000 100000 --json before.json
+    python benchmark.py --compare before.json      # ratios against an earlier run
+    python benchmark.py --loaders 1000 10000       # loader and roster-memory comparison
+    python benchmark.py --server 1000 10000        # HTTP server requests/s (schedule_server.py)
+    python benchmark.py --search 10000 100000      # type-ahead search over the managers list
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from openpyxl import Workbook, load_workbook
+
+from scheduler_core import (
+    DAYS, ROLES, GENDERS, SHIFT_TYPES, SLOT_MINUTES,
+    MANAGERS_SHEET_NAME, MANAGER_HEADERS,
+    SHIFT_SETTINGS_SHEET_NAME, SHIFT_SETTINGS_HEADERS,
+    ExcelStorage, ManagerRepository, ManagerSearchIndex, Roster, ScheduleCache, SQLiteStorage, ScheduleSolver,
+    cached_schedule, copy_storage, format_time, iter_managers, load_all_managers, load_all_shift_settings,
+    write_snapshot,
+)
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+LOADER_SIZES = [1000, 10000, 50000]
+EDIT_BATCH = 100          # managers added / updated / deleted per timed flush
+REPEAT = 3                # each timing is the best of this many runs
+REGRESSION_RATIO = 1.5    # --compare flags operations this much slower...
+REGRESSION_MIN_SECONDS = 0.002  # ...and at least this much slower (sub-ms timings are noise)
+SERVER_SIZES = [1000, 10000]
+SERVER_SECONDS = 5.0
+SERVER_CONNECTIONS = 32
+SERVER_WRITE_SHARE = 0.1  # share of --server requests that update a manager
+SEARCH_SIZES = [10000, 100000]
+SEARCH_TARGET_MS = 10.0   # --search flags queries slower than this
+SEARCH_QUERIES = [
+    "manager 12", "12", "role:shift", "gender:f", "role:shift gender:f",
+    "tue", "tue:13-23", "sat:22-6", "role:area tue:9-17 gender:m",
+]
+
+
+# ------------------ SYNTHETIC FILES ------------------
+
+def random_time(rng, first_hour, last_hour):
+    """A start or end time; one in five falls on a quarter hour ("17:30")."""
+    minutes = rng.randint(first_hour, last_hour) * 60
+    if rng.random() < 0.2:
+        minutes += rng.choice(range(SLOT_MINUTES, 60, SLOT_MINUTES))
+    return format_time(min(minutes, 24 * 60))
+
+
+def random_availability(rng):
+    """Random weekly availability in the same shape read_form() produces."""
+    availability = {}
+    for day in DAYS:
+        if rng.random() < 0.25:
+            availability[day] = (None, None)
+        elif rng.random() < 0.05:
+            availability[day] = (random_time(rng, 18, 22), random_time(rng, 2, 6))  # overnight
+        else:
+            start = rng.randint(0, 14)
+            availability[day] = (random_time(rng, start, start), random_time(rng, start + 1, 23))
+    return availability
+
+
+def random_manager(rng, manager_id):
+    return {
+        "id": manager_id,
+        "name": f"Manager {manager_id}",
+        "role": rng.choice(ROLES),
+        "gender": rng.choice(GENDERS),
+        "availability": random_availability(rng),
+    }
+
+
+def generate_managers_file(path, count, seed=0):
+    """Write `count` random managers using the managers.xlsx header layout."""
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(MANAGERS_SHEET_NAME)
+    ws.append(MANAGER_HEADERS)
+    for manager_id in range(1, count + 1):
+        row = [manager_id, f"Manager {manager_id}", rng.choice(ROLES), rng.choice(GENDERS)]
+        for start, end in random_availability(rng).values():
+            row.extend((start, end))
+        ws.append(row)
+    wb.save(path)
+
+
+def random_shift_settings(rng):
+    """One critical shift per (day, shift_type)."""
+    settings = {}
+    for day in DAYS:
+        for shift_type in SHIFT_TYPES:
+            start = rng.randint(6, 18)
+            settings[(day, shift_type)] = (start, random_time(rng, start + 1, min(start + 5, 23)))
+    return settings
+
+
+def generate_shift_settings_file(path, seed=0):
+    """Write one critical shift per (day, shift_type)."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(SHIFT_SETTINGS_SHEET_NAME)
+    ws.append(SHIFT_SETTINGS_HEADERS)
+    for (day, shift_type), (start, end) in random_shift_settings(random.Random(seed)).items():
+        ws.append([day, shift_type, start, end])
+    wb.save(path)
+
+
+# ------------------ SUITE ------------------
+
+def timed(func, *args):
+    """(seconds, result) for one call."""
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def best_of(repeat, func, *args):
+    """(fastest seconds, last result) over `repeat` calls."""
+    best = None
+    for _ in range(repeat):
+        seconds, result = timed(func, *args)
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def edit_batches(repo, rng, count):
+    """Add, update and delete `count` managers, flushing after each step."""
+    def add():
+        for _ in range(count):
+            repo.add(random_manager(rng, None))
+        repo.flush()
+
+    def update():
+        for manager_id in rng.sample(repo.managers.ids, count):
+            repo.update(manager_id, random_manager(rng, manager_id))
+        repo.flush()
+
+    def delete():
+        for manager_id in rng.sample(repo.managers.ids, count):
+            repo.delete(manager_id)
+        repo.flush()
+
+    return [("add managers", add), ("update managers", update), ("delete managers", delete)]
+
+
+def bench_store(storage, backend, count, tmp, repeat=REPEAT):
+    """Time one store's operations; returns result dicts."""
+    rng = random.Random(count)
+    results = []
+
+    def record(operation, seconds, items=1):
+        results.append({
+            "managers": count,
+            "backend": backend,
+            "operation": operation,
+            "items": items,
+            "seconds": round(seconds, 6),
+        })
+
+    if backend == "excel":
+        # Without the binary snapshot: what the first start after an outside edit pays
+        seconds, repo = best_of(repeat, ManagerRepository.load, storage)
+        record("load managers (parse)", seconds, count)
+        # Loads never write one; this is the snapshot the store's next save leaves
+        write_snapshot(storage.managers_path, repo.all(), repo.next_id)
+    seconds, repo = best_of(repeat, ManagerRepository.load, storage)
+    record("load managers", seconds, count)
+    seconds, settings = best_of(repeat, storage.load_shift_settings)
+    record("load shift settings", seconds, len(settings))
+
+    # Adds run first, so the deletes never run out of managers
+    batch = min(EDIT_BATCH, count)
+    for operation, func in edit_batches(repo, rng, batch):
+        record(operation, best_of(repeat, func)[0], batch)
+
+    key = next(iter(settings))
+    changed = {key: random_shift_settings(rng)[key]}
+    record("update shift setting", best_of(repeat, storage.update_shift_settings, changed, [])[0])
+    record("save shift settings", best_of(repeat, storage.save_shift_settings, settings)[0], len(settings))
+
+    managers = repo.all()
+    seconds, _ = best_of(repeat, lambda: ScheduleSolver(managers, settings).solve())
+    record("generate schedule", seconds, len(settings))
+    cache = ScheduleCache(os.path.join(tmp, f"cache_{backend}_{count}"))
+    cached_schedule(managers, settings, None, cache)
+    seconds, _ = best_of(repeat, cached_schedule, managers, settings, None, cache)
+    record("cached schedule (hit)", seconds, len(settings))
+
+    record("close", timed(storage.close)[0])
+    return results
+
+
+def run_suite(sizes, backends, repeat=REPEAT):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in sizes:
+            folder = os.path.join(tmp, f"store_{count}")
+            os.makedirs(folder)
+            managers_path = os.path.join(folder, "managers.xlsx")
+            shifts_path = os.path.join(folder, "shift_settings.xlsx")
+            generate_managers_file(managers_path, count)
+            generate_shift_settings_file(shifts_path)
+
+            if "sqlite" in backends:
+                # Copy before the Excel run edits the store
+                sqlite = SQLiteStorage(os.path.join(folder, "scheduler.db"))
+                seconds, _ = best_of(repeat, copy_storage, ExcelStorage(managers_path, shifts_path), sqlite)
+                print_result({"managers": count, "backend": "sqlite", "operation": "convert from excel",
+                              "items": count, "seconds": round(seconds, 6)}, results)
+            if "excel" in backends:
+                for result in bench_store(ExcelStorage(managers_path, shifts_path), "excel", count, tmp, repeat):
+                    print_result(result, results)
+            if "sqlite" in backends:
+                for result in bench_store(sqlite, "sqlite", count, tmp, repeat):
+                    print_result(result, results)
+    return results
+
+
+def print_result(result, results):
+    results.append(result)
+    per_item = ""
+    if result["items"] > 1:
+        per_item = f"{result['seconds'] / result['items'] * 1e6:>10.1f} us/item"
+    print(f"{result['managers']:>9} {result['backend']:<7} {result['operation']:<24} "
+          f"{result['seconds']:>9.4f}s {per_item}")
+
+
+# ------------------ JSON / COMPARISON ------------------
+
+def version_label():
+    """Short git commit of this checkout, or "" outside a repository."""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    return out.stdout.strip() if out.returncode == 0 else ""
+
+
+def write_json(path, results, label):
+    report = {
+        "label": label,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def compare(results, baseline_path, threshold=REGRESSION_RATIO):
+    """Print new/old time ratios; returns the number of regressions."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    before = {(r["managers"], r["backend"], r["operation"]): r["seconds"] for r in baseline["results"]}
+    print(f"\nagainst {baseline.get('label') or baseline_path} ({baseline.get('created', '?')}):")
+    regressions = 0
+    for result in results:
+        old = before.get((result["managers"], result["backend"], result["operation"]))
+        if not old:
+            continue
+        ratio = result["seconds"] / old
+        flag = ""
+        if ratio > threshold and result["seconds"] - old > REGRESSION_MIN_SECONDS:
+            flag = "  SLOWER"
+            regressions += 1
+        print(f"{result['managers']:>9} {result['backend']:<7} {result['operation']:<24} x{ratio:.2f}{flag}")
+    return regressions
+
+
+# ------------------ LOADER COMPARISON ------------------
+
+def load_managers_full_mode(path):
+    """The original loader: full workbook + ws.cell() per value."""
+    wb = load_workbook(path)
+    ws = wb[MANAGERS_SHEET_NAME]
+    managers = []
+    for row in range(2, ws.max_row + 1):
+        availability = {}
+        col = 5
+        for day in DAYS:
+            availability[day] = (ws.cell(row=row, column=col).value, ws.cell(row=row, column=col + 1).value)
+            col += 2
+        managers.append({
+            "row_index": row,
+            "id": ws.cell(row=row, column=1).value,
+            "name": ws.cell(row=row, column=2).value or "",
+            "role": ws.cell(row=row, column=3).value or "",
+            "gender": ws.cell(row=row, column=4).value or "",
+            "availability": availability
+        })
+    wb.close()
+    return managers
+
+
+def measure(func, *args):
+    """Return (seconds, peak traced MB) for one call; timed and traced separately."""
+    seconds, _ = timed(func, *args)
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / (1024 * 1024)
+
+
+def count_streamed(path):
+    """Consume the streaming loader without keeping the records."""
+    return sum(1 for _ in iter_managers(path))
+
+
+def manager_dicts(managers):
+    """The pre-record in-memory format: one dict plus an availability dict each."""
+    return [
+        {
+            "row_index": m.row_index,
+            "id": m.id,
+            "name": m.name,
+            "role": m.role,
+            "gender": m.gender,
+            "availability": m.availability,
+        }
+        for m in managers
+    ]
+
+
+def retained_mb(build, managers):
+    """MB still allocated by what build(managers) returns (names are shared, so not counted)."""
+    tracemalloc.start()
+    kept = build(managers)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current / (1024 * 1024)
+
+
+def compare_loaders(sizes):
+    with tempfile.TemporaryDirectory() as tmp:
+        shifts_path = os.path.join(tmp, "shift_settings.xlsx")
+        generate_shift_settings_file(shifts_path)
+        seconds, peak = measure(load_all_shift_settings, shifts_path)
+        print(f"shift settings: {seconds * 1000:.1f} ms, peak {peak:.1f} MB")
+
+        print(f"{'managers':>9} {'loader':<22} {'seconds':>8} {'peak MB':>8}")
+        for count in sizes:
+            path = os.path.join(tmp, f"managers_{count}.xlsx")
+            generate_managers_file(path, count)
+            results = [
+                ("full mode (before)", load_managers_full_mode),
+                ("read-only list", load_all_managers),
+                ("read-only streamed", count_streamed),
+            ]
+            baseline = None
+            for label, func in results:
+                seconds, peak = measure(func, path)
+                baseline = baseline or seconds
+                print(f"{count:>9} {label:<22} {seconds:>8.2f} {peak:>8.1f}  x{baseline / seconds:.1f}")
+
+        print(f"\n{'managers':>9} {'roster':<22} {'held MB':>8}")
+        for count in sizes:
+            managers = load_all_managers(os.path.join(tmp, f"managers_{count}.xlsx"))
+            results = [
+                ("dicts (before)", manager_dicts),
+                ("Manager records", lambda ms: [m.copy() for m in ms]),
+                ("columnar Roster", Roster),
+            ]
+            baseline = None
+            for label, build in results:
+                held = retained_mb(build, managers)
+                baseline = baseline or held
+                print(f"{count:>9} {label:<22} {held:>8.1f}  x{baseline / held:.1f}")
+
+
+# ------------------ SEARCH INDEX ------------------
+
+def bench_search(sizes, repeat=REPEAT):
+    """Build a ManagerSearchIndex per size and time SEARCH_QUERIES against it."""
+    print(f"{'managers':>9} {'query':<30} {'hits':>7} {'ms':>8}")
+    slow = 0
+    for count in sizes:
+        rng = random.Random(count)
+        managers = [random_manager(rng, manager_id) for manager_id in range(1, count + 1)]
+        seconds, index = timed(ManagerSearchIndex, managers)
+        print(f"{count:>9} {'(build)':<30} {len(index):>7} {seconds * 1000:>8.1f}")
+        for query in SEARCH_QUERIES:
+            seconds, hits = best_of(repeat, index.search, query)
+            ms = seconds * 1000
+            flag = "  SLOW" if ms > SEARCH_TARGET_MS else ""
+            slow += bool(flag)
+            print(f"{count:>9} {query:<30} {len(hits):>7} {ms:>8.2f}{flag}")
+    return slow
+
+
+# ------------------ HTTP SERVER LOAD ------------------
+
+def start_server(store):
+    """Run schedule_server.py for `store` on a free port; returns (process, port)."""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schedule_server.py")
+    proc = subprocess.Popen(
+        [sys.executable, script, store, "--port", "0", "--no-cache"], stdout=subprocess.PIPE, text=True,
+    )
+    line = proc.stdout.readline()  # "Serving ... on http://127.0.0.1:<port>"
+    if not line:
+        raise RuntimeError(f"schedule_server.py exited with {proc.wait()}")
+    return proc, int(line.rsplit(":", 1)[1])
+
+
+def stop_server(proc):
+    """Stop the server the way Ctrl+C does, so it flushes and closes the store."""
+    proc.send_signal(signal.SIGINT)
+    proc.wait(timeout=120)
+    proc.stdout.close()
+
+
+async def http_request(reader, writer, method, path, body=None):
+    """One keep-alive HTTP/1.1 request; returns (status, body bytes)."""
+    payload = b"" if body is None else json.dumps(body).encode("utf-8")
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(payload)}\r\n\r\n".encode("latin-1")
+        + payload
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def load_client(port, ids, seconds, connections, write_share, seed=0):
+    """
+    Keep `connections` connections busy for `seconds`: mostly single-manager
+    reads, `write_share` manager updates, and a few full-list and schedule
+    reads. Returns ({operation: [latency seconds]}, error responses).
+    """
+    latencies = {}
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def connection(n):
+        nonlocal errors
+        rng = random.Random(seed + n)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            while time.perf_counter() < deadline:
+                manager_id = rng.choice(ids)
+                roll = rng.random()
+                if roll < write_share:
+                    operation = "PUT /managers/<id>"
+                    request = ("PUT", f"/managers/{manager_id}", random_manager(rng, manager_id))
+                elif roll < write_share + 0.01:
+                    operation, request = "GET /managers", ("GET", "/managers")
+                elif roll < write_share + 0.02:
+                    operation, request = "GET /schedule", ("GET", "/schedule")
+                else:
+                    operation, request = "GET /managers/<id>", ("GET", f"/managers/{manager_id}")
+                start = time.perf_counter()
+                status, _ = await http_request(reader, writer, *request)
+                latencies.setdefault(operation, []).append(time.perf_counter() - start)
+                errors += status >= 400
+        finally:
+            writer.close()
+
+    await asyncio.gather(*(connection(n) for n in range(connections)))
+    return latencies, errors
+
+
+def percentile_ms(values, share):
+    return sorted(values)[min(len(values) - 1, int(len(values) * share))] * 1000
+
+
+def bench_server(sizes, backends, seconds, connections, write_share):
+    """Requests per second and latency of schedule_server.py under a local client."""
+    print(f"{connections} connections, {seconds:.0f}s per store, {write_share:.0%} writes")
+    print(f"{'managers':>9} {'backend':<7} {'operation':<20} {'requests':>9} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p99 ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in sizes:
+            folder = os.path.join(tmp, f"store_{count}")
+            os.makedirs(folder)
+            managers_path = os.path.join(folder, "managers.xlsx")
+            shifts_path = os.path.join(folder, "shift_settings.xlsx")
+            generate_managers_file(managers_path, count)
+            generate_shift_settings_file(shifts_path)
+            stores = {"excel": folder}
+            if "sqlite" in backends:
+                stores["sqlite"] = os.path.join(tmp, f"store_{count}.db")
+                copy_storage(ExcelStorage(managers_path, shifts_path), SQLiteStorage(stores["sqlite"]))
+
+            for backend in backends:
+                proc, port = start_server(stores[backend])
+                try:
+                    latencies, errors = asyncio.run(load_client(
+                        port, list(range(1, count + 1)), seconds, connections, write_share
+                    ))
+                finally:
+                    stop_server(proc)
+                total = 0
+                for operation, values in sorted(latencies.items()):
+                    total += len(values)
+                    print(f"{count:>9} {backend:<7} {operation:<20} {len(values):>9} "
+                          f"{len(values) / seconds:>8.0f} {percentile_ms(values, 0.5):>8.2f} "
+                          f"{percentile_ms(values, 0.99):>8.2f}")
+                print(f"{count:>9} {backend:<7} {'all':<20} {total:>9} {total / seconds:>8.0f}"
+                      f"{'':>18}  {errors} error(s)")
+
+
+# ------------------ MAIN ------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scheduler's storage and solver.")
+    parser.add_argument("sizes", nargs="*", type=int, help="roster sizes (default: 10 100 1000 10000)")
+    parser.add_argument("--backend", choices=("excel", "sqlite", "all"), default="all")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="runs per timing (best is kept)")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--label", help="version label stored in the JSON (default: git commit)")
+    parser.add_argument("--compare", metavar="JSON", help="compare with an earlier --json file; "
+                                                          "exits 1 if anything got slower")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_RATIO,
+                        help="slowdown ratio --compare reports as a regression")
+    parser.add_argument("--loaders", action="store_true",
+                        help="compare the Excel loaders and roster memory instead")
+    parser.add_argument("--server", action="store_true",
+                        help="load-test schedule_server.py with a local HTTP client instead")
+    parser.add_argument("--search", action="store_true",
+                        help=f"time type-ahead search queries instead (target: {SEARCH_TARGET_MS:g} ms)")
+    parser.add_argument("--seconds", type=float, default=SERVER_SECONDS, help="--server: time per store")
+    parser.add_argument("--connections", type=int, default=SERVER_CONNECTIONS,
+                        help="--server: concurrent keep-alive connections")
+    parser.add_argument("--write-share", type=float, default=SERVER_WRITE_SHARE,
+                        help="--server: share of requests that update a manager")
+    args = parser.parse_args(argv)
+
+    backends = ("excel", "sqlite") if args.backend == "all" else (args.backend,)
+    if args.server:
+        bench_server(args.sizes or SERVER_SIZES, backends, args.seconds, args.connections, args.write_share)
+        return 0
+    if args.loaders:
+        compare_loaders(args.sizes or LOADER_SIZES)
+        return 0
+    if args.search:
+        return 1 if bench_search(args.sizes or SEARCH_SIZES, max(1, args.repeat)) else 0
+
+    results = run_suite(args.sizes or DEFAULT_SIZES, backends, max(1, args.repeat))
+    if args.json:
+        write_json(args.json, results, args.label if args.label is not None else version_label())
+    if args.compare and compare(results, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
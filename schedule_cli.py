@@ -0,0 +1,414 @@
+"""
+Headless command line for the scheduler (no tkinter).
+
+    python schedule_cli.py generate --managers managers.xlsx --shifts shift_settings.xlsx --out schedule.json
+    python schedule_cli.py generate stores/north stores/south.db --out-dir schedules --format csv
+    python schedule_cli.py generate --stores-dir stores --out-dir schedules -j 0
+    python schedule_cli.py generate --stores-dir stores --roster roster.xlsx -j 0
+    python schedule_cli.py generate stores/north --start 2026-11-02 --weeks 12 --format xlsx
+    python schedule_cli.py coverage stores/north --out north_coverage.xlsx
+    python schedule_cli.py convert stores/north stores/north.db
+    python schedule_cli.py import stores/north new_managers.csv --dry-run
+    python schedule_cli.py --profile profiles generate stores/north
+
+A store is either a folder holding managers.xlsx and shift_settings.xlsx
+or a SQLite .db file. generate schedules every store given and writes one
+file per store; a store that fails is reported and the rest still run.
+With -j, stores are spread over worker processes that each parse their
+own files and send back only a timing summary.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+# scheduler_core (and with it openpyxl) is imported inside the commands,
+# so --help and argument errors return without paying for it.
+
+OUTPUT_FORMATS = ["json", "csv", "xlsx"]
+CSV_FIELDS = ["day", "shift_type", "start", "end", "manager_id", "manager_name", "role"]
+
+
+# ------------------ OUTPUT ------------------
+
+def write_schedule(path, fmt, store, rows):
+    """Write one store's schedule rows as JSON, CSV or a printable roster workbook."""
+    if fmt == "xlsx":
+        from scheduler_core import write_roster_workbook
+        write_roster_workbook(roster_sheets(store, rows), path)
+    elif fmt == "csv":
+        fields = (["week", "date"] if rows and "date" in rows[0] else []) + CSV_FIELDS
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        uncovered = sum(1 for row in rows if row["manager_id"] is None)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"store": store, "uncovered": uncovered, "shifts": rows}, f, indent=2)
+            f.write("\n")
+
+
+def roster_sheets(store, rows):
+    """(sheet title, rows) pairs for a store: one sheet, or one per week of a horizon."""
+    if not rows or "week" not in rows[0]:
+        return [(store, rows)]
+    weeks = {}
+    for row in rows:
+        weeks.setdefault(row["week"], []).append(row)
+    return [(f"{store} {week}", week_rows) for week, week_rows in weeks.items()]
+
+
+def store_name(path):
+    """Output name for a store: its folder name or .db file name without extension."""
+    name = os.path.basename(os.path.normpath(path))
+    return os.path.splitext(name)[0] if not os.path.isdir(path) else name
+
+
+# ------------------ COMMANDS ------------------
+
+def run_job(job):
+    """
+    Schedule one store and write its output file.
+
+    Runs inside pool workers, so only small values cross the process
+    boundary: the job is a few paths and the rules, the worker parses the
+    store itself, and it sends back a summary dict instead of the roster
+    or the schedule. With out=None nothing is written and the compact
+    schedule rows come back instead, for the combined --roster workbook.
+    """
+    from scheduler_core import (
+        ExcelStorage, HorizonScheduler, ScheduleCache, cached_schedule, horizon_rows, open_store,
+        schedule_rows,
+    )
+
+    name, paths, out, fmt, rules, horizon, cache_dir = job
+    cache = ScheduleCache(cache_dir) if cache_dir else None
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        return {"store": name, "error": f"not found: {', '.join(missing)}"}
+
+    started = time.perf_counter()
+    storage = ExcelStorage(*paths) if len(paths) == 2 else open_store(paths[0])
+    try:
+        managers = {m["id"]: m for m in storage.load_managers()}
+        settings = storage.load_shift_settings()
+        overrides = storage.load_overrides() if horizon else None
+        loaded = time.perf_counter()
+        if horizon:
+            start, weeks = horizon
+            scheduler = HorizonScheduler(managers.values(), settings, overrides, rules, cache)
+            rows = horizon_rows(scheduler.schedule(start, weeks), settings, managers)
+            solver = scheduler.solver
+        else:
+            schedule, solver = cached_schedule(managers.values(), settings, rules, cache)
+            rows = schedule_rows(schedule, settings, managers)
+        solved = time.perf_counter()
+        if out is not None:
+            write_schedule(out, fmt, name, rows)
+    except Exception as e:
+        return {"store": name, "error": f"failed: {e}"}
+    finally:
+        storage.close()
+    written = time.perf_counter()
+
+    result = {
+        "store": name,
+        "out": out,
+        "managers": len(managers),
+        "shifts": len(rows),
+        "uncovered": sum(1 for row in rows if row["manager_id"] is None),
+        "load_s": loaded - started,
+        "solve_s": solved - loaded,
+        "write_s": written - solved,
+    }
+    if solver is None:
+        result["cache"] = "hit"
+    else:
+        if solver.cache_status:
+            result["cache"] = solver.cache_status
+        if solver.balance_report is not None:
+            result["balance"] = solver.balance_report["improvement"]
+    if out is None:
+        result["rows"] = rows
+    return result
+
+
+def report_job(result):
+    """Print one store's summary line; returns False if the store failed."""
+    if "error" in result:
+        print(f"{result['store']}: {result['error']}", file=sys.stderr)
+        return False
+    total = result["load_s"] + result["solve_s"] + result["write_s"]
+    fairness = f", fairness {result['balance']:.0%} better" if "balance" in result else ""
+    cached = f", cache {result['cache']}" if "cache" in result else ""
+    print(
+        f"{result['store']}: {result['shifts']} critical shifts, {result['uncovered']} uncovered{fairness}{cached}, "
+        f"{result['managers']} managers (load {result['load_s']:.2f}s, solve {result['solve_s']:.2f}s, "
+        f"write {result['write_s']:.2f}s, total {total:.2f}s) -> {result['out'] or 'roster'}",
+        file=sys.stderr,
+    )
+    return True
+
+
+def find_stores(folder):
+    """Stores inside `folder`: subfolders holding managers.xlsx, and .db files."""
+    from scheduler_core import MANAGERS_EXCEL_FILENAME
+
+    stores = []
+    for entry in sorted(os.listdir(folder)):
+        path = os.path.join(folder, entry)
+        if os.path.isdir(path) and os.path.exists(os.path.join(path, MANAGERS_EXCEL_FILENAME)):
+            stores.append(path)
+        elif entry.lower().endswith(".db"):
+            stores.append(path)
+    return stores
+
+
+def job_size(job):
+    """Bytes on disk for a job's inputs; used to hand out big stores first."""
+    return sum(os.path.getsize(p) for p in job[1] if os.path.exists(p))
+
+
+def generate(args):
+    from scheduler_core import (
+        MANAGERS_EXCEL_FILENAME, SCHEDULE_CACHE_DIRNAME, SHIFT_SETTINGS_EXCEL_FILENAME, get_file_path,
+    )
+
+    rules = {}
+    if args.max_hours is not None:
+        rules["max_weekly_hours"] = args.max_hours
+    if args.no_mixed_genders:
+        rules["mixed_gender_days"] = False
+    if args.balance:
+        rules["balance_seconds"] = args.balance
+
+    horizon = None
+    if args.weeks or args.start:
+        try:
+            horizon = (date.fromisoformat(args.start) if args.start else date.today(), args.weeks or 1)
+        except ValueError:
+            sys.exit(f"generate: --start must be YYYY-MM-DD, got {args.start!r}")
+
+    cache_dir = None
+    if not args.no_cache:
+        cache_dir = args.cache_dir or get_file_path(SCHEDULE_CACHE_DIRNAME)
+
+    # (name, input paths, output path, format, rules, horizon, cache folder)
+    jobs = []
+    if args.managers or args.shifts:
+        if not (args.managers and args.shifts and args.out):
+            sys.exit("generate: --managers, --shifts and --out go together")
+        name = os.path.splitext(os.path.basename(args.out))[0]
+        ext = os.path.splitext(args.out)[1].lower().lstrip(".")
+        fmt = ext if ext in OUTPUT_FORMATS else args.format
+        jobs.append((name, [args.managers, args.shifts], args.out, fmt, rules, horizon, cache_dir))
+
+    stores = list(args.stores)
+    if args.stores_dir:
+        if not os.path.isdir(args.stores_dir):
+            sys.exit(f"generate: not a folder: {args.stores_dir}")
+        stores += find_stores(args.stores_dir)
+    for path in stores:
+        name = store_name(path)
+        out = os.path.join(args.out_dir, f"{name}.{args.format}")
+        if os.path.isdir(path):
+            # A store folder must have both workbooks; name them so a missing one is reported
+            paths = [os.path.join(path, f) for f in (MANAGERS_EXCEL_FILENAME, SHIFT_SETTINGS_EXCEL_FILENAME)]
+        else:
+            paths = [path]
+        jobs.append((name, paths, out, args.format, rules, horizon, cache_dir))
+    if not jobs:
+        sys.exit("generate: no stores given")
+    if stores and not args.roster:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    if args.roster:
+        # One combined workbook: workers hand back rows, this process writes the sheets
+        jobs = [job[:2] + (None,) + job[3:] for job in jobs]
+
+    workers = args.jobs or os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+    started = time.perf_counter()
+    if workers == 1:
+        results = []
+        for job in jobs:
+            results.append(run_job(job))
+            report_job(results[-1])
+    else:
+        # Largest stores first so no single big store is left running alone at the end
+        jobs.sort(key=job_size, reverse=True)
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for future in as_completed([pool.submit(run_job, job) for job in jobs]):
+                results.append(future.result())
+                report_job(results[-1])
+    done = [r for r in results if "error" not in r]
+    if args.roster:
+        from scheduler_core import write_roster_workbook
+        done.sort(key=lambda r: r["store"])
+        write_roster_workbook(
+            (sheet for r in done for sheet in roster_sheets(r["store"], r["rows"])), args.roster
+        )
+        print(f"{len(done)} store(s) -> {args.roster}", file=sys.stderr)
+    elapsed = time.perf_counter() - started
+
+    busy = sum(r["load_s"] + r["solve_s"] + r["write_s"] for r in done)
+    print(
+        f"{len(done)}/{len(jobs)} stores in {elapsed:.2f}s with {workers} worker(s) "
+        f"({busy:.2f}s summed over stores)",
+        file=sys.stderr,
+    )
+    return 0 if len(done) == len(jobs) else 1
+
+
+def coverage(args):
+    from scheduler_core import CoverageMatrix, open_store, write_coverage_report
+
+    if not os.path.exists(args.store):
+        sys.exit(f"coverage: not found: {args.store}")
+    storage = open_store(args.store)
+    try:
+        matrix = CoverageMatrix(storage.load_managers(), storage.load_shift_settings())
+    finally:
+        storage.close()
+
+    gaps = matrix.gaps()
+    write_coverage_report(matrix.cells(), gaps, args.out)
+    for gap in gaps:
+        print(
+            f"{gap['day']} {gap['start']}-{gap['end']}: {gap['eligible']} eligible "
+            f"for {gap['required']} shift(s) ({', '.join(gap['shifts'])})",
+            file=sys.stderr,
+        )
+    print(f"{len(gaps)} uncovered window(s) -> {args.out}", file=sys.stderr)
+    return 1 if gaps else 0
+
+
+def convert(args):
+    from scheduler_core import copy_storage, open_store
+
+    if not os.path.exists(args.source):
+        sys.exit(f"convert: not found: {args.source}")
+    if args.target.lower().endswith(".db"):
+        target_dir = os.path.dirname(os.path.abspath(args.target))
+    else:
+        target_dir = args.target
+    os.makedirs(target_dir, exist_ok=True)
+
+    source = open_store(args.source)
+    target = open_store(args.target)
+    try:
+        copy_storage(source, target)
+    finally:
+        source.close()
+        target.close()
+    print(f"{args.source} -> {args.target}", file=sys.stderr)
+    return 0
+
+
+def import_managers(args):
+    from scheduler_core import TIME_FORMAT_HINT, ManagerImport, ManagerRepository, open_store
+
+    for path in (args.store, args.file):
+        if not os.path.exists(path):
+            sys.exit(f"import: not found: {path}")
+    storage = open_store(args.store)
+    try:
+        repo = ManagerRepository.load(storage)
+        try:
+            batch = ManagerImport.read(args.file, repo.all())
+        except ValueError as e:
+            sys.exit(f"import: {e}")
+        for error in batch.errors:
+            print(error, file=sys.stderr)
+        if batch.errors:
+            print(TIME_FORMAT_HINT, file=sys.stderr)
+        elif not args.dry_run:
+            batch.apply(repo)
+            repo.flush()
+    finally:
+        storage.close()
+
+    verb = "checked" if args.dry_run or batch.errors else "imported"
+    print(f"{args.file} {verb} into {args.store}: {batch.summary()}", file=sys.stderr)
+    return 1 if batch.errors else 0
+
+
+# ------------------ MAIN ------------------
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="schedule", description="Headless shift scheduler.")
+    parser.add_argument("--profile", nargs="?", const="", metavar="DIR",
+                        help="time every storage/solver call, run cProfile and write a trace "
+                             "to DIR (default: profiles next to the app); with -j only the "
+                             "parent process is recorded")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="schedule one or more stores")
+    gen.add_argument("stores", nargs="*", help="store folders (Excel) or .db files")
+    gen.add_argument("--managers", help="managers workbook (single store)")
+    gen.add_argument("--shifts", help="shift settings workbook (single store)")
+    gen.add_argument("--out", help="output file for --managers/--shifts")
+    gen.add_argument("--stores-dir", help="folder of stores (subfolders and .db files)")
+    gen.add_argument("--out-dir", default=".", help="output folder for store arguments")
+    gen.add_argument("--format", choices=OUTPUT_FORMATS, default="json",
+                     help="per-store output; xlsx is a printable roster")
+    gen.add_argument("--roster", help="write all stores to this workbook, one sheet each, "
+                                      "instead of per-store files")
+    gen.add_argument("-j", "--jobs", type=int, default=1,
+                     help="worker processes for several stores (0 = one per CPU)")
+    gen.add_argument("--start", help="first date (YYYY-MM-DD) of a multi-week horizon; "
+                                     "weeks start on the Monday on or before it")
+    gen.add_argument("--weeks", type=int, help="number of calendar weeks to schedule, "
+                                               "applying each store's date overrides")
+    gen.add_argument("--max-hours", type=int, help="weekly hour cap per manager")
+    gen.add_argument("--balance", type=float, metavar="SECONDS",
+                     help="time budget for the fairness pass (hours, weekends, open/close)")
+    gen.add_argument("--no-mixed-genders", action="store_true",
+                     help="don't try to mix genders on each day")
+    gen.add_argument("--cache-dir", help="schedule cache folder (default: schedule_cache next to the app)")
+    gen.add_argument("--no-cache", action="store_true",
+                     help="always solve from scratch and leave the schedule cache alone")
+    gen.set_defaults(func=generate)
+
+    cov = commands.add_parser("coverage", help="hour-by-hour coverage report for one store")
+    cov.add_argument("store", help="store folder or .db file")
+    cov.add_argument("--out", default="coverage_report.xlsx", help="report workbook (sheets replaced)")
+    cov.set_defaults(func=coverage)
+
+    conv = commands.add_parser("convert", help="copy a store between Excel and SQLite")
+    conv.add_argument("source", help="store folder or .db file")
+    conv.add_argument("target", help="store folder or .db file (replaced)")
+    conv.set_defaults(func=convert)
+
+    imp = commands.add_parser("import", help="add/update managers from a CSV or workbook, all or nothing")
+    imp.add_argument("store", help="store folder or .db file")
+    imp.add_argument("file", help=".csv or .xlsx with managers.xlsx columns (ID optional)")
+    imp.add_argument("--dry-run", action="store_true", help="validate and report without writing")
+    imp.set_defaults(func=import_managers)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile is None:
+        return args.func(args)
+
+    from scheduler_core import INSTRUMENTATION, format_stats
+    INSTRUMENTATION.enable(profile=True)
+    try:
+        return args.func(args)
+    finally:
+        paths = INSTRUMENTATION.dump(args.profile or None)
+        print(format_stats(INSTRUMENTATION.snapshot(), limit=25), file=sys.stderr)
+        print("Profile written to:", *paths, sep="\n  ", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
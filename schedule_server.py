@@ -0,0 +1,530 @@
+"""
+Local HTTP/JSON API for the scheduler (asyncio, standard library only).
+
+    python schedule_server.py stores/north --port 8765
+    python schedule_server.py stores/north.db
+
+    GET    /managers                all managers
+    GET    /managers/<id>           one manager
+    POST   /managers                add {"name", "role", "gender", "availability": {"Mon": [9, 17], ...}}
+    PUT    /managers/<id>           replace a manager's fields (same body)
+    DELETE /managers/<id>
+    GET    /shift-settings          [{"day", "shift_type", "start", "end"}, ...]
+    PUT    /shift-settings          replace all shift settings (same shape)
+    PATCH  /shift-settings          set the listed shifts; null start and end removes one
+    GET    /schedule                this week's schedule, as `schedule generate --format json`
+    GET    /stats                   request counts and queue state
+
+The store is loaded into memory once. Reads are answered from memory on
+the event loop, so any number of connections read at the same time;
+response bodies are cached until the next write (managers one by one, so
+an edit re-encodes a single manager). Writes are validated by the handler
+and queued for one writer task, which applies them in order and flushes
+whatever has queued up to storage with a single call on the I/O thread.
+A write is answered once its batch is on disk.
+"""
+
+import argparse
+import asyncio
+import json
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from scheduler_core import (
+    DAYS, SHIFT_TYPES, ManagerRepository, ScheduleCache, ScheduleSolver, manager_to_record,
+    open_store, parse_window, schedule_rows, validate_manager,
+)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 4 * 1024 * 1024
+WRITE_BATCH_LIMIT = 1000  # writes applied before one flush; the rest wait for the next
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, errors=None):
+        super().__init__(message)
+        self.status = status
+        self.errors = errors
+
+
+def json_body(value):
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def parse_json(body):
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"body is not JSON: {e}")
+
+
+def manager_from_body(data):
+    """Validated Manager from a request body (see validate_manager)."""
+    if not isinstance(data, dict):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "expected a JSON object")
+    availability = data.get("availability") or {}
+    if not isinstance(availability, dict):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "availability must map days to [start, end]")
+    windows = {}
+    for day, window in availability.items():
+        if day not in DAYS or not isinstance(window, (list, tuple)) or len(window) != 2:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"availability: bad entry {day!r}: {window!r}")
+        windows[day] = tuple(window)
+    manager, errors = validate_manager(data.get("name"), data.get("role"), data.get("gender"), windows)
+    if errors:
+        raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, "invalid manager", errors)
+    return manager
+
+
+def shift_edits_from_body(data, settings):
+    """
+    {(day, shift_type): window or None} from a list of shift rows; None removes.
+    Shift types are SHIFT_TYPES plus the custom ones already in `settings`.
+    """
+    if not isinstance(data, list):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "expected a JSON list of shifts")
+    edits = {}
+    errors = []
+    for i, row in enumerate(data):
+        if not isinstance(row, dict):
+            errors.append(f"item {i}: expected an object")
+            continue
+        day, shift_type = row.get("day"), row.get("shift_type")
+        if day not in DAYS or not isinstance(shift_type, str) or (
+            shift_type not in SHIFT_TYPES and (day, shift_type) not in settings
+        ):
+            errors.append(f"item {i}: unknown shift {day!r} / {shift_type!r}")
+            continue
+        try:
+            window = parse_window(row.get("start"), row.get("end"))
+        except ValueError as e:
+            errors.append(f"item {i}: {day} - {shift_type}: {e}")
+            continue
+        edits[(day, shift_type)] = window if window != (None, None) else None
+    if errors:
+        raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, "invalid shift settings", errors)
+    return edits
+
+
+def schedule_body(schedule, settings, managers):
+    rows = schedule_rows(schedule, settings, managers)
+    uncovered = sum(1 for row in rows if row["manager_id"] is None)
+    return json_body({"uncovered": uncovered, "shifts": rows})
+
+
+def shift_rows(settings):
+    return [
+        {"day": day, "shift_type": shift_type, "start": start, "end": end}
+        for (day, shift_type), (start, end) in settings.items()
+    ]
+
+
+# ------------------ STORE STATE ------------------
+
+class StoreState:
+    """
+    One store held in memory for the server: the ManagerRepository, the
+    shift settings and cached response bodies, plus the shift-setting
+    changes not yet flushed. Only the event loop mutates it (through the
+    writer task); flush() runs on the I/O thread while the loop waits.
+
+    Once a schedule has been asked for, every edit is also queued in
+    solver_edits as (ScheduleSolver method, *args) for the next repair.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.repo = None
+        self.settings = None
+        self.version = 0
+        self.manager_bodies = {}  # id -> encoded manager
+        self.bodies = {}          # resource -> (version, encoded body)
+        self.settings_full = False
+        self.settings_changed = {}
+        self.settings_removed = set()
+        self.solver_edits = None
+
+    def load(self):
+        self.storage.ensure_exists()
+        self.repo = ManagerRepository.load(self.storage)
+        self.settings = self.storage.load_shift_settings()
+
+    # ---------- reads ----------
+
+    def cached(self, resource, build):
+        entry = self.bodies.get(resource)
+        if entry is None or entry[0] != self.version:
+            entry = self.bodies[resource] = (self.version, build())
+        return entry[1]
+
+    def manager_body(self, manager_id):
+        body = self.manager_bodies.get(manager_id)
+        if body is None:
+            if manager_id not in self.repo.managers:
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"no manager {manager_id}")
+            body = self.manager_bodies[manager_id] = json_body(manager_to_record(self.repo.get(manager_id)))
+        return body
+
+    def managers_body(self):
+        return self.cached("managers", lambda: b"[" + b",".join(
+            self.manager_body(manager_id) for manager_id in self.repo.managers.ids
+        ) + b"]")
+
+    def shift_settings_body(self):
+        return self.cached("shift_settings", lambda: json_body(shift_rows(self.settings)))
+
+    # ---------- writes (event loop only) ----------
+
+    def _changed(self, manager_id=None, *solver_edits):
+        self.version += 1
+        if manager_id is not None:
+            self.manager_bodies.pop(manager_id, None)
+        if self.solver_edits is not None:
+            self.solver_edits.extend(solver_edits)
+
+    def add_manager(self, manager):
+        manager = self.repo.add(manager)
+        self._changed(manager.id, ("update_manager", manager))
+        return HTTPStatus.CREATED, self.manager_body(manager.id)
+
+    def update_manager(self, manager_id, manager):
+        if manager_id not in self.repo.managers:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"no manager {manager_id}")
+        manager = self.repo.update(manager_id, manager)
+        self._changed(manager_id, ("update_manager", manager))
+        return HTTPStatus.OK, self.manager_body(manager_id)
+
+    def delete_manager(self, manager_id):
+        if manager_id not in self.repo.managers:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"no manager {manager_id}")
+        self.repo.delete(manager_id)
+        self._changed(manager_id, ("remove_manager", manager_id))
+        return HTTPStatus.NO_CONTENT, b""
+
+    def replace_shift_settings(self, edits):
+        self.settings = {key: window for key, window in edits.items() if window is not None}
+        self.settings_full = True
+        self.settings_changed.clear()
+        self.settings_removed.clear()
+        self._changed(None, ("update_settings", dict(self.settings)))
+        return HTTPStatus.OK, self.shift_settings_body()
+
+    def update_shift_settings(self, edits):
+        for key, window in edits.items():
+            if window is None:
+                self.settings.pop(key, None)
+                self.settings_changed.pop(key, None)
+                self.settings_removed.add(key)
+            else:
+                self.settings[key] = window
+                self.settings_changed[key] = window
+                self.settings_removed.discard(key)
+        self._changed(None, *(("update_shift", key, window) for key, window in edits.items()))
+        return HTTPStatus.OK, self.shift_settings_body()
+
+    def flush(self):
+        """Write pending changes: one repository flush and at most one shift-settings call."""
+        self.repo.flush()
+        if self.settings_full:
+            self.storage.save_shift_settings(dict(self.settings))
+        elif self.settings_changed or self.settings_removed:
+            self.storage.update_shift_settings(dict(self.settings_changed), list(self.settings_removed))
+        else:
+            return
+        # Only cleared once written, so a failed flush is retried with the next batch
+        self.settings_full = False
+        self.settings_changed.clear()
+        self.settings_removed.clear()
+
+
+# ------------------ SERVER ------------------
+
+class ScheduleServer:
+    """
+    asyncio HTTP/1.1 server (keep-alive, Content-Length bodies) over a StoreState.
+
+    Storage calls all run on one I/O thread, in order. The schedule is
+    solved once on a second thread and then repaired with the queued
+    edits on each request, so a long solve never holds up a write.
+    """
+
+    def __init__(self, storage, schedule_cache=None):
+        self.state = StoreState(storage)
+        self.schedule_cache = schedule_cache
+        self.io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="server-io")
+        self.solver_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="server-solve")
+        self.writes = None
+        self.writer_task = None
+        self.solver = None         # lives on solver_pool's thread
+        self.schedule_task = None  # (version, task) of the latest solve or repair
+        self.requests = {}
+        self.flushes = 0
+        self.started = time.monotonic()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.io, self.state.load)
+        self.writes = asyncio.Queue()
+        self.writer_task = asyncio.create_task(self.writer())
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def close(self):
+        """Flush what is queued, then close storage (Excel compacts here)."""
+        await self.writes.join()
+        self.writer_task.cancel()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.io, self.state.flush)
+        await loop.run_in_executor(self.io, self.state.storage.close)
+        self.io.shutdown()
+        self.solver_pool.shutdown(cancel_futures=True)
+
+    # ---------- writer ----------
+
+    async def write(self, apply, *args):
+        """Queue a state change for the writer; returns its response once flushed."""
+        future = asyncio.get_running_loop().create_future()
+        await self.writes.put((apply, args, future))
+        return await future
+
+    async def writer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.writes.get()]
+            while len(batch) < WRITE_BATCH_LIMIT and not self.writes.empty():
+                batch.append(self.writes.get_nowait())
+
+            outcomes = []
+            for apply, args, future in batch:
+                try:
+                    outcomes.append((future, apply(*args), None))
+                except Exception as e:
+                    outcomes.append((future, None, e))
+
+            try:
+                await loop.run_in_executor(self.io, self.state.flush)
+                self.flushes += 1
+            except Exception as e:
+                error = HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, f"applied but not saved yet: {e}")
+                outcomes = [(future, None, failed or error) for future, _, failed in outcomes]
+
+            for future, result, error in outcomes:
+                if not future.done():
+                    if error is None:
+                        future.set_result(result)
+                    else:
+                        future.set_exception(error)
+            for _ in batch:
+                self.writes.task_done()
+
+    # ---------- schedule ----------
+
+    async def schedule_body(self):
+        """The schedule for the current state; concurrent requests share one solve."""
+        state = self.state
+        cached = state.bodies.get("schedule")
+        if cached is not None and cached[0] == state.version:
+            return cached[1]
+
+        if self.schedule_task is None or self.schedule_task[0] != state.version:
+            if state.solver_edits is None:
+                managers = state.repo.all()
+                settings = dict(state.settings)
+                state.solver_edits = []
+
+                def run():
+                    self.solver = ScheduleSolver(managers, settings)
+                    schedule = self.solver.solve(self.schedule_cache)
+                    return schedule_body(schedule, settings, {m.id: m for m in managers})
+            else:
+                # Runs after the first solve: solver_pool has a single thread
+                edits, state.solver_edits = state.solver_edits, []
+
+                def run():
+                    solver = self.solver
+                    for action, *args in edits:
+                        getattr(solver, action)(*args)
+                    return schedule_body(solver.schedule(), solver.settings, solver.managers)
+
+            loop = asyncio.get_running_loop()
+            task = asyncio.ensure_future(loop.run_in_executor(self.solver_pool, run))
+            self.schedule_task = (state.version, task)
+
+        version, task = self.schedule_task
+        try:
+            body = await task
+        except Exception:
+            # The solver may be missing or half-repaired: solve from scratch next time
+            if self.schedule_task is not None and self.schedule_task[1] is task:
+                self.schedule_task = None
+                self.solver = None
+                state.solver_edits = None
+            raise
+        if version == state.version:
+            state.bodies["schedule"] = (version, body)
+        return body
+
+    # ---------- routing ----------
+
+    async def dispatch(self, method, path, body):
+        """(status, encoded JSON body) for one request; raises HTTPError."""
+        state = self.state
+        parts = [part for part in path.split("/") if part]
+        route = "/" + "/".join(parts[:1])
+        self.requests[(method, route)] = self.requests.get((method, route), 0) + 1
+
+        if parts == ["managers"]:
+            if method == "GET":
+                return HTTPStatus.OK, state.managers_body()
+            if method == "POST":
+                return await self.write(state.add_manager, manager_from_body(parse_json(body)))
+        elif len(parts) == 2 and parts[0] == "managers":
+            try:
+                manager_id = int(parts[1])
+            except ValueError:
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"no manager {parts[1]}")
+            if method == "GET":
+                return HTTPStatus.OK, state.manager_body(manager_id)
+            if method == "PUT":
+                manager = manager_from_body(parse_json(body))
+                return await self.write(state.update_manager, manager_id, manager)
+            if method == "DELETE":
+                return await self.write(state.delete_manager, manager_id)
+        elif parts == ["shift-settings"]:
+            if method == "GET":
+                return HTTPStatus.OK, state.shift_settings_body()
+            if method == "PUT":
+                edits = shift_edits_from_body(parse_json(body), state.settings)
+                return await self.write(state.replace_shift_settings, edits)
+            if method == "PATCH":
+                edits = shift_edits_from_body(parse_json(body), state.settings)
+                return await self.write(state.update_shift_settings, edits)
+        elif parts == ["schedule"]:
+            if method == "GET":
+                return HTTPStatus.OK, await self.schedule_body()
+        elif parts == ["stats"]:
+            if method == "GET":
+                return HTTPStatus.OK, json_body(self.stats())
+        else:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"no such resource: {path}")
+        raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+
+    def stats(self):
+        return {
+            "uptime_s": round(time.monotonic() - self.started, 3),
+            "managers": len(self.state.repo.managers),
+            "shifts": len(self.state.settings),
+            "version": self.state.version,
+            "queued_writes": self.writes.qsize(),
+            "flushes": self.flushes,
+            "requests": {f"{method} {route}": n for (method, route), n in sorted(self.requests.items())},
+        }
+
+    # ---------- HTTP ----------
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.respond(writer, HTTPStatus.BAD_REQUEST, json_body({"error": "bad request line"}))
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY_BYTES:
+                    await self.respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                       json_body({"error": "bad or too large Content-Length"}))
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, payload = await self.dispatch(method.upper(), urlsplit(target).path, body)
+                except HTTPError as e:
+                    error = {"error": str(e)}
+                    if e.errors:
+                        error["errors"] = e.errors
+                    status, payload = e.status, json_body(error)
+                except Exception as e:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, json_body({"error": str(e)})
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # server shutting down with the connection idle
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def respond(writer, status, payload, keep_alive=False):
+        status = HTTPStatus(status)
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + payload)
+        await writer.drain()
+
+
+# ------------------ MAIN ------------------
+
+async def serve(args):
+    cache = None if args.no_cache else ScheduleCache(args.cache_dir)
+    app = ScheduleServer(open_store(args.store), cache)
+    server = await app.start(args.host, args.port)
+    host, port = server.sockets[0].getsockname()[:2]
+    # First line of output; benchmark.py --server reads the port from it
+    print(f"Serving {args.store} on http://{host}:{port}", flush=True)
+    try:
+        # Stop (and flush) on SIGTERM as on Ctrl+C; not available on Windows
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except (NotImplementedError, AttributeError):
+        pass
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await app.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON API for one store.")
+    parser.add_argument("store", help="store folder (Excel) or .db file")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument("--cache-dir", help="schedule cache folder (default: schedule_cache next to the app)")
+    parser.add_argument("--no-cache", action="store_true", help="solve /schedule from scratch every time")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
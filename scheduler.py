@@ -1,269 +1,270 @@
-import os
+import queue
+import sys
+import threading
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import font as tkfont
+from tkinter import filedialog, messagebox, ttk
 
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
+from scheduler_core import (
+    DAYS, ROLES, GENDERS, SHIFT_TYPES, MANAGERS_FLUSH_DELAY_MS,
+    HOURS_PER_DAY, WEEK_HOURS, SCHEDULE_EXPORT_FILENAME, BALANCE_SECONDS, TIME_CHOICES, TIME_FORMAT_HINT,
+    SCENARIO_WORKERS, CoverageMatrix, ManagerImport, ManagerRepository, ManagerSearchIndex, Scenario,
+    ScheduleCache, ScheduleSolver, evaluate_scenarios,
+    INSTRUMENTATION, format_balance_report, get_file_path, instrumented_class,
+    open_storage, parse_window, schedule_rows, validate_manager, write_coverage_report,
+    write_roster_workbook,
+)
 
 
-# ------------------ CONFIG ------------------
+# ------------------ BACKGROUND WORKER ------------------
 
-DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-ROLES = ["admin", "shift", "area"]
-GENDERS = ["M", "F"]
-
-MANAGERS_EXCEL_FILENAME = "managers.xlsx"
-MANAGERS_SHEET_NAME = "Managers"
-
-SHIFT_SETTINGS_EXCEL_FILENAME = "shift_settings.xlsx"
-SHIFT_SETTINGS_SHEET_NAME = "ShiftSettings"
-
-# NEW shift types
-SHIFT_TYPES = ["delivery", "open", "close", "early shift", "mid shift"]
-
-
-# ------------------ PATH HELPERS ------------------
-
-def get_file_path(filename):
-    """Always keep Excel files in the same folder as this script."""
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    return os.path.join(base_dir, filename)
-
-
-# ------------------ MANAGERS EXCEL HELPERS ------------------
-
-def create_managers_excel_if_missing():
-    """Create managers.xlsx with Managers sheet if needed."""
-    path = get_file_path(MANAGERS_EXCEL_FILENAME)
-    if os.path.exists(path):
-        # If file exists, make sure sheet exists too
-        wb = load_workbook(path)
-        if MANAGERS_SHEET_NAME in wb.sheetnames:
-            wb.close()
-            return
-        ws = wb.create_sheet(title=MANAGERS_SHEET_NAME)
-    else:
-        wb = Workbook()
-        ws = wb.active
-        ws.title = MANAGERS_SHEET_NAME
-
-    # Header row
-    headers = ["ID", "Name", "Role", "Gender"]
-    for day in DAYS:
-        headers.append(f"{day}_start")
-        headers.append(f"{day}_end")
-
-    ws.append(headers)
+class BackgroundWorker:
+    """
+    One daemon thread that runs storage and scheduling jobs off the Tk thread.
 
-    # Style header
-    header_font = Font(bold=True)
-    header_fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center")
+    submit() queues a job under a key. A job that is still waiting when
+    another one with the same key arrives is replaced (and its callbacks
+    dropped), so rapid edits collapse into a single save. Results come
+    back to the Tk thread by polling with root.after.
+    """
 
-    for col_idx, header in enumerate(headers, start=1):
-        cell = ws.cell(row=1, column=col_idx)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
+    POLL_MS = 50
 
-        if header in ("ID", "Role", "Gender"):
-            ws.column_dimensions[cell.column_letter].width = 10
-        elif "start" in header or "end" in header:
-            ws.column_dimensions[cell.column_letter].width = 12
+    def __init__(self, root, on_busy_change=None):
+        self.root = root
+        self.on_busy_change = on_busy_change
+        self.wakeup = threading.Condition()
+        self.pending = {}  # key -> (func, callback, on_error), in submit order
+        self.results = queue.Queue()
+        self.outstanding = 0
+        self.polling = False
+
+        thread = threading.Thread(target=self._run, name="scheduler-worker", daemon=True)
+        thread.start()
+
+    def submit(self, key, func, callback=None, on_error=None):
+        """Run func() on the worker; callback(result) or on_error(exc) runs on the Tk thread."""
+        with self.wakeup:
+            if key not in self.pending:
+                self.outstanding += 1
+            self.pending[key] = (func, callback, on_error)
+            self.wakeup.notify()
+
+        if not self.polling:
+            self.polling = True
+            if self.on_busy_change is not None:
+                self.on_busy_change(True)
+            self.root.after(self.POLL_MS, self._poll)
+
+    def _run(self):
+        INSTRUMENTATION.profile_thread()
+        while True:
+            with self.wakeup:
+                while not self.pending:
+                    self.wakeup.wait()
+                key = next(iter(self.pending))
+                func, callback, on_error = self.pending.pop(key)
+            try:
+                if INSTRUMENTATION.enabled:
+                    result = INSTRUMENTATION.call(f"worker: {key}", func, (), {})
+                else:
+                    result = func()
+                self.results.put((callback, result, None))
+            except Exception as e:
+                self.results.put((on_error, None, e))
+
+    def _poll(self):
+        while True:
+            try:
+                callback, result, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            with self.wakeup:
+                self.outstanding -= 1
+            # A failing callback is reported like a failed job so polling carries on
+            try:
+                if error is not None:
+                    (callback or self.report_error)(error)
+                elif callback is not None:
+                    callback(result)
+            except Exception as e:
+                self.report_error(e)
+
+        if self.outstanding:
+            self.root.after(self.POLL_MS, self._poll)
         else:
-            ws.column_dimensions[cell.column_letter].width = 25
+            self.polling = False
+            if self.on_busy_change is not None:
+                self.on_busy_change(False)
 
-    wb.save(path)
-    wb.close()
+    def report_error(self, error):
+        messagebox.showerror("Background task failed", str(error))
 
 
-def load_all_managers():
-    """
-    Load all managers from managers.xlsx.
-    Returns list of dicts: [{row_index, id, name, role, gender, availability}, ...]
-    availability: {"Mon": (start, end), ...}, start/end are ints or None.
+# ------------------ TKINTER APP ------------------
+
+@instrumented_class
+class VirtualListbox(tk.Frame):
     """
-    path = get_file_path(MANAGERS_EXCEL_FILENAME)
-    wb = load_workbook(path)
-    ws = wb[MANAGERS_SHEET_NAME]
+    Scrollable list that only puts the rows currently on screen into Tk.
 
-    managers = []
+    items is a plain list of keys (manager IDs); format_item(key) renders
+    one row. Scrolling re-renders the visible slice, so a 100k-row list
+    costs the same to draw as a 30-row one. Selection is tracked by key.
+    """
 
-    for row in range(2, ws.max_row + 1):
-        id_val = ws.cell(row=row, column=1).value
-        name = ws.cell(row=row, column=2).value or ""
-        role = ws.cell(row=row, column=3).value or ""
-        gender = ws.cell(row=row, column=4).value or ""
+    def __init__(self, master, format_item, on_select=None, width=30):
+        super().__init__(master)
+        self.format_item = format_item
+        self.on_select = on_select
+        self.items = []
+        self.top = 0
+        self.visible_rows = 20
+        self.selected = None
 
-        availability = {}
-        col = 5
-        for day in DAYS:
-            start_val = ws.cell(row=row, column=col).value
-            end_val = ws.cell(row=row, column=col + 1).value
-            availability[day] = (start_val, end_val)
-            col += 2
-
-        managers.append({
-            "row_index": row,
-            "id": id_val,
-            "name": name,
-            "role": role,
-            "gender": gender,
-            "availability": availability
-        })
-
-    wb.close()
-    return managers
-
-
-def write_manager_to_excel(row_index, manager_data):
-    """Write/overwrite a single manager row in managers.xlsx."""
-    path = get_file_path(MANAGERS_EXCEL_FILENAME)
-    wb = load_workbook(path)
-    ws = wb[MANAGERS_SHEET_NAME]
-
-    if row_index is None:
-        row_index = ws.max_row + 1
-
-    ws.cell(row=row_index, column=1, value=manager_data["id"])
-    ws.cell(row=row_index, column=2, value=manager_data["name"])
-    ws.cell(row=row_index, column=3, value=manager_data["role"])
-    ws.cell(row=row_index, column=4, value=manager_data["gender"])
-
-    col = 5
-    for day in DAYS:
-        start_val, end_val = manager_data["availability"].get(day, (None, None))
-        ws.cell(row=row_index, column=col, value=start_val)
-        ws.cell(row=row_index, column=col + 1, value=end_val)
-        col += 2
-
-    wb.save(path)
-    wb.close()
-
-
-def delete_manager_row_from_excel(row_index):
-    """Delete a manager row from managers.xlsx."""
-    path = get_file_path(MANAGERS_EXCEL_FILENAME)
-    wb = load_workbook(path)
-    ws = wb[MANAGERS_SHEET_NAME]
-    ws.delete_rows(row_index, 1)
-    wb.save(path)
-    wb.close()
-
-
-def get_next_manager_id(managers):
-    """Simple incremental numeric ID."""
-    max_id = 0
-    for m in managers:
-        try:
-            mid = int(m["id"])
-            if mid > max_id:
-                max_id = mid
-        except (TypeError, ValueError):
-            continue
-    return max_id + 1
-
-
-# ------------------ SHIFT SETTINGS EXCEL HELPERS ------------------
-
-def create_shift_settings_excel_if_missing():
-    """Create shift_settings.xlsx with ShiftSettings sheet if needed."""
-    path = get_file_path(SHIFT_SETTINGS_EXCEL_FILENAME)
-    if os.path.exists(path):
-        wb = load_workbook(path)
-        if SHIFT_SETTINGS_SHEET_NAME in wb.sheetnames:
-            wb.close()
-            return
-        ws = wb.create_sheet(title=SHIFT_SETTINGS_SHEET_NAME)
-    else:
-        wb = Workbook()
-        ws = wb.active
-        ws.title = SHIFT_SETTINGS_SHEET_NAME
-
-    # Header row: Day, ShiftType, StartHour, EndHour
-    headers = ["Day", "ShiftType", "StartHour", "EndHour"]
-    ws.append(headers)
-
-    header_font = Font(bold=True)
-    header_fill = PatternFill(start_color="CCCCFF", end_color="CCCCFF", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center")
-
-    for col_idx, header in enumerate(headers, start=1):
-        cell = ws.cell(row=1, column=col_idx)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        ws.column_dimensions[cell.column_letter].width = 14
-
-    wb.save(path)
-    wb.close()
-
-
-def load_all_shift_settings():
-    """
-    Load all shift settings into dict:
-    { (day, shift_type): (start_hour, end_hour) }
-    """
-    create_shift_settings_excel_if_missing()
-    path = get_file_path(SHIFT_SETTINGS_EXCEL_FILENAME)
-    wb = load_workbook(path)
-    ws = wb[SHIFT_SETTINGS_SHEET_NAME]
+        self.listbox = tk.Listbox(self, width=width, exportselection=False)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-    settings = {}
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-    for row in range(2, ws.max_row + 1):
-        day = ws.cell(row=row, column=1).value
-        shift_type = ws.cell(row=row, column=2).value
-        start_hour = ws.cell(row=row, column=3).value
-        end_hour = ws.cell(row=row, column=4).value
+        self.line_height = tkfont.nametofont(self.listbox.cget("font")).metrics("linespace") + 1
+        self.listbox.bind("<Configure>", self._on_configure)
+        self.listbox.bind("<<ListboxSelect>>", self._on_listbox_select)
+        self.listbox.bind("<MouseWheel>", lambda e: self._scroll_by(-1 if e.delta > 0 else 1) or "break")
+        self.listbox.bind("<Button-4>", lambda e: self._scroll_by(-1) or "break")
+        self.listbox.bind("<Button-5>", lambda e: self._scroll_by(1) or "break")
+        self.listbox.bind("<Up>", lambda e: self._move_selection(-1) or "break")
+        self.listbox.bind("<Down>", lambda e: self._move_selection(1) or "break")
 
-        if not day or not shift_type:
-            continue
-        settings[(day, shift_type)] = (start_hour, end_hour)
+    # ---------- data ----------
 
-    wb.close()
-    return settings
+    def set_items(self, items):
+        self.items = items
+        self.top = max(0, min(self.top, len(items) - self.visible_rows))
+        self.render()
 
+    def selected_key(self):
+        return self.selected
 
-def write_all_shift_settings(settings):
-    """
-    Overwrite all shift settings with given dict:
-    settings[(day, shift_type)] = (start_hour, end_hour)
-    """
-    path = get_file_path(SHIFT_SETTINGS_EXCEL_FILENAME)
-    wb = load_workbook(path)
-    ws = wb[SHIFT_SETTINGS_SHEET_NAME]
+    def select(self, key):
+        """Select `key` and scroll it into view."""
+        self.selected = key
+        try:
+            pos = self.items.index(key)
+        except ValueError:
+            self.render()
+            return
+        if not self.top <= pos < self.top + self.visible_rows:
+            self.top = max(0, min(pos, len(self.items) - self.visible_rows))
+        self.render()
 
-    # Clear existing rows except header
-    if ws.max_row > 1:
-        ws.delete_rows(2, ws.max_row - 1)
+    def clear_selection(self):
+        self.selected = None
+        self.listbox.selection_clear(0, tk.END)
 
-    # Write new data
-    for (day, shift_type), (start_hour, end_hour) in settings.items():
-        row = ws.max_row + 1
-        ws.cell(row=row, column=1, value=day)
-        ws.cell(row=row, column=2, value=shift_type)
-        ws.cell(row=row, column=3, value=start_hour)
-        ws.cell(row=row, column=4, value=end_hour)
+    # ---------- drawing ----------
 
-    wb.save(path)
-    wb.close()
+    def render(self):
+        visible = self.items[self.top:self.top + self.visible_rows]
+        self.listbox.delete(0, tk.END)
+        if visible:
+            self.listbox.insert(tk.END, *(self.format_item(key) for key in visible))
+            if self.selected in visible:
+                self.listbox.selection_set(visible.index(self.selected))
+
+        total = len(self.items)
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.visible_rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def refresh_item(self, key):
+        """Redraw a single row if it is on screen."""
+        visible = self.items[self.top:self.top + self.visible_rows]
+        if key in visible:
+            pos = visible.index(key)
+            self.listbox.delete(pos)
+            self.listbox.insert(pos, self.format_item(key))
+            if key == self.selected:
+                self.listbox.selection_set(pos)
+
+    # ---------- scrolling ----------
+
+    def yview(self, *args):
+        """Scrollbar protocol: ("moveto", fraction) or ("scroll", n, "units"/"pages")."""
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self.items)))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= self.visible_rows
+            self._scroll_by(step)
+
+    def _scroll_to(self, top):
+        top = max(0, min(top, len(self.items) - self.visible_rows))
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    def _scroll_by(self, step):
+        self._scroll_to(self.top + step)
+
+    def _on_configure(self, event):
+        rows = max(1, event.height // self.line_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.set_items(self.items)
+
+    def _on_listbox_select(self, event):
+        sel = self.listbox.curselection()
+        if not sel:
+            return
+        self.selected = self.items[self.top + sel[0]]
+        if self.on_select is not None:
+            self.on_select(self.selected)
 
+    def _move_selection(self, step):
+        if not self.items:
+            return
+        try:
+            pos = self.items.index(self.selected) + step
+        except ValueError:
+            pos = self.top
+        pos = max(0, min(pos, len(self.items) - 1))
+        self.select(self.items[pos])
+        if self.on_select is not None:
+            self.on_select(self.selected)
 
-# ------------------ TKINTER APP ------------------
 
+@instrumented_class
 class ManagersApp:
     def __init__(self, root):
         self.root = root
-        self.root.title("Scheduling app (Excel)")
+        self.storage = open_storage()
+        self.root.title(f"Scheduling app ({self.storage.name})")
         self.root.geometry("1000x520")
 
-        # Ensure Excel files exist
-        create_managers_excel_if_missing()
-        create_shift_settings_excel_if_missing()
+        # Storage and scheduling run here so the window never freezes
+        self.worker = BackgroundWorker(root, self.on_busy_change)
+
+        # In-memory managers, flushed to storage in batches (None while loading)
+        self.repo = None
+        self.search_index = None
+        self.flush_job = None
 
-        # In-memory managers
-        self.managers = []
+        # Schedule solver, built on first use and repaired on each edit.
+        # While it is being built, edits queue up in solver_backlog.
+        self.solver = None
+        self.solver_backlog = None
+
+        # Coverage matrix for the heatmap, built and kept up to date the same way
+        self.coverage = None
+        self.coverage_backlog = None
+
+        # Saved shift settings (None until first loaded) and unsaved row edits
+        self.shift_settings = None
+        self.shift_settings_edits = {}
 
         # ---------- LEFT: managers list ----------
         left_frame = tk.Frame(root)
@@ -271,25 +272,48 @@ class ManagersApp:
 
         tk.Label(left_frame, text="Managers").pack()
 
-        list_frame = tk.Frame(left_frame)
-        list_frame.pack(fill=tk.BOTH, expand=True)
-
-        self.listbox = tk.Listbox(list_frame, width=30)
-        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-        scrollbar = tk.Scrollbar(list_frame, orient=tk.VERTICAL)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Type-ahead filter, e.g. "anna role:shift tue:13-23"
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(left_frame, textvariable=self.search_var)
+        search_entry.pack(fill=tk.X)
+        search_entry.bind("<KeyRelease>", lambda e: self.apply_filter())
 
-        self.listbox.config(yscrollcommand=scrollbar.set)
-        scrollbar.config(command=self.listbox.yview)
+        self.match_label = tk.Label(left_frame, text="", fg="gray")
+        self.match_label.pack()
 
-        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.manager_list = VirtualListbox(left_frame, self.format_manager_id, on_select=self.on_select)
+        self.manager_list.pack(fill=tk.BOTH, expand=True)
 
         # Button to open Shift Settings window
         tk.Button(
             left_frame, text="Shift settings...", command=self.open_shift_settings_window
         ).pack(pady=10)
 
+        # Button to generate the weekly schedule
+        tk.Button(
+            left_frame, text="Generate schedule...", command=self.open_schedule_window
+        ).pack()
+
+        # Button to open the hour-by-hour coverage heatmap
+        tk.Button(
+            left_frame, text="Coverage...", command=self.open_coverage_window
+        ).pack(pady=(10, 0))
+
+        # What-if scenarios compared side by side
+        tk.Button(
+            left_frame, text="What-if...", command=self.open_whatif_window
+        ).pack(pady=(10, 0))
+
+        # Live timings, only when started with SCHEDULER_PROFILE set
+        if INSTRUMENTATION.enabled:
+            tk.Button(
+                left_frame, text="Stats...", command=self.open_stats_window
+            ).pack(pady=(10, 0))
+
+        # Busy indicator for background work
+        self.busy_label = tk.Label(left_frame, text="", fg="gray")
+        self.busy_label.pack(pady=(10, 0))
+
         # ---------- RIGHT: manager form ----------
         right_frame = tk.Frame(root)
         right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -314,7 +338,7 @@ class ManagersApp:
         # Availability explanation
         tk.Label(
             right_frame,
-            text="Availability (hours 0–23, empty = OFF)\nExample: Tue 13–23 → after 13:00"
+            text="Availability (9 or 17:30, empty = OFF)\nExample: Tue 13–23 → after 13:00; Fri 22–6 runs overnight"
         ).grid(row=2, column=0, columnspan=4, sticky="w", pady=(10, 2))
 
         # Spinboxes for each day
@@ -331,10 +355,10 @@ class ManagersApp:
             self.avail_end_vars[day] = end_var
 
             start_spin = tk.Spinbox(
-                right_frame, from_=0, to=23, textvariable=start_var, width=5
+                right_frame, values=TIME_CHOICES, textvariable=start_var, width=6
             )
             end_spin = tk.Spinbox(
-                right_frame, from_=0, to=23, textvariable=end_var, width=5
+                right_frame, values=TIME_CHOICES, textvariable=end_var, width=6
             )
 
             start_spin.grid(row=row, column=1, sticky="w", padx=5, pady=1)
@@ -348,6 +372,7 @@ class ManagersApp:
         tk.Button(btn_frame, text="Add", width=10, command=self.add_manager).grid(row=0, column=0, padx=5)
         tk.Button(btn_frame, text="Update", width=10, command=self.update_manager).grid(row=0, column=1, padx=5)
         tk.Button(btn_frame, text="Delete", width=10, command=self.delete_manager).grid(row=0, column=2, padx=5)
+        tk.Button(btn_frame, text="Import...", width=10, command=self.import_managers).grid(row=0, column=3, padx=5)
 
         right_frame.columnconfigure(1, weight=1)
         right_frame.columnconfigure(3, weight=1)
@@ -355,26 +380,109 @@ class ManagersApp:
         # Load data
         self.reload_managers_from_excel()
 
+        # Write pending edits before the window goes away
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
         # Keep reference to settings window (if open)
         self.shift_settings_window = None
+        self.coverage_window = None
+        self.schedule_window = None
+        self.stats_window = None
+        self.whatif_window = None
+        self.scenario_specs = []  # (name, [(Scenario method, args, label), ...]) for this session
+        self.scenario_count = 0
+        self.schedule_cache = ScheduleCache()  # solved weeks on disk, keyed by roster + settings
 
     # ---------- Managers: data <-> UI ----------
 
     def reload_managers_from_excel(self):
-        self.managers = load_all_managers()
+        storage = self.storage
+
+        def load():
+            # Ensure Excel files / database exist
+            storage.ensure_exists()
+            repo = ManagerRepository.load(storage)
+            return repo, ManagerSearchIndex(repo.all())
+
+        self.worker.submit("load_managers", load, self.on_managers_loaded)
+
+    def on_managers_loaded(self, result):
+        self.repo, self.search_index = result
         self.refresh_listbox()
 
+    def on_busy_change(self, busy):
+        self.busy_label.config(text="Working…" if busy else "")
+        self.root.config(cursor="watch" if busy else "")
+
     def refresh_listbox(self):
-        self.listbox.delete(0, tk.END)
-        for m in self.managers:
-            display = f"{m['name']} ({m['role']})"
-            self.listbox.insert(tk.END, display)
+        self.apply_filter()
 
-    def get_selected_index(self):
-        sel = self.listbox.curselection()
-        if not sel:
-            return None
-        return sel[0]
+    def apply_filter(self):
+        """Re-run the search box query and redraw the visible rows."""
+        if self.search_index is None:
+            return
+        ids = self.search_index.search(self.search_var.get())
+        self.manager_list.set_items(ids)
+        self.match_label.config(text=f"{len(ids)} of {len(self.search_index)}")
+
+    def format_manager(self, m):
+        return f"{m['name']} ({m['role']})"
+
+    def format_manager_id(self, manager_id):
+        return self.format_manager(self.repo.get(manager_id))
+
+    def schedule_flush(self):
+        """Debounce: write pending edits once the user pauses."""
+        if self.flush_job is not None:
+            self.root.after_cancel(self.flush_job)
+        self.flush_job = self.root.after(MANAGERS_FLUSH_DELAY_MS, self.flush_managers)
+
+    def flush_managers(self):
+        self.flush_job = None
+        self.worker.submit("flush_managers", self.repo.flush, on_error=self.on_save_error)
+
+    def on_save_error(self, e):
+        messagebox.showerror(
+            "Save error",
+            f"Could not save managers (is the file open in Excel?):\n{e}"
+        )
+
+    def on_close(self):
+        if self.flush_job is not None:
+            self.root.after_cancel(self.flush_job)
+            self.flush_job = None
+
+        repo = self.repo
+        storage = self.storage
+
+        def close():
+            if repo is not None:
+                repo.flush()
+            storage.close()
+            if INSTRUMENTATION.enabled:
+                print("Profile written to:", *INSTRUMENTATION.dump(), sep="\n  ", file=sys.stderr)
+
+        self.worker.submit("close", close, lambda _: self.root.destroy(), on_error=self.on_save_error)
+
+    def update_models(self, action, arg):
+        """
+        Apply an edit to the solver and the coverage matrix, or queue it for
+        whichever of them is still being built.
+        """
+        if self.solver is not None:
+            getattr(self.solver, action)(arg)
+            self.refresh_schedule_window()
+        elif self.solver_backlog is not None:
+            self.solver_backlog.append((action, arg))
+
+        if self.coverage is not None:
+            getattr(self.coverage, action)(arg)
+            self.refresh_coverage_window()
+        elif self.coverage_backlog is not None:
+            self.coverage_backlog.append((action, arg))
+
+    def get_selected_id(self):
+        return self.manager_list.selected_key()
 
     def clear_form(self):
         self.entry_name.delete(0, tk.END)
@@ -385,68 +493,38 @@ class ManagersApp:
             self.avail_end_vars[day].set("")
 
     def read_form(self):
-        name = self.entry_name.get().strip()
-        if not name:
-            messagebox.showwarning("Input error", "Name cannot be empty.")
-            return None
-
-        role = self.role_var.get()
-        gender = self.gender_var.get()
-
-        availability = {}
-        for day in DAYS:
-            start_str = self.avail_start_vars[day].get().strip()
-            end_str = self.avail_end_vars[day].get().strip()
-
-            if not start_str and not end_str:
-                availability[day] = (None, None)
-                continue
-
-            try:
-                start_val = int(start_str) if start_str != "" else None
-                end_val = int(end_str) if end_str != "" else None
-
-                if start_val is not None and not (0 <= start_val <= 23):
-                    raise ValueError
-                if end_val is not None and not (0 <= end_val <= 23):
-                    raise ValueError
-                if start_val is not None and end_val is not None and start_val > end_val:
-                    messagebox.showwarning(
-                        "Input error",
-                        f"For {day}, start hour cannot be greater than end hour."
-                    )
-                    return None
-
-                availability[day] = (start_val, end_val)
-            except ValueError:
-                messagebox.showwarning(
-                    "Input error",
-                    f"For {day}, hours must be integers 0–23 or empty."
-                )
-                return None
-
-        return {
-            "name": name,
-            "role": role,
-            "gender": gender,
-            "availability": availability
+        windows = {
+            day: (self.avail_start_vars[day].get(), self.avail_end_vars[day].get())
+            for day in DAYS
         }
+        manager, errors = validate_manager(
+            self.entry_name.get(), self.role_var.get(), self.gender_var.get(), windows
+        )
+        if errors:
+            messagebox.showwarning("Input error", "\n".join(errors) + f"\n\n{TIME_FORMAT_HINT}")
+        return manager
 
     # ---------- Managers: button actions ----------
 
     def add_manager(self):
+        if self.repo is None:
+            return
+
         data = self.read_form()
         if data is None:
             return
 
-        data["id"] = get_next_manager_id(self.managers)
-        write_manager_to_excel(None, data)
-        self.reload_managers_from_excel()
+        manager = self.repo.add(data)
+        self.search_index.add(manager)
+        self.apply_filter()
+        self.schedule_flush()
         self.clear_form()
 
+        self.update_models("update_manager", manager)
+
     def update_manager(self):
-        idx = self.get_selected_index()
-        if idx is None:
+        manager_id = self.get_selected_id()
+        if manager_id is None:
             messagebox.showwarning("Selection error", "Please select a manager to update.")
             return
 
@@ -454,33 +532,81 @@ class ManagersApp:
         if data is None:
             return
 
-        selected = self.managers[idx]
-        data["id"] = selected["id"]
-        row_index = selected["row_index"]
+        manager = self.repo.update(manager_id, data)
+        self.search_index.update(manager)
+        self.apply_filter()
+        self.schedule_flush()
 
-        write_manager_to_excel(row_index, data)
-        self.reload_managers_from_excel()
+        self.update_models("update_manager", manager)
+
+    IMPORT_ERRORS_SHOWN = 20
+
+    def import_managers(self):
+        """Add/update managers from a CSV or workbook, all or nothing."""
+        if self.repo is None:
+            return
+        path = filedialog.askopenfilename(
+            title="Import managers",
+            filetypes=[("Managers", "*.csv *.xlsx"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+
+        managers = self.repo.all()
+        self.worker.submit(
+            "import_managers",
+            lambda: ManagerImport.read(path, managers),
+            self.on_import_checked,
+            on_error=lambda e: messagebox.showerror("Import error", f"Could not read {path}:\n{e}"),
+        )
+
+    def on_import_checked(self, batch):
+        if batch.errors:
+            shown = batch.errors[:self.IMPORT_ERRORS_SHOWN]
+            more = len(batch.errors) - len(shown)
+            messagebox.showwarning(
+                "Import error",
+                f"Nothing was imported ({batch.summary()}):\n\n" + "\n".join(shown)
+                + (f"\n... and {more} more" if more else "") + f"\n\n{TIME_FORMAT_HINT}",
+            )
+            return
+        if not batch.added and not batch.updated:
+            messagebox.showinfo("Import", f"Nothing to import ({batch.summary()}).")
+            return
+        if not messagebox.askyesno("Confirm import", f"Import managers: {batch.summary()}?"):
+            return
+
+        for manager in batch.apply(self.repo):
+            self.search_index.update(manager)
+            self.update_models("update_manager", manager)
+        self.apply_filter()
+
+        # One write for the whole batch, without waiting for the debounce
+        if self.flush_job is not None:
+            self.root.after_cancel(self.flush_job)
+        self.flush_managers()
 
     def delete_manager(self):
-        idx = self.get_selected_index()
-        if idx is None:
+        manager_id = self.get_selected_id()
+        if manager_id is None:
             messagebox.showwarning("Selection error", "Please select a manager to delete.")
             return
 
-        selected = self.managers[idx]
+        selected = self.repo.get(manager_id)
         if not messagebox.askyesno("Confirm delete", f"Delete '{selected['name']}'?"):
             return
 
-        delete_manager_row_from_excel(selected["row_index"])
-        self.reload_managers_from_excel()
+        self.repo.delete(manager_id)
+        self.search_index.remove(manager_id)
+        self.manager_list.clear_selection()
+        self.apply_filter()
+        self.schedule_flush()
         self.clear_form()
 
-    def on_select(self, event):
-        idx = self.get_selected_index()
-        if idx is None:
-            return
+        self.update_models("remove_manager", selected["id"])
 
-        m = self.managers[idx]
+    def on_select(self, manager_id):
+        m = self.repo.get(manager_id)
         self.entry_name.delete(0, tk.END)
         self.entry_name.insert(0, m["name"])
 
@@ -495,19 +621,48 @@ class ManagersApp:
     # ---------- SHIFT SETTINGS WINDOW ----------
 
     def open_shift_settings_window(self):
-        if self.shift_settings_window is not None and tk.Toplevel.winfo_exists(self.shift_settings_window):
+        if self.shift_settings_window is not None:
+            self.shift_settings_window.deiconify()
             self.shift_settings_window.lift()
             return
 
-        self.shift_settings_window = tk.Toplevel(self.root)
-        self.shift_settings_window.title("Critical shift settings")
-        self.shift_settings_window.geometry("800x500")
+        if self.shift_settings is not None:
+            self.build_shift_settings_window()
+            return
 
-        # Load existing settings from Excel
-        existing_settings = load_all_shift_settings()
+        self.worker.submit(
+            "load_shift_settings", self.storage.load_shift_settings, self.on_shift_settings_loaded
+        )
+
+    def on_shift_settings_loaded(self, settings):
+        self.shift_settings = settings
+        if self.shift_settings_window is None:
+            self.build_shift_settings_window()
+
+    def shift_settings_keys(self):
+        """Every (day, shift_type) row: the standard grid plus custom types found in the file."""
+        keys = [(day, shift_type) for day in DAYS for shift_type in SHIFT_TYPES]
+        standard = set(keys)
+        keys.extend(key for key in self.shift_settings if key not in standard)
+        return keys
+
+    def current_shift_window(self, key):
+        if key in self.shift_settings_edits:
+            return self.shift_settings_edits[key]
+        return self.shift_settings.get(key)
+
+    def build_shift_settings_window(self):
+        """
+        Build the settings window once; closing only hides it. Rows live in a
+        Treeview (no per-row widgets) and one edit strip edits the selected row.
+        """
+        win = self.shift_settings_window = tk.Toplevel(self.root)
+        win.title("Critical shift settings")
+        win.geometry("600x500")
+        win.protocol("WM_DELETE_WINDOW", win.withdraw)
 
         # --- TOP BUTTONS (always visible) ---
-        top_btn_frame = tk.Frame(self.shift_settings_window)
+        top_btn_frame = tk.Frame(win)
         top_btn_frame.grid(row=0, column=0, sticky="w", padx=5, pady=5)
 
         tk.Button(
@@ -521,120 +676,712 @@ class ManagersApp:
             top_btn_frame,
             text="Close",
             width=10,
-            command=self.shift_settings_window.destroy
+            command=win.withdraw
         ).grid(row=0, column=1, padx=5)
 
         # Header label
         tk.Label(
-            self.shift_settings_window,
-            text="Set critical shifts per day (start/end hour for each shift type)."
+            win,
+            text="Set critical shifts per day (start/end time for each shift type). Changed rows are highlighted."
         ).grid(row=1, column=0, padx=5, pady=5, sticky="w")
 
-        # --- SCROLLABLE TABLE AREA ---
-        container = tk.Frame(self.shift_settings_window)
+        # --- TABLE ---
+        container = tk.Frame(win)
         container.grid(row=2, column=0, sticky="nsew", padx=5, pady=5)
+        win.rowconfigure(2, weight=1)
+        win.columnconfigure(0, weight=1)
+
+        columns = ("day", "shift_type", "start", "end")
+        self.shift_tree = ttk.Treeview(container, columns=columns, show="headings", selectmode="browse")
+        for column, heading, width in zip(
+            columns, ("Day", "Shift type", "Start (H or HH:MM)", "End (H or HH:MM)"), (60, 140, 120, 120)
+        ):
+            self.shift_tree.heading(column, text=heading)
+            self.shift_tree.column(column, width=width, anchor="w")
+        self.shift_tree.tag_configure("changed", background="#FFF3C4")
+
+        scrollbar = tk.Scrollbar(container, orient="vertical", command=self.shift_tree.yview)
+        self.shift_tree.configure(yscrollcommand=scrollbar.set)
+        self.shift_tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
 
-        # Allow the scrollable area to expand
-        self.shift_settings_window.rowconfigure(2, weight=1)
-        self.shift_settings_window.columnconfigure(0, weight=1)
+        self.shift_rows = {}  # Treeview iid -> (day, shift_type)
+        for key in self.shift_settings_keys():
+            iid = self.shift_tree.insert("", tk.END, values=self.shift_row_values(key))
+            self.shift_rows[iid] = key
+        self.shift_tree.bind("<<TreeviewSelect>>", self.on_shift_row_select)
+
+        # --- EDIT STRIP ---
+        edit_frame = tk.Frame(win)
+        edit_frame.grid(row=3, column=0, sticky="w", padx=5, pady=5)
+
+        self.shift_edit_label = tk.Label(edit_frame, text="Select a row", width=22, anchor="w")
+        self.shift_edit_label.grid(row=0, column=0, padx=5)
+
+        self.shift_start_var = tk.StringVar()
+        self.shift_end_var = tk.StringVar()
+        tk.Spinbox(edit_frame, values=TIME_CHOICES, width=6, textvariable=self.shift_start_var).grid(row=0, column=1)
+        tk.Label(edit_frame, text="to").grid(row=0, column=2, padx=5)
+        tk.Spinbox(edit_frame, values=TIME_CHOICES, width=6, textvariable=self.shift_end_var).grid(row=0, column=3)
+
+        tk.Button(edit_frame, text="Set", width=8, command=self.set_shift_row).grid(row=0, column=4, padx=5)
+        tk.Button(edit_frame, text="Clear", width=8, command=self.clear_shift_row).grid(row=0, column=5)
+
+    def shift_row_values(self, key):
+        start_val, end_val = self.current_shift_window(key) or (None, None)
+        return (
+            key[0], key[1],
+            "" if start_val is None else start_val,
+            "" if end_val is None else end_val,
+        )
+
+    def refresh_shift_row(self, iid):
+        key = self.shift_rows[iid]
+        tags = ("changed",) if key in self.shift_settings_edits else ()
+        self.shift_tree.item(iid, values=self.shift_row_values(key), tags=tags)
+
+    def selected_shift_row(self):
+        sel = self.shift_tree.selection()
+        return sel[0] if sel else None
+
+    def on_shift_row_select(self, event):
+        iid = self.selected_shift_row()
+        if iid is None:
+            return
+        day, shift_type = self.shift_rows[iid]
+        start_val, end_val = self.current_shift_window((day, shift_type)) or (None, None)
+        self.shift_edit_label.config(text=f"{day} - {shift_type}:")
+        self.shift_start_var.set("" if start_val is None else str(start_val))
+        self.shift_end_var.set("" if end_val is None else str(end_val))
+
+    def stage_shift_edit(self, iid, window):
+        """Remember a row edit until the next save (dropping no-op edits)."""
+        key = self.shift_rows[iid]
+        if window == self.shift_settings.get(key):
+            self.shift_settings_edits.pop(key, None)
+        else:
+            self.shift_settings_edits[key] = window
+        self.refresh_shift_row(iid)
 
-        canvas = tk.Canvas(container)
-        scrollbar = tk.Scrollbar(container, orient="vertical", command=canvas.yview)
-        canvas.configure(yscrollcommand=scrollbar.set)
+    def set_shift_row(self):
+        iid = self.selected_shift_row()
+        if iid is None:
+            return
 
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        start_str = self.shift_start_var.get().strip()
+        end_str = self.shift_end_var.get().strip()
 
-        table_frame = tk.Frame(canvas)
-        canvas.create_window((0, 0), window=table_frame, anchor="nw")
+        # Completely empty row => no critical shift
+        if not start_str and not end_str:
+            self.stage_shift_edit(iid, None)
+            return
 
-        def on_frame_configure(event):
-            canvas.configure(scrollregion=canvas.bbox("all"))
+        try:
+            window = parse_window(start_str, end_str)
+        except ValueError as e:
+            day, shift_type = self.shift_rows[iid]
+            messagebox.showwarning(
+                "Input error",
+                f"Error in {day} - {shift_type}: {e}."
+            )
+            return
 
-        table_frame.bind("<Configure>", on_frame_configure)
+        self.stage_shift_edit(iid, window)
 
-        # Optional: mouse wheel scrolling
-        def _on_mousewheel(event):
-            canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+    def clear_shift_row(self):
+        iid = self.selected_shift_row()
+        if iid is None:
+            return
+        self.shift_start_var.set("")
+        self.shift_end_var.set("")
+        self.stage_shift_edit(iid, None)
 
-        canvas.bind_all("<MouseWheel>", _on_mousewheel)
+    def save_shift_settings(self):
+        """Write only the edited rows."""
+        if not self.shift_settings_edits:
+            messagebox.showinfo("Saved", "No changes to save.")
+            return
 
-        # Column headers inside the scrollable frame
-        tk.Label(table_frame, text="Day").grid(row=0, column=0, padx=5, pady=2)
-        tk.Label(table_frame, text="Shift type").grid(row=0, column=1, padx=5, pady=2)
-        tk.Label(table_frame, text="Start hour (0–23)").grid(row=0, column=2, padx=5, pady=2)
-        tk.Label(table_frame, text="End hour (0–23)").grid(row=0, column=3, padx=5, pady=2)
+        edits = dict(self.shift_settings_edits)
+        changed = {key: window for key, window in edits.items() if window is not None}
+        removed = [key for key, window in edits.items() if window is None]
+
+        storage = self.storage
+        self.worker.submit(
+            "save_shift_settings",
+            lambda: storage.update_shift_settings(changed, removed),
+            lambda _: self.on_shift_settings_saved(edits)
+        )
+
+    def on_shift_settings_saved(self, edits):
+        settings = dict(self.shift_settings)
+        for key, window in edits.items():
+            if window is None:
+                settings.pop(key, None)
+            else:
+                settings[key] = window
+            # Keep edits made to the row while the save was running
+            if self.shift_settings_edits.get(key, window) == window:
+                self.shift_settings_edits.pop(key, None)
+        self.shift_settings = settings
+
+        for iid, key in self.shift_rows.items():
+            if key in edits:
+                self.refresh_shift_row(iid)
+
+        self.update_models("update_settings", settings)
+        messagebox.showinfo("Saved", "Shift settings saved/updated successfully.")
 
-        # Create StringVars for each (day, shift_type)
-        self.shift_start_vars = {}
-        self.shift_end_vars = {}
+    # ---------- SCHEDULE WINDOW ----------
 
-        row = 1
-        for day in DAYS:
-            for shift_type in SHIFT_TYPES:
-                key = (day, shift_type)
+    def open_schedule_window(self):
+        if self.schedule_window is not None and tk.Toplevel.winfo_exists(self.schedule_window):
+            self.schedule_window.lift()
+            return
+        if self.repo is None:
+            return
 
-                start_var = tk.StringVar()
-                end_var = tk.StringVar()
+        if self.solver is not None:
+            self.build_schedule_window()
+            return
+        if self.solver_backlog is not None:
+            return  # already being built
+
+        managers = self.repo.all()
+        storage = self.storage
+        settings = self.shift_settings
+
+        cache = self.schedule_cache
+
+        def build():
+            shift_settings = settings if settings is not None else storage.load_shift_settings()
+            solver = ScheduleSolver(managers, shift_settings)
+            solver.solve(cache)
+            return solver
+
+        self.solver_backlog = []
+        self.worker.submit("build_solver", build, self.on_solver_built, on_error=self.on_solver_error)
+
+    def on_solver_built(self, solver):
+        for action, arg in self.solver_backlog:
+            getattr(solver, action)(arg)
+        self.solver_backlog = None
+        self.solver = solver
+        if self.schedule_window is not None and tk.Toplevel.winfo_exists(self.schedule_window):
+            self.refresh_schedule_window()
+        else:
+            self.build_schedule_window()
 
-                start_val, end_val = existing_settings.get(key, (None, None))
+    def on_solver_error(self, e):
+        self.solver_backlog = None
+        messagebox.showerror("Schedule error", f"Could not generate the schedule:\n{e}")
 
-                if start_val is not None:
-                    start_var.set(str(start_val))
-                if end_val is not None:
-                    end_var.set(str(end_val))
+    def build_schedule_window(self):
+        self.schedule_window = tk.Toplevel(self.root)
+        self.schedule_window.title("Weekly schedule")
+        self.schedule_window.geometry("600x500")
 
-                self.shift_start_vars[key] = start_var
-                self.shift_end_vars[key] = end_var
+        list_frame = tk.Frame(self.schedule_window)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-                tk.Label(table_frame, text=day).grid(row=row, column=0, padx=5, pady=1, sticky="w")
-                tk.Label(table_frame, text=shift_type).grid(row=row, column=1, padx=5, pady=1, sticky="w")
+        self.schedule_listbox = tk.Listbox(list_frame, font=("Courier", 10))
+        self.schedule_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-                tk.Spinbox(
-                    table_frame, from_=0, to=23, width=5, textvariable=start_var
-                ).grid(row=row, column=2, padx=5, pady=1)
+        scrollbar = tk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.schedule_listbox.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.schedule_listbox.config(yscrollcommand=scrollbar.set)
 
-                tk.Spinbox(
-                    table_frame, from_=0, to=23, width=5, textvariable=end_var
-                ).grid(row=row, column=3, padx=5, pady=1)
+        self.schedule_summary = tk.Label(self.schedule_window)
+        self.schedule_summary.pack(pady=(0, 5))
 
-                row += 1
+        self.balance_summary = tk.Label(self.schedule_window, fg="gray")
+        self.balance_summary.pack(pady=(0, 5))
 
-    def save_shift_settings(self):
-        settings = {}
+        btn_frame = tk.Frame(self.schedule_window)
+        btn_frame.pack(pady=(0, 10))
+        tk.Button(
+            btn_frame, text="Balance fairness", command=self.balance_schedule
+        ).grid(row=0, column=0, padx=5)
+        tk.Button(
+            btn_frame, text="Export roster to Excel", command=self.export_schedule
+        ).grid(row=0, column=1, padx=5)
 
-        for key in self.shift_start_vars.keys():
-            start_str = self.shift_start_vars[key].get().strip()
-            end_str = self.shift_end_vars[key].get().strip()
+        self.refresh_schedule_window()
 
-            # Completely empty row => ignore
-            if not start_str and not end_str:
-                continue
+    def refresh_schedule_window(self):
+        """Redraw the schedule window (if open) from the solver's current state."""
+        if self.schedule_window is None or not tk.Toplevel.winfo_exists(self.schedule_window):
+            return
 
-            try:
-                start_val = int(start_str) if start_str != "" else None
-                end_val = int(end_str) if end_str != "" else None
-
-                # Validate hours
-                if start_val is not None and not (0 <= start_val <= 23):
-                    raise ValueError("Start hour must be 0–23.")
-                if end_val is not None and not (0 <= end_val <= 23):
-                    raise ValueError("End hour must be 0–23.")
-                if start_val is not None and end_val is not None and start_val > end_val:
-                    raise ValueError("Start hour cannot be greater than end hour.")
-
-                settings[key] = (start_val, end_val)
-
-            except ValueError as e:
-                day, shift_type = key
-                messagebox.showwarning(
-                    "Input error",
-                    f"Error in {day} - {shift_type}: {e}"
-                )
-                return
-
-        write_all_shift_settings(settings)
-        messagebox.showinfo("Saved", "Shift settings saved/updated successfully.")
+        self.schedule_listbox.delete(0, tk.END)
+        uncovered = 0
+        schedule = self.solver.schedule()
+        for (day, shift_type), manager_id in schedule.items():
+            start_val, end_val = self.solver.settings[(day, shift_type)]
+            hours = f"{'' if start_val is None else start_val}–{'' if end_val is None else end_val}"
+            if manager_id is None:
+                who = "UNCOVERED"
+                uncovered += 1
+            else:
+                m = self.solver.managers[manager_id]
+                who = f"{m['name']} ({m['role']})"
+            self.schedule_listbox.insert(tk.END, f"{day:<4} {shift_type:<12} {hours:<6} {who}")
+
+        self.schedule_summary.config(
+            text=f"{len(schedule)} critical shifts, {uncovered} uncovered."
+        )
+
+    def balance_schedule(self):
+        """Run the fairness pass on the worker; edits made meanwhile queue up as during a build."""
+        if self.solver is None:
+            return
+        solver = self.solver
+        self.solver = None
+        self.solver_backlog = []
+
+        def run():
+            return solver, solver.balance(BALANCE_SECONDS)
+
+        def restore(e):
+            self.on_solver_built(solver)
+            messagebox.showerror("Schedule error", f"Could not balance the schedule:\n{e}")
+
+        self.worker.submit("balance_schedule", run, self.on_schedule_balanced, on_error=restore)
+
+    def on_schedule_balanced(self, result):
+        solver, report = result
+        self.on_solver_built(solver)
+        self.balance_summary.config(text=format_balance_report(report).capitalize())
+
+    def export_schedule(self):
+        # Snapshot on the Tk thread; the solver keeps changing while the file is written
+        rows = schedule_rows(self.solver.schedule(), self.solver.settings, self.solver.managers)
+        path = get_file_path(SCHEDULE_EXPORT_FILENAME)
+        self.worker.submit(
+            "export_schedule",
+            lambda: write_roster_workbook([("Schedule", rows)], path),
+            lambda _: messagebox.showinfo("Exported", f"Roster saved to:\n{path}"),
+        )
+
+    # ---------- COVERAGE WINDOW ----------
+
+    COVERAGE_CELL_W = 64
+    COVERAGE_CELL_H = 18
+    COVERAGE_LABEL_W = 40
+    COVERAGE_COLORS = {
+        "idle": "#eeeeee",     # no critical shift running
+        "short": "#f4a6a6",    # fewer eligible managers than shifts
+        "tight": "#ffe08a",    # exactly enough
+        "ok": "#b7e1a1",
+    }
+
+    def open_coverage_window(self):
+        if self.coverage_window is not None and tk.Toplevel.winfo_exists(self.coverage_window):
+            self.coverage_window.lift()
+            return
+        if self.repo is None:
+            return
+
+        if self.coverage is not None:
+            self.build_coverage_window()
+            return
+        if self.coverage_backlog is not None:
+            return  # already being built
+
+        managers = self.repo.all()
+        storage = self.storage
+        settings = self.shift_settings
+
+        def build():
+            shift_settings = settings if settings is not None else storage.load_shift_settings()
+            return CoverageMatrix(managers, shift_settings)
+
+        self.coverage_backlog = []
+        self.worker.submit("build_coverage", build, self.on_coverage_built, on_error=self.on_coverage_error)
+
+    def on_coverage_built(self, coverage):
+        for action, arg in self.coverage_backlog:
+            getattr(coverage, action)(arg)
+        self.coverage_backlog = None
+        self.coverage = coverage
+        self.build_coverage_window()
+
+    def on_coverage_error(self, e):
+        self.coverage_backlog = None
+        messagebox.showerror("Coverage error", f"Could not compute coverage:\n{e}")
+
+    def build_coverage_window(self):
+        win = self.coverage_window = tk.Toplevel(self.root)
+        win.title("Coverage by hour")
+        win.geometry("560x720")
+
+        tk.Label(
+            win,
+            text="Eligible managers / critical shifts per hour (idle hours show everyone available)",
+        ).pack(pady=(10, 5))
+
+        width = self.COVERAGE_LABEL_W + len(DAYS) * self.COVERAGE_CELL_W
+        height = self.COVERAGE_CELL_H * (HOURS_PER_DAY + 1)
+        canvas = self.coverage_canvas = tk.Canvas(win, width=width, height=height, highlightthickness=0)
+        canvas.pack(padx=10)
+
+        for col, day in enumerate(DAYS):
+            x = self.COVERAGE_LABEL_W + (col + 0.5) * self.COVERAGE_CELL_W
+            canvas.create_text(x, self.COVERAGE_CELL_H / 2, text=day, font=("TkDefaultFont", 9, "bold"))
+        for hour in range(HOURS_PER_DAY):
+            y = (hour + 1.5) * self.COVERAGE_CELL_H
+            canvas.create_text(self.COVERAGE_LABEL_W / 2, y, text=f"{hour:02d}:00", font=("Courier", 9))
+
+        # One rectangle + text per week hour, recoloured in place on refresh
+        self.coverage_items = []
+        for week_hour in range(WEEK_HOURS):
+            col, hour = divmod(week_hour, HOURS_PER_DAY)
+            x0 = self.COVERAGE_LABEL_W + col * self.COVERAGE_CELL_W
+            y0 = (hour + 1) * self.COVERAGE_CELL_H
+            rect = canvas.create_rectangle(
+                x0, y0, x0 + self.COVERAGE_CELL_W, y0 + self.COVERAGE_CELL_H, outline="white"
+            )
+            text = canvas.create_text(
+                x0 + self.COVERAGE_CELL_W / 2, y0 + self.COVERAGE_CELL_H / 2, font=("Courier", 9)
+            )
+            self.coverage_items.append((rect, text))
+        canvas.bind("<Button-1>", self.on_coverage_click)
+
+        self.coverage_detail = tk.Label(win, text="Click an hour for details.", fg="gray")
+        self.coverage_detail.pack(pady=5)
+
+        tk.Label(win, text="Uncovered windows").pack()
+        self.coverage_gaps_listbox = tk.Listbox(win, height=6, font=("Courier", 10))
+        self.coverage_gaps_listbox.pack(fill=tk.BOTH, expand=True, padx=10)
+
+        btn_frame = tk.Frame(win)
+        btn_frame.pack(pady=10)
+        tk.Button(
+            btn_frame, text="Save Excel report", width=16, command=self.save_coverage_report
+        ).grid(row=0, column=0, padx=5)
+        tk.Button(btn_frame, text="Close", width=10, command=win.destroy).grid(row=0, column=1, padx=5)
+
+        self.refresh_coverage_window()
+
+    def coverage_color(self, cell):
+        if not cell["required"]:
+            return self.COVERAGE_COLORS["idle"]
+        if cell["shortfall"]:
+            return self.COVERAGE_COLORS["short"]
+        if cell["eligible"] == cell["required"]:
+            return self.COVERAGE_COLORS["tight"]
+        return self.COVERAGE_COLORS["ok"]
+
+    def refresh_coverage_window(self):
+        """Recolour the heatmap (if open) from the coverage matrix's current counts."""
+        if self.coverage_window is None or not tk.Toplevel.winfo_exists(self.coverage_window):
+            return
+
+        for week_hour, (rect, text) in enumerate(self.coverage_items):
+            cell = self.coverage.cell(week_hour)
+            if cell["required"]:
+                label = f"{cell['eligible']}/{cell['required']}"
+            else:
+                label = str(sum(cell["available"].values()))
+            self.coverage_canvas.itemconfig(rect, fill=self.coverage_color(cell))
+            self.coverage_canvas.itemconfig(text, text=label)
+
+        self.coverage_gaps_listbox.delete(0, tk.END)
+        for gap in self.coverage.gaps():
+            self.coverage_gaps_listbox.insert(
+                tk.END,
+                f"{gap['day']:<4} {gap['start']:>2}–{gap['end']:<2} "
+                f"{gap['eligible']}/{gap['required']}  {', '.join(gap['shifts'])}"
+            )
+
+    def on_coverage_click(self, event):
+        col = int((event.x - self.COVERAGE_LABEL_W) // self.COVERAGE_CELL_W)
+        hour = int(event.y // self.COVERAGE_CELL_H) - 1
+        if not (0 <= col < len(DAYS) and 0 <= hour < HOURS_PER_DAY):
+            return
+        cell = self.coverage.cell(col * HOURS_PER_DAY + hour)
+        roles = ", ".join(f"{role} {n}" for role, n in cell["available"].items())
+        self.coverage_detail.config(
+            text=f"{cell['day']} {cell['hour']:02d}:00 - available: {roles or 'nobody'}; "
+                 f"{cell['required']} shift(s), {cell['eligible']} eligible",
+            fg="black",
+        )
+
+    def save_coverage_report(self):
+        # Snapshot on the Tk thread; the matrix keeps changing while the file is written
+        cells = self.coverage.cells()
+        gaps = self.coverage.gaps()
+        self.worker.submit(
+            "coverage_report",
+            lambda: write_coverage_report(cells, gaps),
+            lambda _: messagebox.showinfo("Saved", "Coverage report saved."),
+        )
+
+    # ---------- WHAT-IF WINDOW ----------
+
+    SCENARIO_COLUMNS = (
+        ("uncovered", "Uncovered", 75), ("gaps", "Coverage gaps", 95), ("scheduled", "Scheduled", 75),
+        ("max_hours", "Max hours", 75), ("changed", "Reassigned", 80),
+        ("uncovered_shifts", "Uncovered shifts", 220), ("changes", "Changes", 300),
+    )
+
+    def open_whatif_window(self):
+        """
+        Build what-if scenarios (changes over the current roster and shift
+        settings that are never saved) and compare their schedules side by side.
+        """
+        if self.whatif_window is not None and tk.Toplevel.winfo_exists(self.whatif_window):
+            self.whatif_window.lift()
+            return
+        if self.repo is None:
+            return
+
+        win = self.whatif_window = tk.Toplevel(self.root)
+        win.title("What-if scenarios")
+        win.geometry("1000x600")
+
+        # --- SCENARIOS AND THEIR CHANGES ---
+        top = tk.Frame(win)
+        top.pack(fill="x", padx=5, pady=5)
+
+        left = tk.Frame(top)
+        left.pack(side="left", fill="y")
+        tk.Label(left, text="Scenarios").pack(anchor="w")
+        self.scenario_list = tk.Listbox(left, height=8, width=24, exportselection=False)
+        self.scenario_list.pack()
+        self.scenario_list.bind("<<ListboxSelect>>", lambda e: self.refresh_scenario_changes())
+        buttons = tk.Frame(left)
+        buttons.pack(pady=2)
+        tk.Button(buttons, text="New", width=8, command=self.new_scenario).pack(side="left")
+        tk.Button(buttons, text="Delete", width=8, command=self.delete_scenario).pack(side="left", padx=5)
+
+        right = tk.Frame(top)
+        right.pack(side="left", fill="both", expand=True, padx=(10, 0))
+        tk.Label(right, text="Changes (nothing is saved)").pack(anchor="w")
+        self.scenario_changes_list = tk.Listbox(right, height=8)
+        self.scenario_changes_list.pack(fill="both", expand=True)
+
+        # --- EDITS ---
+        edit = tk.Frame(win)
+        edit.pack(fill="x", padx=5)
+
+        tk.Label(edit, text="Selected manager off:").grid(row=0, column=0, sticky="w")
+        self.whatif_off_day = tk.StringVar(value="All week")
+        ttk.Combobox(
+            edit, textvariable=self.whatif_off_day, values=["All week"] + DAYS, width=10, state="readonly"
+        ).grid(row=0, column=1, sticky="w", padx=5)
+        tk.Button(edit, text="Add", width=8, command=self.add_scenario_off).grid(row=0, column=2, sticky="w")
+
+        tk.Label(edit, text="Critical shift:").grid(row=1, column=0, sticky="w", pady=5)
+        self.whatif_shift_day = tk.StringVar(value=DAYS[0])
+        self.whatif_shift_type = tk.StringVar(value=SHIFT_TYPES[0])
+        self.whatif_shift_start = tk.StringVar()
+        self.whatif_shift_end = tk.StringVar()
+        ttk.Combobox(
+            edit, textvariable=self.whatif_shift_day, values=DAYS, width=10, state="readonly"
+        ).grid(row=1, column=1, sticky="w", padx=5)
+        ttk.Combobox(
+            edit, textvariable=self.whatif_shift_type, values=SHIFT_TYPES, width=12, state="readonly"
+        ).grid(row=1, column=2, sticky="w")
+        tk.Spinbox(edit, values=TIME_CHOICES, width=6, textvariable=self.whatif_shift_start).grid(row=1, column=3, padx=5)
+        tk.Label(edit, text="to").grid(row=1, column=4)
+        tk.Spinbox(edit, values=TIME_CHOICES, width=6, textvariable=self.whatif_shift_end).grid(row=1, column=5, padx=5)
+        tk.Button(edit, text="Set", width=8, command=self.add_scenario_shift).grid(row=1, column=6)
+        tk.Button(edit, text="Remove", width=8, command=self.add_scenario_shift_removal).grid(row=1, column=7, padx=5)
+
+        # --- COMPARISON ---
+        run = tk.Frame(win)
+        run.pack(fill="x", padx=5, pady=5)
+        tk.Button(run, text="Compare all", width=14, command=self.run_scenarios).pack(side="left")
+        self.whatif_status = tk.Label(run, text="", fg="gray")
+        self.whatif_status.pack(side="left", padx=10)
+
+        tree = self.scenario_tree = ttk.Treeview(win, columns=[c for c, _, _ in self.SCENARIO_COLUMNS])
+        tree.heading("#0", text="Scenario")
+        tree.column("#0", width=120)
+        for col, title, width in self.SCENARIO_COLUMNS:
+            tree.heading(col, text=title)
+            tree.column(col, width=width, anchor="w")
+        tree.tag_configure("worse", foreground="#B00020")
+        tree.tag_configure("better", foreground="#1B7F3B")
+        tree.pack(fill="both", expand=True, padx=5, pady=(0, 5))
+
+        for name, _ in self.scenario_specs:
+            self.scenario_list.insert(tk.END, name)
+        if self.scenario_specs:
+            self.scenario_list.selection_set(0)
+        self.refresh_scenario_changes()
+
+    def new_scenario(self):
+        self.scenario_count += 1
+        self.scenario_specs.append((f"Scenario {self.scenario_count}", []))
+        self.scenario_list.insert(tk.END, self.scenario_specs[-1][0])
+        self.scenario_list.selection_clear(0, tk.END)
+        self.scenario_list.selection_set(tk.END)
+        self.refresh_scenario_changes()
+
+    def delete_scenario(self):
+        index = self.selected_scenario()
+        if index is None:
+            return
+        del self.scenario_specs[index]
+        self.scenario_list.delete(index)
+        self.refresh_scenario_changes()
+
+    def selected_scenario(self):
+        selection = self.scenario_list.curselection()
+        return selection[0] if selection else None
+
+    def refresh_scenario_changes(self):
+        self.scenario_changes_list.delete(0, tk.END)
+        index = self.selected_scenario()
+        if index is not None:
+            for _, _, label in self.scenario_specs[index][1]:
+                self.scenario_changes_list.insert(tk.END, label)
+
+    def add_scenario_change(self, method, args, label):
+        """Record a Scenario method call on the selected scenario (a new one if none is selected)."""
+        if self.selected_scenario() is None:
+            self.new_scenario()
+        self.scenario_specs[self.selected_scenario()][1].append((method, args, label))
+        self.refresh_scenario_changes()
+
+    def add_scenario_off(self):
+        manager_id = self.get_selected_id()
+        if manager_id is None:
+            messagebox.showwarning("Selection error", "Select a manager in the main list first.")
+            return
+        day = self.whatif_off_day.get()
+        days = DAYS if day == "All week" else [day]
+        label = f"{self.repo.get(manager_id).name} off {'all week' if day == 'All week' else day}"
+        self.add_scenario_change("set_off", (manager_id, days), label)
+
+    def add_scenario_shift(self):
+        key = (self.whatif_shift_day.get(), self.whatif_shift_type.get())
+        try:
+            window = parse_window(self.whatif_shift_start.get(), self.whatif_shift_end.get())
+        except ValueError as e:
+            messagebox.showwarning("Input error", f"Error in {key[0]} - {key[1]}: {e}.")
+            return
+        if None in window:
+            messagebox.showwarning("Input error", "A critical shift needs a start and an end time.")
+            return
+        self.add_scenario_change("set_shift", (key, window), f"{key[0]} {key[1]} {window[0]}-{window[1]}")
+
+    def add_scenario_shift_removal(self):
+        key = (self.whatif_shift_day.get(), self.whatif_shift_type.get())
+        self.add_scenario_change("remove_shift", (key,), f"no {key[0]} {key[1]}")
+
+    def run_scenarios(self):
+        if not self.scenario_specs:
+            messagebox.showinfo("What-if", "Add a scenario first.")
+            return
+
+        managers = self.repo.all()
+        storage = self.storage
+        settings = self.shift_settings
+        specs = [(name, list(changes)) for name, changes in self.scenario_specs]
+
+        def run():
+            shift_settings = settings if settings is not None else storage.load_shift_settings()
+            base = {m.id: m for m in managers}
+            scenarios = []
+            for name, changes in specs:
+                scenario = Scenario(name, base, shift_settings)
+                for method, args, label in changes:
+                    try:
+                        getattr(scenario, method)(*args)
+                    except KeyError:
+                        scenario.changes.append(f"skipped: {label} (manager deleted)")
+                scenarios.append(scenario)
+            return evaluate_scenarios(managers, shift_settings, scenarios, workers=SCENARIO_WORKERS)
+
+        self.whatif_status.config(text=f"Solving {len(specs) + 1} schedules...")
+        self.worker.submit("whatif", run, self.on_scenarios_evaluated, on_error=self.on_scenarios_error)
+
+    def on_scenarios_evaluated(self, results):
+        if self.whatif_window is None or not tk.Toplevel.winfo_exists(self.whatif_window):
+            return
+        tree = self.scenario_tree
+        tree.delete(*tree.get_children())
+        base = (len(results[0]["uncovered"]), results[0]["coverage_gaps"])
+        for result in results:
+            score = (len(result["uncovered"]), result["coverage_gaps"])
+            tags = ("worse",) if score > base else ("better",) if score < base else ()
+            tree.insert("", tk.END, text=result["name"], tags=tags, values=(
+                f"{len(result['uncovered'])} / {result['shifts']}",
+                result["coverage_gaps"],
+                f"{result['scheduled']} / {result['managers']}",
+                f"{result['max_hours']:g}",
+                result["changed"],
+                ", ".join(f"{day} {shift_type}" for day, shift_type in result["uncovered"]) or "-",
+                "; ".join(result["changes"]) or "-",
+            ))
+        seconds = sum(result["seconds"] for result in results)
+        self.whatif_status.config(text=f"{len(results)} schedules solved ({seconds:.1f}s of solver time)")
+
+    def on_scenarios_error(self, e):
+        if self.whatif_window is not None and tk.Toplevel.winfo_exists(self.whatif_window):
+            self.whatif_status.config(text="")
+        messagebox.showerror("What-if error", f"Could not evaluate the scenarios:\n{e}")
+
+    # ---------- STATS WINDOW ----------
+
+    STATS_COLUMNS = (
+        ("calls", "Calls", 60), ("total_ms", "Total ms", 80), ("mean_ms", "Mean ms", 70),
+        ("max_ms", "Max ms", 70), ("kb_read", "KB read", 70), ("kb_written", "KB written", 80),
+    )
+    STATS_REFRESH_MS = 1000
+
+    def open_stats_window(self):
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.lift()
+            return
+
+        win = tk.Toplevel(self.root)
+        win.title("Timings")
+        win.geometry("760x420")
+        self.stats_window = win
+
+        tree = ttk.Treeview(win, columns=[c for c, _, _ in self.STATS_COLUMNS])
+        tree.heading("#0", text="Operation")
+        tree.column("#0", width=300)
+        for col, title, width in self.STATS_COLUMNS:
+            tree.heading(col, text=title)
+            tree.column(col, width=width, anchor="e")
+        tree.pack(fill="both", expand=True, padx=5, pady=5)
+        self.stats_tree = tree
+
+        buttons = tk.Frame(win)
+        buttons.pack(fill="x", padx=5, pady=(0, 5))
+        tk.Button(buttons, text="Reset", command=INSTRUMENTATION.reset).pack(side="left")
+        tk.Button(buttons, text="Save trace", command=self.save_stats).pack(side="left", padx=5)
+
+        self._refresh_stats()
+
+    # Underscored so the refresh loop stays out of the numbers it displays
+    def _refresh_stats(self):
+        if self.stats_window is None or not self.stats_window.winfo_exists():
+            self.stats_window = None
+            return
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        for row in INSTRUMENTATION.snapshot():
+            self.stats_tree.insert("", "end", text=row["name"], values=(
+                row["calls"],
+                f"{row['seconds'] * 1000:.1f}",
+                f"{row['mean_ms']:.2f}",
+                f"{row['max_ms']:.1f}",
+                f"{row['read'] / 1024:.0f}",
+                f"{row['written'] / 1024:.0f}",
+            ))
+        self.stats_window.after(self.STATS_REFRESH_MS, self._refresh_stats)
+
+    def save_stats(self):
+        self.worker.submit(
+            "dump_stats",
+            INSTRUMENTATION.dump,
+            lambda paths: messagebox.showinfo("Saved", "Profile written to:\n" + "\n".join(paths)),
+        )
 
 
 if __name__ == "__main__":
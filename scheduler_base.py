@@ -0,0 +1,826 @@
+"""
+Shared building blocks of the scheduler: configuration, file paths,
+instrumentation, times of day, manager records, weekly time masks and
+date overrides.
+"""
+
+import bisect
+import cProfile
+import functools
+import inspect
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from array import array
+from datetime import date, datetime, time as dtime
+
+from openpyxl import load_workbook
+
+
+# ------------------ CONFIG ------------------
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+ROLES = ["admin", "shift", "area"]
+GENDERS = ["M", "F"]
+
+MANAGERS_EXCEL_FILENAME = "managers.xlsx"
+MANAGERS_SHEET_NAME = "Managers"
+MANAGER_HEADERS = ["ID", "Name", "Role", "Gender"] + [
+    f"{day}_{edge}" for day in DAYS for edge in ("start", "end")
+]
+
+# Hidden sheet in managers.xlsx holding key/value bookkeeping (e.g. next ID)
+META_SHEET_NAME = "Meta"
+
+# Sheet in managers.xlsx with date-specific availability (leave, swaps, extra days)
+OVERRIDES_SHEET_NAME = "Overrides"
+OVERRIDE_HEADERS = ["ManagerID", "FromDate", "ToDate", "StartHour", "EndHour", "Note"]
+
+# Pending manager edits are written to Excel this long after the last change
+MANAGERS_FLUSH_DELAY_MS = 2000
+
+SHIFT_SETTINGS_EXCEL_FILENAME = "shift_settings.xlsx"
+SHIFT_SETTINGS_SHEET_NAME = "ShiftSettings"
+SHIFT_SETTINGS_HEADERS = ["Day", "ShiftType", "StartHour", "EndHour"]
+
+# Coverage report: hour-by-hour availability vs. critical shifts
+COVERAGE_REPORT_FILENAME = "coverage_report.xlsx"
+COVERAGE_SHEET_NAME = "Coverage"
+COVERAGE_GAPS_SHEET_NAME = "Coverage gaps"
+
+# Printable roster export: managers x days with the shifts they hold
+SCHEDULE_EXPORT_FILENAME = "schedule_roster.xlsx"
+ROSTER_HEADERS = ["ID", "Name", "Role"] + DAYS
+
+# Where managers and shift settings live: "excel" or "sqlite"
+STORAGE_BACKEND = os.environ.get("SCHEDULER_STORAGE", "excel")
+SQLITE_FILENAME = "scheduler.db"
+
+# Excel edits go to "<file>.journal" first and are folded into the
+# workbook once this many records have piled up (and on exit)
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_COMPACT_EVERY = 500
+
+# Binary copy of managers.xlsx ("<file>.snapshot") rewritten after every
+# save, so startup can skip parsing the workbook while it is unchanged
+SNAPSHOT_SUFFIX = ".snapshot"
+
+# NEW shift types
+SHIFT_TYPES = ["delivery", "open", "close", "early shift", "mid shift"]
+
+# Roles allowed to cover a shift type; shift types not listed accept any role
+SHIFT_ROLE_REQUIREMENTS = {}
+
+# Nobody is scheduled for more critical-shift hours than this per week
+MAX_WEEKLY_HOURS = 48
+
+# Fairness pass: what is balanced between managers of the same role, and how much each counts
+WEEKEND_DAYS = ["Sat", "Sun"]
+BALANCED_SHIFT_TYPES = ["open", "close"]
+FAIRNESS_WEIGHTS = {"hours": 1.0, "weekend": 4.0, "open_close": 2.0}
+BALANCE_SECONDS = 2.0  # budget for the "Balance fairness" button
+
+# What-if comparisons: processes solving scenarios (1 = in this process, 0 = one per CPU)
+SCENARIO_WORKERS = 1
+
+# On-disk schedule cache (see ScheduleCache)
+SCHEDULE_CACHE_DIRNAME = "schedule_cache"
+SCHEDULE_CACHE_ENTRIES = 512
+
+# Opt-in instrumentation (see Instrumentation): "1" records timings and a
+# trace, "cprofile" adds cProfile data; files go to SCHEDULER_PROFILE_DIR
+PROFILE_ENV = "SCHEDULER_PROFILE"
+PROFILE_DIR_ENV = "SCHEDULER_PROFILE_DIR"
+PROFILE_DIRNAME = "profiles"
+TRACE_EVENT_LIMIT = 200000
+
+
+# ------------------ PATH HELPERS ------------------
+
+def get_file_path(filename):
+    """Always keep Excel files in the same folder as this script."""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_dir, filename)
+
+
+# ------------------ INSTRUMENTATION ------------------
+
+class Instrumentation:
+    """
+    Opt-in call counts, wall time, bytes, a Chrome trace and cProfile data.
+    Off by default; threads to be profiled call profile_thread().
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.profiling = False
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.profilers = []
+        self.reset()
+
+    def enable(self, profile=False):
+        self.enabled = True
+        if profile and not self.profiling:
+            self.profiling = True
+            self.profile_thread()
+
+    def reset(self):
+        """Start a new session (keeps cProfile data)."""
+        with self.lock:
+            self.started = time.perf_counter()
+            self.created = datetime.now()
+            self.stats = {}          # name -> [calls, seconds, max seconds, bytes read, bytes written]
+            self.events = []         # trace events
+            self.thread_names = {}   # thread id -> name
+
+    def profile_thread(self):
+        """Run a cProfile profiler on the calling thread until dump()."""
+        if self.profiling:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            with self.lock:
+                self.profilers.append(profiler)
+
+    # ---------- recording ----------
+
+    def call(self, name, func, args, kwargs):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        counts = [0, 0]
+        stack.append(counts)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            self.record(name, start, end, *counts)
+
+    def count_bytes(self, read=0, written=0):
+        for counts in getattr(self.local, "stack", ()):
+            counts[0] += read
+            counts[1] += written
+
+    def record(self, name, start, end, read=0, written=0):
+        seconds = end - start
+        thread = threading.current_thread()
+        with self.lock:
+            entry = self.stats.get(name)
+            if entry is None:
+                entry = self.stats[name] = [0, 0.0, 0.0, 0, 0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3] += read
+            entry[4] += written
+            if len(self.events) < TRACE_EVENT_LIMIT:
+                self.thread_names[thread.ident] = thread.name
+                self.events.append({
+                    "name": name, "ph": "X", "pid": os.getpid(), "tid": thread.ident,
+                    "ts": round((start - self.started) * 1e6, 1), "dur": round(seconds * 1e6, 1),
+                    "args": {"read": read, "written": written},
+                })
+
+    # ---------- reporting ----------
+
+    def snapshot(self):
+        """Per-name totals, slowest first: dicts {name, calls, seconds, mean_ms, max_ms, read, written}."""
+        with self.lock:
+            items = [(name, list(entry)) for name, entry in self.stats.items()]
+        rows = [
+            {
+                "name": name,
+                "calls": calls,
+                "seconds": seconds,
+                "mean_ms": seconds / calls * 1000,
+                "max_ms": longest * 1000,
+                "read": read,
+                "written": written,
+            }
+            for name, (calls, seconds, longest, read, written) in items
+        ]
+        rows.sort(key=lambda row: row["seconds"], reverse=True)
+        return rows
+
+    def dump(self, directory=None):
+        """
+        Write the session as <stamp>.trace.json, <stamp>.stats.json and,
+        when profiling, <stamp>.pstats. Returns the paths written.
+        """
+        directory = directory or os.environ.get(PROFILE_DIR_ENV) or get_file_path(PROFILE_DIRNAME)
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.created.strftime("session-%Y%m%d-%H%M%S"))
+        with self.lock:
+            events = list(self.events)
+            names = dict(self.thread_names)
+        events += [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+            for tid, name in names.items()
+        ]
+        paths = [base + ".trace.json", base + ".stats.json"]
+        with open(paths[0], "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        with open(paths[1], "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+        with self.lock:
+            profilers = list(self.profilers)
+        if profilers:
+            for profiler in profilers:
+                profiler.disable()
+            stats = pstats.Stats(profilers[0])
+            for profiler in profilers[1:]:
+                stats.add(profiler)
+            paths.append(base + ".pstats")
+            stats.dump_stats(paths[-1])
+            for profiler in profilers:
+                profiler.enable()
+        return paths
+
+
+def format_stats(rows, limit=None):
+    """Text table of Instrumentation.snapshot() rows."""
+    lines = [f"{'calls':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9} {'KB read':>9} {'KB written':>10}  name"]
+    for row in rows[:limit]:
+        lines.append(
+            f"{row['calls']:>7} {row['seconds'] * 1000:>10.1f} {row['mean_ms']:>9.2f} {row['max_ms']:>9.2f} "
+            f"{row['read'] / 1024:>9.1f} {row['written'] / 1024:>10.1f}  {row['name']}"
+        )
+    return "\n".join(lines)
+
+
+INSTRUMENTATION = Instrumentation()
+if os.environ.get(PROFILE_ENV, "0") not in ("", "0"):
+    INSTRUMENTATION.enable(profile=os.environ[PROFILE_ENV].lower() == "cprofile")
+
+
+def instrumented(func, name=None):
+    """Wrap func so its calls are recorded while INSTRUMENTATION is enabled."""
+    name = name or func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not INSTRUMENTATION.enabled:
+            return func(*args, **kwargs)
+        return INSTRUMENTATION.call(name, func, args, kwargs)
+    return wrapper
+
+
+def instrumented_class(cls):
+    """Class decorator: instrument every public method defined on the class."""
+    for name, value in list(vars(cls).items()):
+        if name.startswith("_"):
+            continue
+        if isinstance(value, (staticmethod, classmethod)):
+            setattr(cls, name, type(value)(instrumented(value.__func__)))
+        elif inspect.isfunction(value):
+            setattr(cls, name, instrumented(value))
+    return cls
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def read_workbook(path, **kwargs):
+    """load_workbook() that counts the file as bytes read when instrumented."""
+    if INSTRUMENTATION.enabled:
+        INSTRUMENTATION.count_bytes(read=file_size(path))
+    return load_workbook(path, **kwargs)
+
+
+# ------------------ TIME OF DAY ------------------
+
+# Times are minutes after midnight. Files and the form show them as whole
+# hours (9, the original format) or "HH:MM" strings ("17:30"); a window
+# whose end is before its start runs past midnight into the next day.
+MINUTES_PER_DAY = 24 * 60
+SLOT_MINUTES = 15  # resolution of the scheduling masks; must divide 60
+TIME_CHOICES = [f"{m // 60:02d}:{m % 60:02d}" for m in range(0, MINUTES_PER_DAY, SLOT_MINUTES)]
+
+
+def parse_time(value):
+    """
+    Minutes after midnight from a whole hour (9, "9"), an "HH:MM" string
+    or a time/datetime cell; None for empty. Raises ValueError otherwise.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (datetime, dtime)):
+        return value.hour * 60 + value.minute
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return None
+        hours, sep, minutes = text.partition(":")
+        if sep:
+            if not (hours.isdigit() and len(minutes) == 2 and minutes.isdigit() and int(minutes) < 60):
+                raise ValueError(f"{value!r} is not a time (use HH:MM)")
+            total = int(hours) * 60 + int(minutes)
+        else:
+            total = round(float(text) * 60)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        total = round(value * 60)
+    else:
+        raise ValueError(f"{value!r} is not a time")
+    if not 0 <= total <= MINUTES_PER_DAY:
+        raise ValueError(f"{value!r} is outside 00:00–24:00")
+    return total
+
+
+def format_time(minutes):
+    """Minutes after midnight as stored: a whole hour as an int, otherwise "HH:MM"."""
+    if minutes is None:
+        return None
+    hours, rest = divmod(minutes, 60)
+    return hours if not rest else f"{hours:02d}:{rest:02d}"
+
+
+def normalize_time(value):
+    """A time cell in stored form (see format_time); None if empty or unreadable."""
+    try:
+        return format_time(parse_time(value))
+    except ValueError:
+        return None
+
+
+def parse_window(start, end):
+    """
+    (start, end) in stored form from two typed values (empty = open end).
+    Raises ValueError for unreadable times or times off the slot grid.
+    """
+    window = []
+    for label, value in (("start", start), ("end", end)):
+        minutes = parse_time(value)
+        if minutes is not None and minutes % SLOT_MINUTES:
+            raise ValueError(f"{label} time {value} is not a multiple of {SLOT_MINUTES} minutes")
+        window.append(format_time(minutes))
+    return tuple(window)
+
+
+def minutes_span(start, end):
+    """
+    (first, last) minutes for a window of start/end minutes, where a
+    missing start is 0:00, a missing end is midnight and an end before
+    the start adds a day. None for an empty/OFF window.
+    """
+    if start is None and end is None:
+        return None
+    start = 0 if start is None else start
+    end = MINUTES_PER_DAY if end is None else end
+    if end < start:
+        end += MINUTES_PER_DAY
+    return (start, end) if end > start else None
+
+
+# ------------------ MANAGER RECORDS ------------------
+
+class InternTable:
+    """Small-int codes for a handful of repeated strings (roles, genders)."""
+
+    def __init__(self, values):
+        self.values = list(values)
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            # Unknown values (hand-edited files) get the next code
+            self.values.append(value)
+            code = self.codes[value] = len(self.values) - 1
+        return code
+
+
+ROLE_TABLE = InternTable(ROLES + [""])
+GENDER_TABLE = InternTable(GENDERS + [""])
+
+# Availability is packed as (start, end) minutes per day in DAYS order; NO_TIME stands for None
+NO_TIME = -1
+TIMES_TYPECODE = "h"
+
+
+def time_code(value):
+    """Pack a time cell for the availability array (None or unreadable -> NO_TIME)."""
+    try:
+        minutes = parse_time(value)
+    except ValueError:
+        return NO_TIME
+    return NO_TIME if minutes is None else minutes
+
+
+class Manager:
+    """
+    One roster entry: id, name, role/gender codes and a 14-slot times array.
+    Item access works like the old dicts; change a day with set_window().
+    """
+
+    __slots__ = ("row_index", "id", "name", "role_code", "gender_code", "times")
+
+    FIELDS = ("row_index", "id", "name", "role", "gender", "availability")
+
+    def __init__(self, id=None, name="", role="", gender="", availability=None, row_index=None):
+        self.row_index = row_index
+        self.id = id
+        self.name = name
+        self.role_code = ROLE_TABLE.code(role)
+        self.gender_code = GENDER_TABLE.code(gender)
+        self.times = array(TIMES_TYPECODE, [NO_TIME]) * (2 * len(DAYS))
+        if availability:
+            self.availability = availability
+
+    @classmethod
+    def from_mapping(cls, data, **fields):
+        """Record from a manager dict or another record, with `fields` overriding."""
+        if isinstance(data, Manager):
+            manager = data.copy()
+            for key, value in fields.items():
+                setattr(manager, key, value)
+            return manager
+        values = {key: data[key] for key in cls.FIELDS if key in data}
+        values.update(fields)
+        return cls(**values)
+
+    @property
+    def role(self):
+        return ROLE_TABLE.values[self.role_code]
+
+    @role.setter
+    def role(self, value):
+        self.role_code = ROLE_TABLE.code(value)
+
+    @property
+    def gender(self):
+        return GENDER_TABLE.values[self.gender_code]
+
+    @gender.setter
+    def gender(self, value):
+        self.gender_code = GENDER_TABLE.code(value)
+
+    @property
+    def availability(self):
+        return {day: window for day, window in zip(DAYS, self.windows())}
+
+    @availability.setter
+    def availability(self, availability):
+        for day in DAYS:
+            start, end = availability.get(day, (None, None))
+            self.set_window(day, start, end)
+
+    def minute_windows(self):
+        """(start, end) minutes for each day in DAYS order, None for open ends."""
+        times = self.times
+        return [
+            (None if times[i] == NO_TIME else times[i], None if times[i + 1] == NO_TIME else times[i + 1])
+            for i in range(0, len(times), 2)
+        ]
+
+    def windows(self):
+        """(start, end) for each day in DAYS order in stored form (see format_time)."""
+        return [(format_time(start), format_time(end)) for start, end in self.minute_windows()]
+
+    def set_window(self, day, start, end):
+        i = 2 * DAYS.index(day)
+        self.times[i] = time_code(start)
+        self.times[i + 1] = time_code(end)
+
+    def copy(self):
+        manager = Manager.__new__(Manager)
+        for slot in Manager.__slots__:
+            setattr(manager, slot, getattr(self, slot))
+        manager.times = array(TIMES_TYPECODE, self.times)
+        return manager
+
+    # Mapping-style access for code written against manager dicts
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def keys(self):
+        return self.FIELDS
+
+    def __repr__(self):
+        return f"Manager(id={self.id!r}, name={self.name!r}, role={self.role!r}, gender={self.gender!r})"
+
+
+def as_manager(data):
+    """`data` as a Manager record (manager dicts are converted)."""
+    return data if isinstance(data, Manager) else Manager.from_mapping(data)
+
+
+class Roster:
+    """
+    Managers stored column by column, with an ID -> position index.
+    remove() moves the last entry into the freed slot.
+    """
+
+    def __init__(self, managers=()):
+        self.ids = []
+        self.names = []
+        self.role_codes = bytearray()
+        self.gender_codes = bytearray()
+        self.row_indexes = array("q")   # 0 = no row yet
+        self.times = array(TIMES_TYPECODE)
+        self.positions = {}
+        for manager in managers:
+            self.put(manager)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, manager_id):
+        return manager_id in self.positions
+
+    def __iter__(self):
+        for pos in range(len(self.ids)):
+            yield self._record(pos)
+
+    def get(self, manager_id):
+        return self._record(self.positions[manager_id])
+
+    def put(self, manager):
+        """Insert or overwrite the entry for manager["id"]."""
+        manager = as_manager(manager)
+        width = len(manager.times)
+        pos = self.positions.get(manager.id)
+        if pos is None:
+            self.positions[manager.id] = len(self.ids)
+            self.ids.append(manager.id)
+            self.names.append(manager.name)
+            self.role_codes.append(manager.role_code)
+            self.gender_codes.append(manager.gender_code)
+            self.row_indexes.append(manager.row_index or 0)
+            self.times.extend(manager.times)
+        else:
+            self.names[pos] = manager.name
+            self.role_codes[pos] = manager.role_code
+            self.gender_codes[pos] = manager.gender_code
+            self.row_indexes[pos] = manager.row_index or 0
+            self.times[pos * width:(pos + 1) * width] = manager.times
+
+    def remove(self, manager_id):
+        """Drop an entry and return it as a record."""
+        pos = self.positions.pop(manager_id)
+        manager = self._record(pos)
+        last = len(self.ids) - 1
+        width = 2 * len(DAYS)
+        if pos != last:
+            moved_id = self.ids[last]
+            self.ids[pos] = moved_id
+            self.names[pos] = self.names[last]
+            self.role_codes[pos] = self.role_codes[last]
+            self.gender_codes[pos] = self.gender_codes[last]
+            self.row_indexes[pos] = self.row_indexes[last]
+            self.times[pos * width:(pos + 1) * width] = self.times[last * width:]
+            self.positions[moved_id] = pos
+        self.ids.pop()
+        self.names.pop()
+        self.role_codes.pop()
+        self.gender_codes.pop()
+        self.row_indexes.pop()
+        del self.times[last * width:]
+        return manager
+
+    def nbytes(self):
+        """Bytes held by the columns and index (names and IDs are shared objects)."""
+        return sum(sys.getsizeof(column) for column in (
+            self.ids, self.names, self.role_codes, self.gender_codes,
+            self.row_indexes, self.times, self.positions,
+        ))
+
+    def _record(self, pos):
+        width = 2 * len(DAYS)
+        manager = Manager.__new__(Manager)
+        manager.row_index = self.row_indexes[pos] or None
+        manager.id = self.ids[pos]
+        manager.name = self.names[pos]
+        manager.role_code = self.role_codes[pos]
+        manager.gender_code = self.gender_codes[pos]
+        manager.times = self.times[pos * width:(pos + 1) * width]
+        return manager
+
+
+# ------------------ SCHEDULING ENGINE ------------------
+
+# A week is encoded as a WEEK_SLOTS-bit int: bit (day_index * SLOTS_PER_DAY
+# + slot) is set when that SLOT_MINUTES slot is covered. "Can X cover this
+# shift?" is then (avail_mask & shift_mask) == shift_mask. Windows that run
+# past midnight carry on into the next day, and Sunday night wraps to Monday.
+HOURS_PER_DAY = 24
+SLOTS_PER_HOUR = 60 // SLOT_MINUTES
+SLOTS_PER_DAY = HOURS_PER_DAY * SLOTS_PER_HOUR
+WEEK_SLOTS = len(DAYS) * SLOTS_PER_DAY
+DAY_INDEX = {day: i for i, day in enumerate(DAYS)}
+DAY_NAMES_LOWER = {day.lower(): day for day in DAYS}
+
+
+def slot_mask(day_index, first, last):
+    """
+    Week mask for minutes [first, last) of a day (last may pass midnight).
+    Partly covered slots are left out.
+    """
+    offset = day_index * SLOTS_PER_DAY
+    first = offset - (-first // SLOT_MINUTES)
+    last = offset + last // SLOT_MINUTES
+    if last <= first:
+        return 0
+    mask = ((1 << (last - first)) - 1) << first
+    return (mask | mask >> WEEK_SLOTS) & ((1 << WEEK_SLOTS) - 1)
+
+
+def minutes_mask(day_index, start, end):
+    """Week mask for one day's (start, end) minutes; see minutes_span()."""
+    span = minutes_span(start, end)
+    return 0 if span is None else slot_mask(day_index, *span)
+
+
+def window_mask(day, start, end):
+    """
+    Week mask for the window start–end on `day` (times as parse_time()
+    reads them). A missing start means 0:00, a missing end means end of
+    day. Returns 0 if the day is unknown or the window is empty/OFF.
+    """
+    if day not in DAY_INDEX:
+        return 0
+    return minutes_mask(DAY_INDEX[day], parse_time(start), parse_time(end))
+
+
+def availability_mask(availability):
+    """Week mask for a manager's availability dict {day: (start, end)}."""
+    mask = 0
+    for day, (start, end) in availability.items():
+        mask |= window_mask(day, start, end)
+    return mask
+
+
+def manager_mask(manager):
+    """availability_mask() of a Manager record, read straight from its minutes."""
+    mask = 0
+    for day_index, (start, end) in enumerate(manager.minute_windows()):
+        mask |= minutes_mask(day_index, start, end)
+    return mask
+
+
+def shift_mask(day, start, end):
+    """
+    Week mask for a critical shift. Slots it only partly covers count as
+    needed, and a shift whose start equals its end still needs someone
+    for that hour.
+    """
+    if day not in DAY_INDEX:
+        return 0
+    span = minutes_span(parse_time(start), parse_time(end))
+    if span is None:
+        if start is None or end is None:
+            return 0
+        start = parse_time(start)
+        span = (start, start + 60)
+    first, last = span
+    first -= first % SLOT_MINUTES
+    last += -last % SLOT_MINUTES
+    return slot_mask(DAY_INDEX[day], first, last)
+
+
+def mask_hours(mask):
+    """Hours covered by a week mask."""
+    return bin(mask).count("1") / SLOTS_PER_HOUR
+
+
+def group_managers_by_mask(masks):
+    """{ mask: [manager_id, ...] } from { manager_id: mask }, so each distinct mask is tested once."""
+    groups = {}
+    for manager_id, mask in masks.items():
+        if mask:
+            groups.setdefault(mask, []).append(manager_id)
+    return groups
+
+
+def find_candidates(mask_groups, required_mask):
+    """Return IDs of all managers whose availability covers required_mask."""
+    candidates = []
+    for mask, ids in mask_groups.items():
+        if mask & required_mask == required_mask:
+            candidates.extend(ids)
+    return candidates
+
+
+# ------------------ DATE OVERRIDES ------------------
+
+def as_date(value):
+    """A datetime.date from a date, datetime (Excel cells) or "YYYY-MM-DD" string."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip()[:10])
+
+
+class AvailabilityOverrides:
+    """
+    Date-specific windows over the weekly template: leave, swaps, extra days.
+    (None, None) means unavailable; an added entry trims whatever it overlaps.
+    """
+
+    def __init__(self, entries=()):
+        self.starts = {}      # manager id -> [first.toordinal(), ...]
+        self.intervals = {}   # manager id -> [(first, last, window, note), ...] as ordinals
+        for manager_id, first, last, window, note in entries:
+            self.add(manager_id, first, last, window, note)
+
+    def __len__(self):
+        return sum(len(intervals) for intervals in self.intervals.values())
+
+    def add(self, manager_id, first, last, window, note=""):
+        """Override [first, last] for one manager with `window` = (start, end)."""
+        window = tuple(normalize_time(value) for value in window)
+        self._replace(manager_id, as_date(first).toordinal(), as_date(last).toordinal(),
+                      (window, note or ""))
+
+    def remove(self, manager_id, first, last):
+        """Drop overrides for one manager on the dates [first, last]."""
+        self._replace(manager_id, as_date(first).toordinal(), as_date(last).toordinal(), None)
+
+    def entries(self):
+        """(manager_id, first, last, window, note) tuples, for storage."""
+        return [
+            (manager_id, date.fromordinal(first), date.fromordinal(last), window, note)
+            for manager_id, intervals in self.intervals.items()
+            for first, last, window, note in intervals
+        ]
+
+    def lookup(self, manager_id, day):
+        """The overriding (start, end) for `day`, or None to use the template."""
+        ordinal = as_date(day).toordinal()
+        starts = self.starts.get(manager_id)
+        if not starts:
+            return None
+        i = bisect.bisect_right(starts, ordinal) - 1
+        if i >= 0:
+            first, last, window, _ = self.intervals[manager_id][i]
+            if ordinal <= last:
+                return window
+        return None
+
+    def week(self, week_start):
+        """
+        Overrides touching the 7 days from `week_start` (a Monday):
+        {manager_id: {day name: (start, end)}}.
+        """
+        first = as_date(week_start).toordinal()
+        last = first + len(DAYS) - 1
+        week = {}
+        for manager_id, starts in self.starts.items():
+            intervals = self.intervals[manager_id]
+            i = max(bisect.bisect_right(starts, first) - 1, 0)
+            while i < len(intervals) and intervals[i][0] <= last:
+                lo, hi, window, _ = intervals[i]
+                for ordinal in range(max(lo, first), min(hi, last) + 1):
+                    week.setdefault(manager_id, {})[DAYS[ordinal - first]] = window
+                i += 1
+        return week
+
+    def _replace(self, manager_id, first, last, value):
+        if last < first:
+            raise ValueError("Override ends before it starts.")
+        starts = self.starts.setdefault(manager_id, [])
+        intervals = self.intervals.setdefault(manager_id, [])
+
+        # Overlapping intervals are intervals[lo:hi]; only the first can start
+        # before `first` and only the last can end after `last`.
+        lo = bisect.bisect_right(starts, first) - 1
+        if lo < 0 or intervals[lo][1] < first:
+            lo += 1
+        hi = bisect.bisect_right(starts, last)
+
+        pieces = []
+        if lo < hi and intervals[lo][0] < first:
+            pieces.append(intervals[lo][:1] + (first - 1,) + intervals[lo][2:])
+        if value is not None:
+            pieces.append((first, last) + value)
+        if lo < hi and intervals[hi - 1][1] > last:
+            pieces.append((last + 1,) + intervals[hi - 1][1:])
+
+        intervals[lo:hi] = pieces
+        starts[lo:hi] = [piece[0] for piece in pieces]
+        if not intervals:
+            del self.starts[manager_id]
+            del self.intervals[manager_id]
@@ -0,0 +1,151 @@
+"""On-disk cache of solved schedules."""
+
+import hashlib
+import json
+import os
+
+from scheduler_base import (
+    INSTRUMENTATION, SCHEDULE_CACHE_DIRNAME, SCHEDULE_CACHE_ENTRIES, SLOT_MINUTES, as_manager, file_size,
+    get_file_path, instrumented, instrumented_class, normalize_time,
+)
+from scheduler_solver import DEFAULT_SCHEDULE_RULES, ScheduleSolver
+
+
+# ------------------ SCHEDULE CACHE ------------------
+
+@instrumented_class
+class ScheduleCache:
+    """
+    Solved schedules on disk, one JSON file per input digest, evicted LRU.
+    Unreadable or unwritable files count as misses.
+    """
+
+    VERSION = 1  # bump when the solver or the key layout changes
+
+    def __init__(self, directory=None, max_entries=SCHEDULE_CACHE_ENTRIES):
+        self.directory = directory or get_file_path(SCHEDULE_CACHE_DIRNAME)
+        self.max_entries = max_entries
+        self._count = None  # entries on disk, counted once and tracked by put()
+
+    # ---------- keys ----------
+
+    @classmethod
+    def digest(cls, value):
+        data = json.dumps([cls.VERSION, SLOT_MINUTES, value], sort_keys=True, default=cls._plain)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _plain(value):
+        if isinstance(value, (set, frozenset)):
+            return sorted(value, key=repr)
+        return repr(value)
+
+    @staticmethod
+    def rules_key(rules):
+        return sorted(dict(DEFAULT_SCHEDULE_RULES, **(rules or {})).items())
+
+    def key(self, managers, settings, rules=None):
+        """Digest of a whole solver input."""
+        roster = sorted(
+            ([repr(m.id), m.role, m.gender, m.times.tobytes().hex()] for m in map(as_manager, managers)),
+            key=lambda entry: entry[0],
+        )
+        shifts = [[day, shift_type, normalize_time(start), normalize_time(end)]
+                  for (day, shift_type), (start, end) in settings.items()]
+        return self.digest([roster, shifts, self.rules_key(rules)])
+
+    # ---------- entries ----------
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        """The stored value for `key`, or None."""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        if INSTRUMENTATION.enabled:
+            INSTRUMENTATION.count_bytes(read=file_size(path))
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if self._count is None:
+                self._count = len(self._names())
+            is_new = not os.path.exists(path)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+            if INSTRUMENTATION.enabled:
+                INSTRUMENTATION.count_bytes(written=file_size(path))
+            if is_new:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._evict()
+        except OSError:
+            pass
+
+    def lookup(self, managers, settings, rules=None):
+        """The cached schedule for these inputs, in settings order, or None."""
+        entries = self.get(self.key(managers, settings, rules))
+        if entries is None:
+            return None
+        assignment = {(day, shift_type): manager_id for day, shift_type, manager_id in entries}
+        if set(assignment) != set(settings):
+            return None
+        return {key: assignment[key] for key in settings}
+
+    def clear(self):
+        for name in self._names():
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+        self._count = None
+
+    def _names(self):
+        try:
+            return [name for name in os.listdir(self.directory) if name.endswith(".json")]
+        except OSError:
+            return []
+
+    def _evict(self):
+        names = self._names()
+        self._count = len(names)
+        if len(names) <= self.max_entries:
+            return
+        used = []
+        for name in names:
+            try:
+                used.append((os.path.getmtime(os.path.join(self.directory, name)), name))
+            except OSError:
+                pass  # evicted by another process
+        used.sort()
+        for _, name in used[:len(used) - self.max_entries]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+                self._count -= 1
+            except OSError:
+                pass
+
+
+@instrumented
+def cached_schedule(managers, settings, rules=None, cache=None):
+    """
+    generate_schedule() through a ScheduleCache: returns (schedule, solver),
+    with solver None when the whole input was a hit.
+    """
+    managers = list(managers)
+    if cache is not None:
+        schedule = cache.lookup(managers, settings, rules)
+        if schedule is not None:
+            return schedule, None
+    solver = ScheduleSolver(managers, settings, rules)
+    return solver.solve(cache), solver
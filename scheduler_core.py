@@ -0,0 +1,16 @@
+"""
+Scheduling core, with no tkinter dependency.
+
+scheduler.py builds the Tk app on top of this module; schedule_cli.py
+drives it headless. The code lives in the scheduler_* modules below and
+is re-exported here, so callers import everything from scheduler_core.
+"""
+
+from scheduler_base import *  # noqa: F401,F403
+from scheduler_storage import *  # noqa: F401,F403
+from scheduler_import import *  # noqa: F401,F403
+from scheduler_solver import *  # noqa: F401,F403
+from scheduler_cache import *  # noqa: F401,F403
+from scheduler_reports import *  # noqa: F401,F403
+from scheduler_scenarios import *  # noqa: F401,F403
+from scheduler_search import *  # noqa: F401,F403
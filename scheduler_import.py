@@ -0,0 +1,205 @@
+"""Bulk import of managers from a CSV or xlsx file."""
+
+import csv
+import os
+
+from scheduler_base import (
+    DAYS, GENDERS, INSTRUMENTATION, MANAGER_HEADERS, MANAGERS_SHEET_NAME, ROLES, Manager, file_size,
+    instrumented, instrumented_class, parse_window, read_workbook,
+)
+
+
+# ------------------ MANAGER IMPORT ------------------
+
+TIME_FORMAT_HINT = "Use hours (9) or HH:MM (17:30); an end before the start runs overnight."
+
+
+def validate_manager(name, role, gender, windows):
+    """
+    Check one manager's fields (the rules behind the edit form) and build
+    the record. windows maps day -> (start, end) as typed; a blank pair
+    is a day off. Returns (manager, errors); manager is None on errors.
+    """
+    errors = []
+    name = "" if name is None else str(name).strip()
+    if not name:
+        errors.append("Name cannot be empty.")
+
+    role = "" if role is None else str(role).strip().lower()
+    if role not in ROLES:
+        errors.append(f"Role must be one of {', '.join(ROLES)}, not {role!r}.")
+    gender = "" if gender is None else str(gender).strip().upper()
+    if gender not in GENDERS:
+        errors.append(f"Gender must be one of {', '.join(GENDERS)}, not {gender!r}.")
+
+    availability = {}
+    for day in DAYS:
+        start, end = windows.get(day, (None, None))
+        try:
+            window = parse_window(start, end)
+        except ValueError as e:
+            errors.append(f"{day}: {e}.")
+            continue
+        if window[0] is not None and window[0] == window[1]:
+            errors.append(f"{day}: start and end are both {start}.")
+            continue
+        availability[day] = window
+
+    if errors:
+        return None, errors
+    return Manager(name=name, role=role, gender=gender, availability=availability), []
+
+
+IMPORT_HEADERS = {header.lower(): header for header in MANAGER_HEADERS}
+IMPORT_REQUIRED = ("Name", "Role", "Gender")
+
+
+def import_header(value):
+    """The MANAGER_HEADERS entry a file header stands for, or None ("mon start" -> "Mon_start")."""
+    key = "" if value is None else str(value).strip().lower().replace(" ", "_").replace("-", "_")
+    return IMPORT_HEADERS.get(key)
+
+
+def parse_manager_id(value):
+    """A manager ID cell as an int (12, "12", 12.0); None if blank. Raises ValueError otherwise."""
+    text = "" if value is None else str(value).strip()
+    if not text:
+        return None
+    number = float(text)
+    if not number.is_integer():
+        raise ValueError(text)
+    return int(number)
+
+
+@instrumented
+def read_manager_rows(path):
+    """
+    Rows of a managers .csv/.xlsx as (line, {header: value}); blank rows skipped.
+    Short rows get None for the missing cells. Raises ValueError for a missing required column.
+    """
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        wb = read_workbook(path, read_only=True)
+        try:
+            ws = wb[MANAGERS_SHEET_NAME] if MANAGERS_SHEET_NAME in wb.sheetnames else wb.active
+            rows = list(ws.iter_rows(values_only=True))
+        finally:
+            wb.close()
+    else:
+        if INSTRUMENTATION.enabled:
+            INSTRUMENTATION.count_bytes(read=file_size(path))
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.reader(f))
+    if not rows:
+        raise ValueError(f"{os.path.basename(path)} is empty")
+
+    columns = [(i, import_header(value)) for i, value in enumerate(rows[0])]
+    columns = [(i, header) for i, header in columns if header is not None]
+    missing = [h for h in IMPORT_REQUIRED if h not in {header for _, header in columns}]
+    if missing:
+        raise ValueError(f"{os.path.basename(path)} has no {', '.join(missing)} column")
+
+    result = []
+    for line, values in enumerate(rows[1:], start=2):
+        row = {header: values[i] if i < len(values) else None for i, header in columns}
+        if all(v is None or str(v).strip() == "" for v in row.values()):
+            continue
+        result.append((line, row))
+    return result
+
+
+@instrumented_class
+class ManagerImport:
+    """
+    A bulk import validated against the current roster before anything is stored.
+    Rows match by ID, else by unique name; day columns absent from the file keep
+    their stored windows. apply() refuses to run while errors is non-empty.
+    """
+
+    def __init__(self, rows, managers):
+        self.added = []
+        self.updated = []
+        self.unchanged = 0
+        self.errors = []
+
+        by_id = {m.id: m for m in managers}
+        by_name = {}
+        for m in managers:
+            by_name.setdefault(m.name.strip().casefold(), []).append(m)
+        seen_ids = {}
+        seen_names = {}
+
+        for line, row in rows:
+            manager, errors = validate_manager(
+                row.get("Name"), row.get("Role"), row.get("Gender"),
+                {day: (row.get(f"{day}_start"), row.get(f"{day}_end")) for day in DAYS},
+            )
+            existing = None
+            try:
+                manager_id = parse_manager_id(row.get("ID"))
+            except ValueError:
+                errors.append(f"ID {row['ID']!r} is not a whole number.")
+                manager_id = None
+            if manager_id is not None:
+                if manager_id in seen_ids:
+                    errors.append(f"ID {manager_id} already appears on line {seen_ids[manager_id]}.")
+                elif manager_id not in by_id:
+                    errors.append(f"ID {manager_id} is not on the roster (leave ID blank to add).")
+                else:
+                    seen_ids[manager_id] = line
+                    existing = by_id[manager_id]
+
+            if manager is not None:
+                key = manager.name.casefold()
+                if key in seen_names:
+                    errors.append(f"{manager.name!r} already appears on line {seen_names[key]}.")
+                else:
+                    seen_names[key] = line
+                if manager_id is None and not errors:
+                    matches = by_name.get(key, [])
+                    if len(matches) > 1:
+                        ids = ", ".join(str(m.id) for m in matches)
+                        errors.append(f"{manager.name!r} matches managers {ids}; give the ID.")
+                    elif matches:
+                        existing = matches[0]
+
+            if errors:
+                self.errors.extend(f"line {line}: {error}" for error in errors)
+                continue
+            if existing is None:
+                self.added.append(manager)
+                continue
+            # Days the file has no columns for keep their stored window
+            for i, day in enumerate(DAYS):
+                if f"{day}_start" not in row and f"{day}_end" not in row:
+                    manager.times[2 * i:2 * i + 2] = existing.times[2 * i:2 * i + 2]
+            if (manager.name, manager.role_code, manager.gender_code, manager.times) == (
+                existing.name, existing.role_code, existing.gender_code, existing.times
+            ):
+                self.unchanged += 1
+            else:
+                manager.id = existing.id
+                self.updated.append(manager)
+
+    @classmethod
+    def read(cls, path, managers):
+        return cls(read_manager_rows(path), managers)
+
+    def summary(self):
+        return (
+            f"{len(self.added)} new, {len(self.updated)} updated, {self.unchanged} unchanged"
+            + (f", {len(self.errors)} error(s)" if self.errors else "")
+        )
+
+    def apply(self, repo):
+        """
+        Put the batch into repo's memory and return the stored records;
+        one repo.flush() afterwards writes them all with a single storage call.
+        """
+        if self.errors:
+            raise ValueError(f"import has {len(self.errors)} error(s)")
+        stored = [repo.add(manager) for manager in self.added]
+        for manager in self.updated:
+            # Skip anyone deleted since the file was checked
+            if manager.id in repo.managers:
+                stored.append(repo.update(manager.id, manager))
+        return stored
@@ -0,0 +1,412 @@
+"""Coverage matrix and report, schedule rows and the printable roster workbook."""
+
+import os
+from collections import Counter
+from datetime import timedelta
+from itertools import accumulate
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, NamedStyle
+from openpyxl.utils import get_column_letter
+
+from scheduler_base import (
+    COVERAGE_GAPS_SHEET_NAME, COVERAGE_REPORT_FILENAME, COVERAGE_SHEET_NAME, DAY_INDEX, DAYS, HOURS_PER_DAY,
+    ROLES, ROSTER_HEADERS, SCHEDULE_EXPORT_FILENAME, SLOTS_PER_HOUR, as_manager, get_file_path, instrumented,
+    instrumented_class, minutes_span, read_workbook, shift_mask,
+)
+from scheduler_storage import save_workbook
+from scheduler_solver import DEFAULT_SCHEDULE_RULES
+
+
+# ------------------ COVERAGE ------------------
+
+WEEK_HOURS = len(DAYS) * HOURS_PER_DAY
+
+
+def week_spans(day_index, start, end):
+    """
+    [(from, to), ...] week hours fully inside one day's (start, end)
+    minutes; an overnight window ending after Sunday wraps into a second
+    span from Monday 0:00.
+    """
+    span = minutes_span(start, end)
+    if span is None:
+        return []
+    offset = day_index * HOURS_PER_DAY
+    first = offset - (-span[0] // 60)
+    last = offset + span[1] // 60
+    if last <= first:
+        return []
+    if last <= WEEK_HOURS:
+        return [(first, last)]
+    return [(first, WEEK_HOURS), (0, last - WEEK_HOURS)]
+
+
+@instrumented_class
+class CoverageMatrix:
+    """
+    Managers available per role and week hour against the critical shifts running then.
+    Built with difference arrays; the edit methods only touch the hours that changed.
+    """
+
+    def __init__(self, managers, settings, rules=None):
+        self.shift_roles = dict(DEFAULT_SCHEDULE_RULES, **(rules or {}))["shift_roles"]
+        self.available = {}                                # role -> [managers per week hour]
+        self.spans = {}                                    # id -> (role, [(from, to), ...])
+        self.hour_shifts = [set() for _ in range(WEEK_HOURS)]  # week hour -> {(day, shift_type)}
+        self.settings = {}                                 # (day, shift_type) -> (start, end)
+
+        counts = Counter()
+        for m in managers:
+            m = as_manager(m)
+            role, spans = self._manager_spans(m)
+            self.spans[m.id] = (role, spans)
+            for span in spans:
+                counts[(role,) + span] += 1
+
+        diffs = {}
+        for (role, first, last), n in counts.items():
+            diff = diffs.setdefault(role, [0] * (WEEK_HOURS + 1))
+            diff[first] += n
+            diff[last] -= n
+        for role, diff in diffs.items():
+            self.available[role] = list(accumulate(diff[:WEEK_HOURS]))
+
+        for key, window in settings.items():
+            self.update_shift(key, window)
+
+    # ---------- edits ----------
+
+    def update_manager(self, manager):
+        manager = as_manager(manager)
+        self.remove_manager(manager.id)
+        role, spans = self._manager_spans(manager)
+        self.spans[manager.id] = (role, spans)
+        self._count(role, spans, 1)
+
+    def remove_manager(self, manager_id):
+        if manager_id in self.spans:
+            role, spans = self.spans.pop(manager_id)
+            self._count(role, spans, -1)
+
+    def update_shift(self, key, window):
+        """Add, change or (window=None) remove one critical shift."""
+        old = self.settings.pop(key, None)
+        if old is not None:
+            for hour in self._shift_hours(key, old):
+                self.hour_shifts[hour].discard(key)
+        if window is not None:
+            self.settings[key] = window
+            for hour in self._shift_hours(key, window):
+                self.hour_shifts[hour].add(key)
+
+    def update_settings(self, settings):
+        for key in [k for k in self.settings if k not in settings]:
+            self.update_shift(key, None)
+        for key, window in settings.items():
+            if self.settings.get(key) != window:
+                self.update_shift(key, window)
+
+    # ---------- queries ----------
+
+    def roles(self):
+        """Roles with at least one manager, ROLES first."""
+        return [r for r in ROLES if r in self.available] + sorted(
+            r for r in self.available if r not in ROLES
+        )
+
+    def eligible(self, hour, shifts=None):
+        """Managers available at `hour` whose role may cover one of `shifts` (default: those running)."""
+        shifts = self.hour_shifts[hour] if shifts is None else shifts
+        allowed = set()
+        for _, shift_type in shifts:
+            roles = self.shift_roles.get(shift_type)
+            if not roles:
+                return sum(counts[hour] for counts in self.available.values())
+            allowed.update(roles)
+        return sum(self.available[role][hour] for role in allowed if role in self.available)
+
+    def cell(self, hour):
+        """Coverage of one week hour as a dict (see cells())."""
+        required = len(self.hour_shifts[hour])
+        eligible = self.eligible(hour) if required else 0
+        return {
+            "day": DAYS[hour // HOURS_PER_DAY],
+            "hour": hour % HOURS_PER_DAY,
+            "available": {role: self.available[role][hour] for role in self.roles()},
+            "required": required,
+            "eligible": eligible,
+            "shortfall": max(0, required - eligible),
+        }
+
+    def cells(self):
+        """
+        One dict per week hour: {day, hour, available {role: n}, required,
+        eligible, shortfall}. required counts critical shifts running in
+        that hour; eligible counts available managers allowed to cover them.
+        """
+        return [self.cell(hour) for hour in range(WEEK_HOURS)]
+
+    def gaps(self):
+        """Runs of short hours on one day as {day, start, end, required, eligible, shifts}."""
+        gaps = []
+        current = None
+        for hour in range(WEEK_HOURS):
+            shifts = self.hour_shifts[hour]
+            short = bool(shifts) and (
+                self.eligible(hour) < len(shifts)
+                or any(self.eligible(hour, [key]) == 0 for key in shifts)
+            )
+            if short and current is not None and hour == current["hour_to"] and hour % HOURS_PER_DAY:
+                current["hour_to"] = hour + 1
+                current["required"] = max(current["required"], len(shifts))
+                current["eligible"] = min(current["eligible"], self.eligible(hour))
+                current["shifts"].update(shifts)
+            elif short:
+                current = {
+                    "hour_from": hour,
+                    "hour_to": hour + 1,
+                    "required": len(shifts),
+                    "eligible": self.eligible(hour),
+                    "shifts": set(shifts),
+                }
+                gaps.append(current)
+        return [
+            {
+                "day": DAYS[gap["hour_from"] // HOURS_PER_DAY],
+                "start": gap["hour_from"] % HOURS_PER_DAY,
+                "end": (gap["hour_to"] - 1) % HOURS_PER_DAY + 1,
+                "required": gap["required"],
+                "eligible": gap["eligible"],
+                "shifts": sorted(shift_type for _, shift_type in gap["shifts"]),
+            }
+            for gap in gaps
+        ]
+
+    # ---------- internals ----------
+
+    @staticmethod
+    def _manager_spans(manager):
+        spans = []
+        for day_index, (start, end) in enumerate(manager.minute_windows()):
+            spans.extend(week_spans(day_index, start, end))
+        return manager.role, spans
+
+    @staticmethod
+    def _shift_hours(key, window):
+        mask = shift_mask(key[0], *window)
+        hour_bits = (1 << SLOTS_PER_HOUR) - 1
+        return [hour for hour in range(WEEK_HOURS) if mask >> (hour * SLOTS_PER_HOUR) & hour_bits]
+
+    def _count(self, role, spans, delta):
+        counts = self.available.setdefault(role, [0] * WEEK_HOURS)
+        for first, last in spans:
+            for hour in range(first, last):
+                counts[hour] += delta
+
+
+@instrumented
+def write_coverage_report(cells, gaps, path=None):
+    """
+    Write the Coverage and Coverage gaps sheets of the coverage report
+    from CoverageMatrix.cells() / gaps() (replacing earlier versions of
+    those sheets; other sheets are kept).
+    """
+    path = path or get_file_path(COVERAGE_REPORT_FILENAME)
+    if os.path.exists(path):
+        wb = read_workbook(path)
+        for title in (COVERAGE_SHEET_NAME, COVERAGE_GAPS_SHEET_NAME):
+            if title in wb.sheetnames:
+                del wb[title]
+    else:
+        wb = Workbook()
+        wb.remove(wb.active)
+
+    header_font = Font(bold=True)
+    header_fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
+    short_fill = PatternFill(start_color="F4A6A6", end_color="F4A6A6", fill_type="solid")
+    tight_fill = PatternFill(start_color="FFE08A", end_color="FFE08A", fill_type="solid")
+
+    roles = list(cells[0]["available"]) if cells else []
+    ws = wb.create_sheet(COVERAGE_SHEET_NAME)
+    ws.append(["Day", "Hour"] + [f"Available {role}" for role in roles]
+              + ["Required", "Eligible", "Shortfall"])
+    for cell in cells:
+        ws.append(
+            [cell["day"], cell["hour"]] + [cell["available"][role] for role in roles]
+            + [cell["required"], cell["eligible"], cell["shortfall"]]
+        )
+        if cell["shortfall"]:
+            fill = short_fill
+        elif cell["required"] and cell["eligible"] == cell["required"]:
+            fill = tight_fill
+        else:
+            continue
+        for col in range(1, ws.max_column + 1):
+            ws.cell(row=ws.max_row, column=col).fill = fill
+
+    gaps_ws = wb.create_sheet(COVERAGE_GAPS_SHEET_NAME)
+    gaps_ws.append(["Day", "StartHour", "EndHour", "Required", "Eligible", "Shifts"])
+    for gap in gaps:
+        gaps_ws.append([
+            gap["day"], gap["start"], gap["end"], gap["required"], gap["eligible"],
+            ", ".join(gap["shifts"]),
+        ])
+
+    for sheet in (ws, gaps_ws):
+        for cell in sheet[1]:
+            cell.font = header_font
+            cell.fill = header_fill
+        sheet.freeze_panes = "A2"
+
+    save_workbook(wb, path)
+    wb.close()
+
+
+# ------------------ SCHEDULE ROWS ------------------
+
+def horizon_rows(weeks, settings, managers):
+    """
+    schedule_rows() for every week of a HorizonScheduler.schedule() result,
+    each row tagged with "week" and "date" (ISO strings).
+    """
+    rows = []
+    for week_start, schedule in weeks:
+        for row in schedule_rows(schedule, settings, managers):
+            day = week_start + timedelta(days=DAY_INDEX[row["day"]])
+            rows.append(dict(row, week=week_start.isoformat(), date=day.isoformat()))
+    return rows
+
+
+def schedule_rows(schedule, settings, managers):
+    """
+    Flatten a schedule for export: one dict per critical shift, in
+    schedule order, with manager_id/manager_name None when uncovered.
+    `managers` maps manager ID -> manager dict.
+    """
+    rows = []
+    for (day, shift_type), manager_id in schedule.items():
+        start, end = settings[(day, shift_type)]
+        manager = managers.get(manager_id) if manager_id is not None else None
+        rows.append({
+            "day": day,
+            "shift_type": shift_type,
+            "start": start,
+            "end": end,
+            "manager_id": manager_id,
+            "manager_name": manager["name"] if manager else None,
+            "role": manager["role"] if manager else None,
+        })
+    return rows
+
+
+# ------------------ ROSTER EXPORT ------------------
+
+def roster_styles():
+    """
+    Named styles for the roster workbook. Cells refer to these by name, so
+    a sheet of any size shares three style records instead of creating
+    Font/PatternFill objects per cell.
+    """
+    center = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    return [
+        NamedStyle(
+            "roster_header",
+            font=Font(bold=True),
+            fill=PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid"),
+            alignment=Alignment(horizontal="center", vertical="center"),
+        ),
+        NamedStyle(
+            "roster_shift",
+            fill=PatternFill(start_color="E2EFDA", end_color="E2EFDA", fill_type="solid"),
+            alignment=center,
+        ),
+        NamedStyle(
+            "roster_uncovered",
+            font=Font(bold=True, color="9C0006"),
+            fill=PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid"),
+            alignment=center,
+        ),
+    ]
+
+
+def shift_label(row):
+    """"open 6–9" for one schedule_rows() entry."""
+    start = "" if row["start"] is None else row["start"]
+    end = "" if row["end"] is None else row["end"]
+    return f"{row['shift_type']} {start}–{end}"
+
+
+def roster_lines(rows):
+    """
+    Roster lines from schedule_rows() output: one per scheduled manager
+    (by name), then an UNCOVERED line if any shift has nobody.
+    Yields (manager_id, name, role, {day: "label\nlabel"}).
+    """
+    managers = {}
+    uncovered = {}
+    for row in rows:
+        if row["manager_id"] is None:
+            days = uncovered
+        else:
+            days = managers.setdefault(
+                row["manager_id"], (row["manager_name"], row["role"], {})
+            )[2]
+        days.setdefault(row["day"], []).append(shift_label(row))
+
+    for manager_id, (name, role, days) in sorted(managers.items(), key=lambda item: str(item[1][0])):
+        yield manager_id, name, role, {day: "\n".join(labels) for day, labels in days.items()}
+    if uncovered:
+        yield None, "UNCOVERED", "", {day: "\n".join(labels) for day, labels in uncovered.items()}
+
+
+def sheet_title(name, used):
+    """A valid, unused worksheet title for `name` (max 31 chars, no []:*?/\\)."""
+    title = "".join("_" if ch in "[]:*?/\\" else ch for ch in str(name)).strip() or "Sheet"
+    title = title[:31]
+    candidate, n = title, 2
+    while candidate.lower() in used:
+        suffix = f" ({n})"
+        candidate = title[:31 - len(suffix)] + suffix
+        n += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+@instrumented
+def write_roster_workbook(sheets, path=None):
+    """Printable roster: one sheet per (title, rows) pair, written in write-only mode."""
+    path = path or get_file_path(SCHEDULE_EXPORT_FILENAME)
+    wb = Workbook(write_only=True)
+    for style in roster_styles():
+        wb.add_named_style(style)
+
+    def styled(ws, value, style):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    used = set()
+    for title, rows in sheets:
+        ws = wb.create_sheet(sheet_title(title, used))
+        ws.column_dimensions["A"].width = 8
+        ws.column_dimensions["B"].width = 25
+        ws.column_dimensions["C"].width = 10
+        for col in range(4, len(ROSTER_HEADERS) + 1):
+            ws.column_dimensions[get_column_letter(col)].width = 16
+        ws.freeze_panes = "D2"
+        ws.print_title_rows = "1:1"
+        ws.page_setup.orientation = "landscape"
+        ws.sheet_properties.pageSetUpPr.fitToPage = True
+        ws.page_setup.fitToHeight = 0
+
+        ws.append([styled(ws, header, "roster_header") for header in ROSTER_HEADERS])
+        for manager_id, name, role, days in roster_lines(rows):
+            style = "roster_shift" if manager_id is not None else "roster_uncovered"
+            ws.append(
+                [manager_id, name, role]
+                + [styled(ws, days[day], style) if day in days else None for day in DAYS]
+            )
+
+    save_workbook(wb, path)
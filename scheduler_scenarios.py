@@ -0,0 +1,171 @@
+"""What-if scenarios: edits over a base roster, solved and compared side by side."""
+
+import os
+import time
+from collections import ChainMap
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from scheduler_base import DAYS, Manager, instrumented
+from scheduler_storage import manager_from_record, manager_to_record
+from scheduler_solver import ScheduleSolver
+from scheduler_reports import CoverageMatrix
+
+
+# ------------------ WHAT-IF SCENARIOS ------------------
+
+BASELINE_SCENARIO_NAME = "Current"
+
+
+class Scenario:
+    """
+    A what-if over a shared base roster and settings, as ChainMaps of its changes.
+    None in a change map marks a removed manager or shift.
+    """
+
+    def __init__(self, name, managers, settings):
+        self.name = name
+        self.changes = []          # what was changed, for display
+        self.manager_changes = {}  # id -> Manager, or None when removed
+        self.shift_changes = {}    # (day, shift_type) -> (start, end), or None when removed
+        self.managers = ChainMap(self.manager_changes, managers)
+        self.settings = ChainMap(self.shift_changes, settings)
+        self.next_id = -1          # added managers get negative IDs, never a real one
+
+    def _own(self, manager_id):
+        """The scenario's copy of a manager, made on first change."""
+        manager = self.managers.get(manager_id)
+        if manager is None:
+            raise KeyError(manager_id)
+        if manager_id not in self.manager_changes:
+            manager = self.manager_changes[manager_id] = manager.copy()
+        return manager
+
+    def set_off(self, manager_id, days=DAYS):
+        manager = self._own(manager_id)
+        for day in days:
+            manager.set_window(day, None, None)
+        label = "all week" if list(days) == DAYS else ", ".join(days)
+        self.changes.append(f"{manager.name} off {label}")
+
+    def set_availability(self, manager_id, day, start, end):
+        manager = self._own(manager_id)
+        manager.set_window(day, start, end)
+        self.changes.append(f"{manager.name} {day} {start}-{end}")
+
+    def add_manager(self, manager):
+        manager = Manager.from_mapping(manager, id=self.next_id, row_index=None)
+        self.next_id -= 1
+        self.manager_changes[manager.id] = manager
+        self.changes.append(f"add {manager.name} ({manager.role})")
+        return manager
+
+    def remove_manager(self, manager_id):
+        manager = self.managers.get(manager_id)
+        if manager is None:
+            raise KeyError(manager_id)
+        self.manager_changes[manager_id] = None
+        self.changes.append(f"remove {manager.name}")
+
+    def set_shift(self, key, window):
+        self.shift_changes[key] = tuple(window)
+        self.changes.append(f"{key[0]} {key[1]} {window[0]}-{window[1]}")
+
+    def remove_shift(self, key):
+        self.shift_changes[key] = None
+        self.changes.append(f"no {key[0]} {key[1]}")
+
+    def roster(self):
+        return [m for m in self.managers.values() if m is not None]
+
+    def shift_settings(self):
+        return {key: window for key, window in self.settings.items() if window is not None}
+
+    def overlay(self):
+        """
+        Just this scenario's changes, small enough to send to a worker
+        process. Managers go as records (roles and genders by value, since
+        codes are only meaningful to this process's tables).
+        """
+        manager_changes = {
+            manager_id: None if manager is None else manager_to_record(manager)
+            for manager_id, manager in self.manager_changes.items()
+        }
+        return self.name, list(self.changes), manager_changes, dict(self.shift_changes)
+
+    @classmethod
+    def from_overlay(cls, overlay, managers, settings):
+        """The scenario an overlay() describes, layered over another base."""
+        name, changes, manager_changes, shift_changes = overlay
+        scenario = cls(name, managers, settings)
+        scenario.changes = list(changes)
+        scenario.manager_changes.update(
+            (manager_id, None if record is None else manager_from_record(record))
+            for manager_id, record in manager_changes.items()
+        )
+        scenario.shift_changes.update(shift_changes)
+        return scenario
+
+
+def evaluate_scenario(scenario, rules=None):
+    """Solve the schedule and coverage gaps of one scenario; returns a summary dict."""
+    started = time.perf_counter()
+    managers = scenario.roster()
+    settings = scenario.shift_settings()
+    solver = ScheduleSolver(managers, settings, rules)
+    schedule = solver.solve()
+    gaps = CoverageMatrix(managers, settings, rules).gaps()
+    return {
+        "name": scenario.name,
+        "changes": scenario.changes,
+        "managers": len(managers),
+        "shifts": len(schedule),
+        "uncovered": [key for key, manager_id in schedule.items() if manager_id is None],
+        "coverage_gaps": len(gaps),
+        "scheduled": sum(1 for held in solver.assigned_shifts.values() if held),
+        "max_hours": max(solver.assigned_hours.values(), default=0),
+        "schedule": schedule,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+# Set in each scenario worker process by _init_scenario_worker
+_scenario_base = None
+
+
+def _init_scenario_worker(records, settings):
+    global _scenario_base
+    _scenario_base = ({record["id"]: manager_from_record(record) for record in records}, settings)
+
+
+def _evaluate_overlay(overlay, rules):
+    managers, settings = _scenario_base
+    return evaluate_scenario(Scenario.from_overlay(overlay, managers, settings), rules)
+
+
+@instrumented
+def evaluate_scenarios(managers, settings, scenarios, rules=None, workers=1):
+    """
+    Summaries for the base and each scenario, with the shifts that changed.
+    workers > 1 (0 = one per CPU) solves them in spawned processes.
+    """
+    base = {m.id: m for m in managers}
+    overlays = [Scenario(BASELINE_SCENARIO_NAME, base, settings).overlay()]
+    overlays.extend(scenario.overlay() for scenario in scenarios)
+    workers = min(workers or os.cpu_count() or 1, len(overlays))
+    if workers <= 1:
+        results = [
+            evaluate_scenario(Scenario.from_overlay(overlay, base, settings), rules) for overlay in overlays
+        ]
+    else:
+        records = [manager_to_record(m) for m in base.values()]
+        with ProcessPoolExecutor(workers, mp_context=get_context("spawn"), initializer=_init_scenario_worker,
+                                 initargs=(records, settings)) as pool:
+            results = list(pool.map(_evaluate_overlay, overlays, [rules] * len(overlays)))
+
+    base_schedule = results[0]["schedule"]
+    keys = set(base_schedule)
+    for result in results:
+        schedule = result["schedule"]
+        result["changed"] = sum(1 for key in keys | set(schedule) if schedule.get(key) != base_schedule.get(key))
+    return results
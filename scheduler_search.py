@@ -0,0 +1,161 @@
+"""Type-ahead search index for the managers list."""
+
+import bisect
+
+from scheduler_base import DAY_NAMES_LOWER, DAYS, as_manager, instrumented_class, minutes_span, parse_time
+
+
+# ------------------ SEARCH INDEX ------------------
+
+@instrumented_class
+class ManagerSearchIndex:
+    """
+    In-memory index for type-ahead filtering of the managers list.
+
+    Terms all must match: "anna" (name prefix), "role:shift", "gender:F",
+    "tue" (free at some point), "tue:13-23" (free for the whole window).
+    """
+
+    def __init__(self, managers=()):
+        self.order = {}         # id -> insertion sequence
+        self.ordered_ids = []   # ids in insertion order
+        self.seq = 0
+        self.records = {}       # id -> (tokens, role, gender, windows)
+        self.tokens = {}        # name word -> {id, ...}
+        self.sorted_tokens = []
+        self.by_role = {}
+        self.by_gender = {}
+        self.by_day = {day: {} for day in DAYS}  # day -> {(from, to): {id, ...}}
+        self.day_ids = {day: set() for day in DAYS}  # day -> {id available at some point}
+        for m in managers:
+            self.add(m)
+
+    def __len__(self):
+        return len(self.ordered_ids)
+
+    # ---------- maintenance ----------
+
+    def add(self, manager):
+        manager_id = manager["id"]
+        if manager_id in self.records:
+            self._unindex(manager_id)
+        else:
+            self.order[manager_id] = self.seq
+            self.seq += 1
+            self.ordered_ids.append(manager_id)
+
+        tokens = set(str(manager["name"]).lower().split())
+        windows = []
+        for day, minutes in zip(DAYS, as_manager(manager).minute_windows()):
+            window = minutes_span(*minutes)
+            if window is not None:
+                windows.append((day, window))
+        self.records[manager_id] = (tokens, manager["role"], manager["gender"], windows)
+
+        for token in tokens:
+            ids = self.tokens.get(token)
+            if ids is None:
+                ids = self.tokens[token] = set()
+                bisect.insort(self.sorted_tokens, token)
+            ids.add(manager_id)
+        self.by_role.setdefault(manager["role"], set()).add(manager_id)
+        self.by_gender.setdefault(manager["gender"], set()).add(manager_id)
+        for day, window in windows:
+            self.by_day[day].setdefault(window, set()).add(manager_id)
+            self.day_ids[day].add(manager_id)
+
+    update = add
+
+    def remove(self, manager_id):
+        if manager_id not in self.records:
+            return
+        self._unindex(manager_id)
+        del self.records[manager_id]
+        del self.order[manager_id]
+        self.ordered_ids.remove(manager_id)
+
+    def _unindex(self, manager_id):
+        tokens, role, gender, windows = self.records[manager_id]
+        for token in tokens:
+            ids = self.tokens[token]
+            ids.discard(manager_id)
+            if not ids:
+                del self.tokens[token]
+                del self.sorted_tokens[bisect.bisect_left(self.sorted_tokens, token)]
+        self._discard(self.by_role, role, manager_id)
+        self._discard(self.by_gender, gender, manager_id)
+        for day, window in windows:
+            self._discard(self.by_day[day], window, manager_id)
+            self.day_ids[day].discard(manager_id)
+
+    @staticmethod
+    def _discard(table, key, manager_id):
+        ids = table[key]
+        ids.discard(manager_id)
+        if not ids:
+            del table[key]
+
+    # ---------- queries ----------
+
+    def _prefix_ids(self, prefix):
+        ids = set()
+        i = bisect.bisect_left(self.sorted_tokens, prefix)
+        while i < len(self.sorted_tokens) and self.sorted_tokens[i].startswith(prefix):
+            ids |= self.tokens[self.sorted_tokens[i]]
+            i += 1
+        return ids
+
+    def _available_ids(self, day, window):
+        if not window:
+            return self.day_ids[day]
+        start_str, _, end_str = window.partition("-")
+        span = minutes_span(parse_time(start_str) or 0, parse_time(end_str))
+        if span is None:
+            return set()
+        start, end = span
+        ids = set()
+        for (avail_from, avail_to), group in self.by_day[day].items():
+            if avail_from <= start and avail_to >= end:
+                ids |= group
+        return ids
+
+    def _term_ids(self, term):
+        key, sep, value = term.partition(":")
+        day = DAY_NAMES_LOWER.get(key)
+        if day is not None:
+            try:
+                return self._available_ids(day, value)
+            except ValueError:
+                return set()
+        if sep and key == "role":
+            return self._ci_lookup(self.by_role, value)
+        if sep and key == "gender":
+            return self._ci_lookup(self.by_gender, value)
+        return self._prefix_ids(term)
+
+    @staticmethod
+    def _ci_lookup(table, value):
+        groups = [group for key, group in table.items() if str(key).lower() == value]
+        if len(groups) == 1:
+            return groups[0]
+        return set().union(*groups)
+
+    def search(self, query):
+        """IDs matching every term of `query`, in insertion order."""
+        terms = query.lower().split()
+        if not terms:
+            return list(self.ordered_ids)
+
+        # Narrowest term first keeps the intersections small; the sets may be
+        # the index's own, so they are only read
+        sets = sorted((self._term_ids(term) for term in terms), key=len)
+        result = sets[0]
+        for ids in sets[1:]:
+            if not result:
+                break
+            result = result & ids
+
+        # Sorting a small hit list beats scanning the full order
+        if len(result) * 8 < len(self.ordered_ids):
+            return sorted(result, key=self.order.__getitem__)
+        return list(filter(result.__contains__, self.ordered_ids))
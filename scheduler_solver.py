@@ -0,0 +1,673 @@
+"""The schedule solver, its fairness pass and multi-week horizons."""
+
+import hashlib
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+
+from scheduler_base import (
+    BALANCED_SHIFT_TYPES, FAIRNESS_WEIGHTS, GENDERS, MAX_WEEKLY_HOURS, SHIFT_ROLE_REQUIREMENTS, WEEKEND_DAYS,
+    AvailabilityOverrides, as_date, as_manager, find_candidates, group_managers_by_mask, instrumented,
+    instrumented_class, manager_mask, mask_hours, shift_mask,
+)
+
+
+# ------------------ SCHEDULE SOLVER ------------------
+
+DEFAULT_SCHEDULE_RULES = {
+    "shift_roles": SHIFT_ROLE_REQUIREMENTS,
+    "max_weekly_hours": MAX_WEEKLY_HOURS,
+    # Prefer days whose critical shifts are covered by both genders
+    "mixed_gender_days": True,
+    # How many blocked candidates an uncovered shift may try to free up
+    "ejection_limit": 50,
+    # Seconds of fairness balancing after solve() (0 = skip; see FairnessOptimizer)
+    "balance_seconds": 0,
+    "fairness_weights": FAIRNESS_WEIGHTS,
+}
+
+
+@instrumented_class
+class ScheduleSolver:
+    """
+    Local-search shift assignment that can be repaired incrementally.
+    Hard rules: availability, allowed role, no overlaps, max_weekly_hours.
+    """
+
+    def __init__(self, managers, settings, rules=None):
+        self.rules = dict(DEFAULT_SCHEDULE_RULES)
+        if rules:
+            self.rules.update(rules)
+
+        self.managers = {}        # id -> Manager
+        self.masks = {}           # id -> availability mask
+        self.settings = {}        # (day, shift_type) -> (start, end)
+        self.shifts = {}          # (day, shift_type) -> required mask
+        self.shift_hours = {}     # (day, shift_type) -> hours
+        self.day_shifts = {}      # day -> [(day, shift_type), ...]
+        self.candidates = {}      # (day, shift_type) -> {id, ...}
+        self.assignment = {}      # (day, shift_type) -> id or None
+        self.assigned_shifts = {}  # id -> {(day, shift_type), ...}
+        self.assigned_mask = {}   # id -> mask of held shifts
+        self.assigned_hours = {}  # id -> hours of held shifts
+        self.day_genders = {}     # day -> {gender: count}
+        self.balance_report = None  # last FairnessOptimizer report from solve()
+        self.cache_status = None    # "hit", "partial" or "miss" when solve() used a cache
+
+        for m in managers:
+            m = as_manager(m)
+            self.managers[m.id] = m
+            self.masks[m.id] = manager_mask(m)
+
+        mask_groups = group_managers_by_mask(self.masks)
+        for key, window in settings.items():
+            self._set_shift(key, window, mask_groups)
+
+    # ---------- public API ----------
+
+    def solve(self, cache=None):
+        """Assign every shift from scratch; with a cache, reuse whole or per-day results."""
+        for key in self.shifts:
+            if self.assignment[key] is not None:
+                self._unassign(key)
+
+        if cache is not None:
+            input_key = cache.key(self.managers.values(), self.settings, self.rules)
+            cached = cache.get(input_key)
+            if cached is not None:
+                self._seed(cached)
+                self.cache_status = "hit"
+                return self.schedule()
+            days = self._day_keys(cache)
+            seeds = [cache.get(day_key) for day_key in days.values()]
+            self._seed([item for seed in seeds if seed for item in seed])
+            self.cache_status = "partial" if any(seeds) else "miss"
+
+        self._fill(self.shifts)
+        if self.rules["balance_seconds"]:
+            self.balance_report = self.balance(self.rules["balance_seconds"])
+
+        if cache is not None:
+            cache.put(input_key, self._entries(self.shifts))
+            for day, day_key in days.items():
+                cache.put(day_key, self._entries(self.day_shifts[day]))
+        return self.schedule()
+
+    def balance(self, seconds, seed=0):
+        """Run the fairness pass on the current assignment; returns its report."""
+        return FairnessOptimizer(self, self.rules["fairness_weights"], seed).run(seconds)
+
+    def schedule(self):
+        """Current { (day, shift_type): manager_id or None }."""
+        return dict(self.assignment)
+
+    def assignment_state(self):
+        """Copy of the assignment and its load bookkeeping, for restore_assignment()."""
+        return (
+            dict(self.assignment),
+            {manager_id: set(keys) for manager_id, keys in self.assigned_shifts.items()},
+            dict(self.assigned_mask),
+            dict(self.assigned_hours),
+            {day: dict(genders) for day, genders in self.day_genders.items()},
+        )
+
+    def restore_assignment(self, state):
+        """
+        Go back to an assignment_state(). Only valid while the managers and
+        shifts are the ones it was taken with.
+        """
+        assignment, assigned_shifts, assigned_mask, assigned_hours, day_genders = state
+        self.assignment = dict(assignment)
+        self.assigned_shifts = {manager_id: set(keys) for manager_id, keys in assigned_shifts.items()}
+        self.assigned_mask = dict(assigned_mask)
+        self.assigned_hours = dict(assigned_hours)
+        self.day_genders = {day: dict(genders) for day, genders in day_genders.items()}
+
+    def update_manager(self, manager):
+        """Add or replace one manager and repair only the shifts it affects."""
+        manager = as_manager(manager)
+        manager_id = manager.id
+        held = list(self.assigned_shifts.get(manager_id, ()))
+        for key in held:
+            self._unassign(key)
+
+        self.managers[manager_id] = manager
+        mask = manager_mask(manager)
+        self.masks[manager_id] = mask
+
+        dirty = set(held)
+        for key, required in self.shifts.items():
+            if required and mask & required == required and self._role_allowed(manager_id, key[1]):
+                self.candidates[key].add(manager_id)
+                if self.assignment[key] is None:
+                    dirty.add(key)
+            else:
+                self.candidates[key].discard(manager_id)
+
+        # Hand back the shifts they can still cover so an edit doesn't reshuffle the week
+        for key in held:
+            if manager_id in self.candidates[key] and self._can_take(manager_id, key):
+                self._assign(key, manager_id)
+                dirty.discard(key)
+
+        self._fill(dirty)
+
+    def remove_manager(self, manager_id):
+        """Drop one manager and re-fill the shifts they held."""
+        if manager_id not in self.managers:
+            return
+        held = list(self.assigned_shifts.get(manager_id, ()))
+        for key in held:
+            self._unassign(key)
+        for ids in self.candidates.values():
+            ids.discard(manager_id)
+        del self.managers[manager_id]
+        del self.masks[manager_id]
+        self._fill(held)
+
+    def update_shift(self, key, window):
+        """Add, change or (window=None) remove one critical shift and repair it."""
+        if key in self.shifts and self.assignment[key] is not None:
+            self._unassign(key)
+        if window is None:
+            self._remove_shift(key)
+            return
+        self._set_shift(key, window)
+        self._fill([key])
+
+    def update_settings(self, settings):
+        """Apply a full settings dict, repairing only rows that changed."""
+        for key in [k for k in self.settings if k not in settings]:
+            self.update_shift(key, None)
+        for key, window in settings.items():
+            if self.settings.get(key) != window:
+                self.update_shift(key, window)
+
+    # ---------- shifts ----------
+
+    def _set_shift(self, key, window, mask_groups=None):
+        day, shift_type = key
+        required = shift_mask(day, *window)
+
+        if key not in self.shifts:
+            self.day_shifts.setdefault(day, []).append(key)
+        self.settings[key] = window
+        self.shifts[key] = required
+        self.shift_hours[key] = mask_hours(required)
+        self.assignment[key] = None
+
+        if not required:
+            ids = []
+        elif mask_groups is not None:
+            ids = find_candidates(mask_groups, required)
+        else:
+            ids = [mid for mid, mask in self.masks.items() if mask & required == required]
+        self.candidates[key] = {mid for mid in ids if self._role_allowed(mid, shift_type)}
+
+    # ---------- cache ----------
+
+    def _day_keys(self, cache):
+        """Cache key per day: the rules and the day's shifts with their candidates."""
+        tokens = {mid: f"{mid!r}:{m.gender}" for mid, m in self.managers.items()}
+        rules = cache.rules_key(self.rules)
+        day_keys = {}
+        for day, keys in self.day_shifts.items():
+            h = hashlib.sha256(cache.digest([day, rules, [self.settings[key] for key in keys]]).encode())
+            for key in keys:
+                h.update(key[1].encode() + b"\0")
+                h.update("\n".join(sorted(tokens[mid] for mid in self.candidates[key])).encode())
+            day_keys[day] = h.hexdigest()
+        return day_keys
+
+    def _entries(self, keys):
+        return [[day, shift_type, self.assignment[(day, shift_type)]] for day, shift_type in keys]
+
+    def _seed(self, entries):
+        """Assign cached [day, shift_type, manager_id] entries that are still feasible."""
+        for day, shift_type, manager_id in entries:
+            key = (day, shift_type)
+            if (
+                manager_id is not None and self.assignment.get(key, 0) is None
+                and manager_id in self.candidates[key] and self._can_take(manager_id, key)
+            ):
+                self._assign(key, manager_id)
+
+    def _remove_shift(self, key):
+        if key not in self.shifts:
+            return
+        self.day_shifts[key[0]].remove(key)
+        for table in (self.settings, self.shifts, self.shift_hours, self.candidates, self.assignment):
+            del table[key]
+
+    # ---------- assignment bookkeeping ----------
+
+    def _role_allowed(self, manager_id, shift_type):
+        roles = self.rules["shift_roles"].get(shift_type)
+        return not roles or self.managers[manager_id].role in roles
+
+    def _can_take(self, manager_id, key):
+        if self.assigned_mask.get(manager_id, 0) & self.shifts[key]:
+            return False
+        hours = self.assigned_hours.get(manager_id, 0) + self.shift_hours[key]
+        return hours <= self.rules["max_weekly_hours"]
+
+    def _assign(self, key, manager_id):
+        self.assignment[key] = manager_id
+        self.assigned_shifts.setdefault(manager_id, set()).add(key)
+        self.assigned_mask[manager_id] = self.assigned_mask.get(manager_id, 0) | self.shifts[key]
+        self.assigned_hours[manager_id] = self.assigned_hours.get(manager_id, 0) + self.shift_hours[key]
+        genders = self.day_genders.setdefault(key[0], {})
+        gender = self.managers[manager_id].gender
+        genders[gender] = genders.get(gender, 0) + 1
+
+    def _unassign(self, key):
+        manager_id = self.assignment[key]
+        self.assignment[key] = None
+        self.assigned_shifts[manager_id].discard(key)
+        self.assigned_mask[manager_id] &= ~self.shifts[key]
+        self.assigned_hours[manager_id] -= self.shift_hours[key]
+        self.day_genders[key[0]][self.managers[manager_id].gender] -= 1
+
+    def _missing_genders(self, day):
+        if not self.rules["mixed_gender_days"]:
+            return set()
+        genders = self.day_genders.get(day, {})
+        return {g for g in GENDERS if not genders.get(g)}
+
+    # ---------- search ----------
+
+    def _pick(self, key, exclude=None):
+        """Best feasible candidate: fills a missing gender first, then fewest hours."""
+        missing = self._missing_genders(key[0])
+        best = None
+        best_score = None
+        for manager_id in self.candidates[key]:
+            if manager_id == exclude or not self._can_take(manager_id, key):
+                continue
+            score = (
+                self.managers[manager_id].gender not in missing,
+                self.assigned_hours.get(manager_id, 0),
+            )
+            if best is None or score < best_score:
+                best, best_score = manager_id, score
+        return best
+
+    def _fill(self, keys):
+        """Greedy fill (most constrained first), then ejection and gender passes."""
+        keys = sorted(
+            (k for k in keys if k in self.shifts),
+            key=lambda k: len(self.candidates[k])
+        )
+        for key in keys:
+            if self.assignment[key] is None:
+                manager_id = self._pick(key)
+                if manager_id is not None:
+                    self._assign(key, manager_id)
+
+        for key in keys:
+            if self.assignment[key] is None and self.candidates[key]:
+                self._eject_for(key)
+
+        self._mix_genders({key[0] for key in keys})
+
+    def _eject_for(self, key):
+        """
+        Cover `key` by moving one of a blocked candidate's shifts
+        to somebody else. Returns True on success.
+        """
+        tries = 0
+        for manager_id in self.candidates[key]:
+            if tries >= self.rules["ejection_limit"]:
+                break
+            tries += 1
+            for other in list(self.assigned_shifts.get(manager_id, ())):
+                self._unassign(other)
+                if self._can_take(manager_id, key):
+                    replacement = self._pick(other, exclude=manager_id)
+                    if replacement is not None:
+                        self._assign(other, replacement)
+                        self._assign(key, manager_id)
+                        return True
+                self._assign(other, manager_id)
+        return False
+
+    def _mix_genders(self, days):
+        """Swap in a missing gender on days covered by one gender only."""
+        for day in days:
+            missing = self._missing_genders(day)
+            if not missing:
+                continue
+            for key in self.day_shifts.get(day, ()):
+                current = self.assignment[key]
+                # Only replace someone whose gender is already present twice
+                if current is None or self.day_genders[day][self.managers[current].gender] < 2:
+                    continue
+                for manager_id in self.candidates[key]:
+                    if self.managers[manager_id].gender in missing and self._can_take(manager_id, key):
+                        self._unassign(key)
+                        self._assign(key, manager_id)
+                        break
+                missing = self._missing_genders(day)
+                if not missing:
+                    break
+
+
+@instrumented
+def generate_schedule(managers, settings, rules=None):
+    """
+    Assign one manager to each critical shift.
+    Returns { (day, shift_type): manager_id or None } in settings order.
+    See ScheduleSolver for the rules applied.
+    """
+    return ScheduleSolver(managers, settings, rules).solve()
+
+
+# ------------------ FAIRNESS PASS ------------------
+
+FAIRNESS_METRICS = ("hours", "weekend", "open_close")
+
+
+@instrumented_class
+class FairnessOptimizer:
+    """
+    Evens out hours, weekend and open/close shifts between managers of one role.
+    Per-role sum(x) and sum(x^2) make each move or swap O(1) to score.
+    """
+
+    EPSILON = 1e-9
+
+    def __init__(self, solver, weights=None, seed=0):
+        self.solver = solver
+        weights = dict(FAIRNESS_WEIGHTS, **(weights or {}))
+        self.weights = [weights[metric] for metric in FAIRNESS_METRICS]
+        self.rng = random.Random(seed)
+
+        self.vectors = {key: self._shift_vector(key) for key in solver.shifts}
+        self.candidate_lists = {}   # (key, role) -> candidate IDs of that role
+        for key, ids in solver.candidates.items():
+            for manager_id in ids:
+                self.candidate_lists.setdefault((key, solver.managers[manager_id].role), []).append(manager_id)
+        self.size = Counter(m.role for m in solver.managers.values())
+        self.load = {}                                          # id -> [hours, weekend, open_close]
+        self.sums = {role: [0] * len(FAIRNESS_METRICS) for role in self.size}
+        self.squares = {role: [0] * len(FAIRNESS_METRICS) for role in self.size}
+        for key, manager_id in solver.assignment.items():
+            if manager_id is not None:
+                self._apply([(manager_id, self.vectors[key])])
+
+    # ---------- objective ----------
+
+    def objective(self):
+        total = 0.0
+        for role, n in self.size.items():
+            for i, weight in enumerate(self.weights):
+                total += weight * (self.squares[role][i] - self.sums[role][i] ** 2 / n)
+        return total
+
+    def spread(self):
+        """{role: {metric: max - min}} over every manager of the role."""
+        spread = {}
+        for role in self.size:
+            loads = [
+                self.load.get(m.id, (0,) * len(FAIRNESS_METRICS))
+                for m in self.solver.managers.values() if m.role == role
+            ]
+            spread[role] = {
+                metric: max(load[i] for load in loads) - min(load[i] for load in loads)
+                for i, metric in enumerate(FAIRNESS_METRICS)
+            }
+        return spread
+
+    def _delta(self, changes):
+        """Objective change if each (manager_id, vector) in `changes` is added to that manager."""
+        by_role = {}
+        for manager_id, vector in changes:
+            role = self.solver.managers[manager_id].role
+            load = self.load.get(manager_id, (0,) * len(FAIRNESS_METRICS))
+            d_squares, d_sums = by_role.setdefault(role, ([0] * len(vector), [0] * len(vector)))
+            for i, d in enumerate(vector):
+                d_squares[i] += (load[i] + d) ** 2 - load[i] ** 2
+                d_sums[i] += d
+        delta = 0.0
+        for role, (d_squares, d_sums) in by_role.items():
+            n = self.size[role]
+            for i, weight in enumerate(self.weights):
+                total = self.sums[role][i]
+                delta += weight * (d_squares[i] - ((total + d_sums[i]) ** 2 - total ** 2) / n)
+        return delta
+
+    def _apply(self, changes):
+        for manager_id, vector in changes:
+            role = self.solver.managers[manager_id].role
+            load = self.load.setdefault(manager_id, [0] * len(FAIRNESS_METRICS))
+            for i, d in enumerate(vector):
+                self.squares[role][i] += (load[i] + d) ** 2 - load[i] ** 2
+                self.sums[role][i] += d
+                load[i] += d
+
+    def _shift_vector(self, key):
+        day, shift_type = key
+        return (
+            self.solver.shift_hours[key],
+            1 if day in WEEKEND_DAYS else 0,
+            1 if shift_type in BALANCED_SHIFT_TYPES else 0,
+        )
+
+    # ---------- moves ----------
+
+    def _genders_ok(self, changes):
+        """changes: [(day, manager_out, manager_in)]; False if a day would lose a gender."""
+        solver = self.solver
+        if not solver.rules["mixed_gender_days"]:
+            return True
+        days = {}
+        for day, out_id, in_id in changes:
+            counts = days.setdefault(day, dict(solver.day_genders.get(day, {})))
+            out_gender = solver.managers[out_id].gender
+            in_gender = solver.managers[in_id].gender
+            counts[out_gender] = counts.get(out_gender, 0) - 1
+            counts[in_gender] = counts.get(in_gender, 0) + 1
+        for day, counts in days.items():
+            after = sum(1 for g in GENDERS if counts.get(g))
+            if after < len(GENDERS) - len(solver._missing_genders(day)):
+                return False
+        return True
+
+    def _try_move(self, key):
+        """Hand `key` to a random other candidate of the same role; returns the gain or 0."""
+        solver = self.solver
+        current = solver.assignment[key]
+        if current is None:
+            return 0
+        candidates = self.candidate_lists[(key, solver.managers[current].role)]
+        if len(candidates) < 2:
+            return 0
+        other = self.rng.choice(candidates)
+        if other == current or not solver._can_take(other, key):
+            return 0
+        vector = self.vectors[key]
+        changes = [(current, [-v for v in vector]), (other, vector)]
+        delta = self._delta(changes)
+        if delta > -self.EPSILON or not self._genders_ok([(key[0], current, other)]):
+            return 0
+        solver._unassign(key)
+        solver._assign(key, other)
+        self._apply(changes)
+        return -delta
+
+    def _try_swap(self, key, assigned):
+        """Trade `key` with a random shift held by someone else of the same role; returns the gain or 0."""
+        solver = self.solver
+        other_key = self.rng.choice(assigned)
+        a, b = solver.assignment[key], solver.assignment[other_key]
+        if a is None or b is None or a == b or solver.managers[a].role != solver.managers[b].role:
+            return 0
+        if b not in solver.candidates[key] or a not in solver.candidates[other_key]:
+            return 0
+        diff = [vb - va for va, vb in zip(self.vectors[key], self.vectors[other_key])]
+        if not any(diff):
+            return 0
+        changes = [(a, diff), (b, [-d for d in diff])]
+        delta = self._delta(changes)
+        if delta > -self.EPSILON:
+            return 0
+
+        # Each must fit the other's shift once their own is given up
+        mask, other_mask = solver.shifts[key], solver.shifts[other_key]
+        if (solver.assigned_mask[a] & ~mask) & other_mask or (solver.assigned_mask[b] & ~other_mask) & mask:
+            return 0
+        cap = solver.rules["max_weekly_hours"]
+        if solver.assigned_hours[a] + diff[0] > cap or solver.assigned_hours[b] - diff[0] > cap:
+            return 0
+        if key[0] != other_key[0] and not self._genders_ok([(key[0], a, b), (other_key[0], b, a)]):
+            return 0
+
+        solver._unassign(key)
+        solver._unassign(other_key)
+        solver._assign(key, b)
+        solver._assign(other_key, a)
+        self._apply(changes)
+        return -delta
+
+    def run(self, seconds):
+        """
+        Improve until `seconds` pass or a long run of tries finds nothing.
+        Returns {seconds, tries, moves, swaps, objective_before,
+        objective_after, improvement (fraction), spread_before, spread_after}.
+        """
+        started = time.perf_counter()
+        before, spread_before = self.objective(), self.spread()
+        assigned = [key for key, manager_id in self.solver.assignment.items() if manager_id is not None]
+        tries = moves = swaps = stale = 0
+        patience = max(500, 50 * len(assigned))
+        while assigned and stale < patience and time.perf_counter() - started < seconds:
+            key = self.rng.choice(assigned)
+            tries += 1
+            if self.rng.random() < 0.5:
+                gained = self._try_move(key)
+                moves += bool(gained)
+            else:
+                gained = self._try_swap(key, assigned)
+                swaps += bool(gained)
+            stale = 0 if gained else stale + 1
+
+        after = self.objective()
+        return {
+            "seconds": time.perf_counter() - started,
+            "tries": tries,
+            "moves": moves,
+            "swaps": swaps,
+            "objective_before": before,
+            "objective_after": after,
+            "improvement": (before - after) / before if before > self.EPSILON else 0.0,
+            "spread_before": spread_before,
+            "spread_after": self.spread(),
+        }
+
+
+def format_balance_report(report):
+    """One-line summary of a FairnessOptimizer report."""
+    return (
+        f"fairness {report['objective_before']:.1f} -> {report['objective_after']:.1f} "
+        f"({report['improvement']:.0%} better, {report['moves']} moves, {report['swaps']} swaps, "
+        f"{report['tries']} tries in {report['seconds']:.2f}s)"
+    )
+
+
+# ------------------ MULTI-WEEK HORIZON ------------------
+
+def week_start_of(day):
+    """The Monday on or before `day`."""
+    day = as_date(day)
+    return day - timedelta(days=day.weekday())
+
+
+@instrumented_class
+class HorizonScheduler:
+    """
+    Schedules calendar weeks: the weekly template plus each week's date overrides.
+    Weeks with the same overrides are solved once.
+    """
+
+    def __init__(self, managers, settings, overrides=None, rules=None, schedule_cache=None):
+        self.managers = {m.id: m for m in map(as_manager, managers)}
+        self.solver = ScheduleSolver(self.managers.values(), settings, rules)
+        self.overrides = overrides if overrides is not None else AvailabilityOverrides()
+        self.schedule_cache = schedule_cache  # optional ScheduleCache for the template week
+        self.cache = {}   # frozenset of (id, day, window) -> schedule
+        self.template = None
+
+    # ---------- edits (same API as ScheduleSolver) ----------
+
+    def update_manager(self, manager):
+        manager = as_manager(manager)
+        self.managers[manager.id] = manager
+        self._changed("update_manager", manager)
+
+    def remove_manager(self, manager_id):
+        self.managers.pop(manager_id, None)
+        self._changed("remove_manager", manager_id)
+
+    def update_shift(self, key, window):
+        self._changed("update_shift", key, window)
+
+    def update_settings(self, settings):
+        self._changed("update_settings", settings)
+
+    def update_overrides(self, overrides):
+        """Swap in new overrides; cached weeks whose exceptions did not change stay valid."""
+        self.overrides = overrides
+
+    # ---------- scheduling ----------
+
+    def week_schedule(self, week_start):
+        """
+        { (day, shift_type): manager_id or None } for the week starting on
+        that Monday; a new dict each call, so callers may edit it.
+        """
+        week = {
+            manager_id: days
+            for manager_id, days in self.overrides.week(week_start).items()
+            if manager_id in self.managers
+        }
+        key = frozenset(
+            (manager_id, day, window)
+            for manager_id, days in week.items()
+            for day, window in days.items()
+        )
+        schedule = self.cache.get(key)
+        if schedule is not None:
+            return dict(schedule)
+
+        if self.template is None:
+            self.template = self.solver.solve(self.schedule_cache)
+        if not week:
+            schedule = self.template
+        else:
+            saved = self.solver.assignment_state()
+            for manager_id, days in week.items():
+                manager = self.managers[manager_id].copy()
+                for day, (start, end) in days.items():
+                    manager.set_window(day, start, end)
+                self.solver.update_manager(manager)
+            schedule = self.solver.schedule()
+            # Put back the template managers (availability and candidates), then the template assignment
+            for manager_id in week:
+                self.solver.update_manager(self.managers[manager_id])
+            self.solver.restore_assignment(saved)
+        self.cache[key] = schedule
+        return dict(schedule)
+
+    def schedule(self, start, weeks):
+        """[(week_start, schedule), ...] for `weeks` weeks from the Monday on or before `start`."""
+        first = week_start_of(start)
+        return [
+            (first + timedelta(weeks=n), self.week_schedule(first + timedelta(weeks=n)))
+            for n in range(weeks)
+        ]
+
+    def _changed(self, action, *args):
+        getattr(self.solver, action)(*args)
+        self.cache.clear()
+        self.template = None
@@ -0,0 +1,1208 @@
+"""
+Excel and SQLite storage for managers, shift settings and date overrides,
+with the write journal, the roster snapshot and the manager repository.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import sys
+import threading
+from array import array
+from itertools import accumulate
+
+from openpyxl import Workbook
+from openpyxl.styles import Font, PatternFill, Alignment
+
+from scheduler_base import (
+    DAY_INDEX, DAYS, GENDER_TABLE, HOURS_PER_DAY, INSTRUMENTATION, JOURNAL_COMPACT_EVERY, JOURNAL_SUFFIX,
+    MANAGER_HEADERS, MANAGERS_EXCEL_FILENAME, MANAGERS_SHEET_NAME, META_SHEET_NAME, OVERRIDE_HEADERS,
+    OVERRIDES_SHEET_NAME, ROLE_TABLE, SHIFT_SETTINGS_EXCEL_FILENAME, SHIFT_SETTINGS_HEADERS,
+    SHIFT_SETTINGS_SHEET_NAME, SNAPSHOT_SUFFIX, SQLITE_FILENAME, STORAGE_BACKEND, TIMES_TYPECODE,
+    AvailabilityOverrides, Manager, Roster, as_manager, file_size, get_file_path, instrumented,
+    instrumented_class, manager_mask, minutes_span, normalize_time, parse_time, read_workbook, time_code,
+    window_mask,
+)
+
+
+# ------------------ MANAGERS EXCEL HELPERS ------------------
+
+def has_sheet(path, sheet_name):
+    wb = read_workbook(path, read_only=True)
+    try:
+        return sheet_name in wb.sheetnames
+    finally:
+        wb.close()
+
+
+@instrumented
+def create_managers_excel_if_missing(path=None):
+    """Create managers.xlsx with Managers sheet if needed."""
+    path = path or get_file_path(MANAGERS_EXCEL_FILENAME)
+    if os.path.exists(path):
+        # If file exists, make sure sheet exists too (read-only mode only reads the sheet list)
+        if has_sheet(path, MANAGERS_SHEET_NAME):
+            return
+        wb = read_workbook(path)
+        ws = wb.create_sheet(title=MANAGERS_SHEET_NAME)
+    else:
+        wb = Workbook()
+        ws = wb.active
+        ws.title = MANAGERS_SHEET_NAME
+
+    # Header row
+    headers = MANAGER_HEADERS
+    ws.append(headers)
+
+    # Style header
+    header_font = Font(bold=True)
+    header_fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
+    header_alignment = Alignment(horizontal="center", vertical="center")
+
+    for col_idx, header in enumerate(headers, start=1):
+        cell = ws.cell(row=1, column=col_idx)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+
+        if header in ("ID", "Role", "Gender"):
+            ws.column_dimensions[cell.column_letter].width = 10
+        elif "start" in header or "end" in header:
+            ws.column_dimensions[cell.column_letter].width = 12
+        else:
+            ws.column_dimensions[cell.column_letter].width = 25
+
+    save_workbook(wb, path)
+    wb.close()
+
+
+def managers_from_rows(rows):
+    """
+    Manager records from Managers sheet value rows (header excluded),
+    numbered from worksheet row 2; blank rows are skipped.
+    """
+    width = len(MANAGER_HEADERS)
+    for row, values in enumerate(rows, start=2):
+        if all(v is None for v in values):
+            continue
+        if len(values) < width:
+            values = values + (None,) * (width - len(values))
+
+        manager = Manager(
+            id=values[0],
+            name=values[1] or "",
+            role=values[2] or "",
+            gender=values[3] or "",
+            row_index=row,
+        )
+        manager.times = array(TIMES_TYPECODE, [time_code(v) for v in values[4:width]])
+        yield manager
+
+
+def iter_managers(path=None):
+    """
+    Stream managers from managers.xlsx one record at a time.
+    Uses openpyxl read-only mode, so memory stays flat on big rosters.
+    Yields Manager records; blank rows are skipped.
+    """
+    path = path or get_file_path(MANAGERS_EXCEL_FILENAME)
+    wb = read_workbook(path, read_only=True)
+    try:
+        ws = wb[MANAGERS_SHEET_NAME]
+        yield from managers_from_rows(ws.iter_rows(min_row=2, max_col=len(MANAGER_HEADERS), values_only=True))
+    finally:
+        wb.close()
+
+
+@instrumented
+def load_all_managers(path=None):
+    """Load all managers from managers.xlsx as Manager records."""
+    return list(iter_managers(path))
+
+
+def write_manager_row(ws, row_index, manager_data):
+    """
+    Fill one manager row of an open Managers worksheet.
+    Assigns .value directly: ws.cell(..., value=None) would leave an old
+    hour in place when a day is switched to OFF.
+    """
+    manager_data = as_manager(manager_data)
+    ws.cell(row=row_index, column=1).value = manager_data.id
+    ws.cell(row=row_index, column=2).value = manager_data.name
+    ws.cell(row=row_index, column=3).value = manager_data.role
+    ws.cell(row=row_index, column=4).value = manager_data.gender
+
+    col = 5
+    for start_val, end_val in manager_data.windows():
+        ws.cell(row=row_index, column=col).value = start_val
+        ws.cell(row=row_index, column=col + 1).value = end_val
+        col += 2
+
+
+@instrumented
+def write_manager_to_excel(row_index, manager_data):
+    """Write/overwrite a single manager row in managers.xlsx."""
+    path = get_file_path(MANAGERS_EXCEL_FILENAME)
+    wb = read_workbook(path)
+    ws = wb[MANAGERS_SHEET_NAME]
+
+    if row_index is None:
+        row_index = ws.max_row + 1
+
+    write_manager_row(ws, row_index, manager_data)
+
+    save_workbook(wb, path)
+    wb.close()
+
+
+@instrumented
+def delete_manager_row_from_excel(row_index):
+    """Delete a manager row from managers.xlsx."""
+    path = get_file_path(MANAGERS_EXCEL_FILENAME)
+    wb = read_workbook(path)
+    ws = wb[MANAGERS_SHEET_NAME]
+    ws.delete_rows(row_index, 1)
+    save_workbook(wb, path)
+    wb.close()
+
+
+@instrumented
+def read_meta(path=None):
+    """Key/value pairs from the hidden Meta sheet ({} if there is none)."""
+    path = path or get_file_path(MANAGERS_EXCEL_FILENAME)
+    wb = read_workbook(path, read_only=True)
+    try:
+        return workbook_meta(wb)
+    finally:
+        wb.close()
+
+
+def workbook_meta(wb):
+    """read_meta() for a workbook that is already open."""
+    if META_SHEET_NAME not in wb.sheetnames:
+        return {}
+    return {
+        key: value
+        for key, value in wb[META_SHEET_NAME].iter_rows(max_col=2, values_only=True)
+        if key is not None
+    }
+
+
+def write_meta(wb, values):
+    """Replace the Meta sheet of an open workbook with `values`."""
+    if META_SHEET_NAME in wb.sheetnames:
+        ws = wb[META_SHEET_NAME]
+        ws.delete_rows(1, ws.max_row)
+    else:
+        ws = wb.create_sheet(title=META_SHEET_NAME)
+        ws.sheet_state = "hidden"
+    for key, value in values.items():
+        ws.append([key, value])
+
+
+def get_next_manager_id(managers):
+    """Simple incremental numeric ID."""
+    max_id = 0
+    for m in managers:
+        try:
+            mid = int(m["id"])
+            if mid > max_id:
+                max_id = mid
+        except (TypeError, ValueError):
+            continue
+    return max_id + 1
+
+
+# ------------------ SHIFT SETTINGS EXCEL HELPERS ------------------
+
+@instrumented
+def create_shift_settings_excel_if_missing(path=None):
+    """Create shift_settings.xlsx with ShiftSettings sheet if needed."""
+    path = path or get_file_path(SHIFT_SETTINGS_EXCEL_FILENAME)
+    if os.path.exists(path):
+        if has_sheet(path, SHIFT_SETTINGS_SHEET_NAME):
+            return
+        wb = read_workbook(path)
+        ws = wb.create_sheet(title=SHIFT_SETTINGS_SHEET_NAME)
+    else:
+        wb = Workbook()
+        ws = wb.active
+        ws.title = SHIFT_SETTINGS_SHEET_NAME
+
+    # Header row: Day, ShiftType, StartHour, EndHour
+    headers = SHIFT_SETTINGS_HEADERS
+    ws.append(headers)
+
+    header_font = Font(bold=True)
+    header_fill = PatternFill(start_color="CCCCFF", end_color="CCCCFF", fill_type="solid")
+    header_alignment = Alignment(horizontal="center", vertical="center")
+
+    for col_idx, header in enumerate(headers, start=1):
+        cell = ws.cell(row=1, column=col_idx)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+        ws.column_dimensions[cell.column_letter].width = 14
+
+    save_workbook(wb, path)
+    wb.close()
+
+
+def iter_shift_settings(path):
+    """Stream (day, shift_type, start_hour, end_hour) rows in read-only mode."""
+    wb = read_workbook(path, read_only=True)
+    try:
+        ws = wb[SHIFT_SETTINGS_SHEET_NAME]
+        for values in ws.iter_rows(min_row=2, max_col=len(SHIFT_SETTINGS_HEADERS), values_only=True):
+            if len(values) < 4:
+                values = values + (None,) * (4 - len(values))
+            day, shift_type, start_hour, end_hour = values
+            if not day or not shift_type:
+                continue
+            yield day, shift_type, normalize_time(start_hour), normalize_time(end_hour)
+    finally:
+        wb.close()
+
+
+@instrumented
+def load_all_shift_settings(path=None):
+    """
+    Load all shift settings into dict:
+    { (day, shift_type): (start_hour, end_hour) }
+    """
+    if path is None:
+        create_shift_settings_excel_if_missing()
+        path = get_file_path(SHIFT_SETTINGS_EXCEL_FILENAME)
+
+    return {
+        (day, shift_type): (start_hour, end_hour)
+        for day, shift_type, start_hour, end_hour in iter_shift_settings(path)
+    }
+
+
+@instrumented
+def write_all_shift_settings(settings, path=None):
+    """
+    Overwrite all shift settings with given dict:
+    settings[(day, shift_type)] = (start_hour, end_hour)
+    """
+    path = path or get_file_path(SHIFT_SETTINGS_EXCEL_FILENAME)
+    wb = read_workbook(path)
+    ws = wb[SHIFT_SETTINGS_SHEET_NAME]
+
+    # Clear existing rows except header
+    if ws.max_row > 1:
+        ws.delete_rows(2, ws.max_row - 1)
+
+    # Write new data
+    for (day, shift_type), (start_hour, end_hour) in settings.items():
+        row = ws.max_row + 1
+        ws.cell(row=row, column=1, value=day)
+        ws.cell(row=row, column=2, value=shift_type)
+        ws.cell(row=row, column=3, value=start_hour)
+        ws.cell(row=row, column=4, value=end_hour)
+
+    save_workbook(wb, path)
+    wb.close()
+
+
+@instrumented
+def write_shift_settings_delta(changed, removed, path=None):
+    """Overwrite or append the `changed` rows of shift_settings.xlsx and drop `removed`."""
+    path = path or get_file_path(SHIFT_SETTINGS_EXCEL_FILENAME)
+    wb = read_workbook(path)
+    ws = wb[SHIFT_SETTINGS_SHEET_NAME]
+    width = len(SHIFT_SETTINGS_HEADERS)
+
+    rows = {}
+    for row in range(2, ws.max_row + 1):
+        key = (ws.cell(row=row, column=1).value, ws.cell(row=row, column=2).value)
+        if key[0] and key[1]:
+            rows[key] = row
+    keys_by_row = {row: key for key, row in rows.items()}
+    last = ws.max_row
+
+    for key in removed:
+        row = rows.pop(key, None)
+        if row is None:
+            continue
+        del keys_by_row[row]
+        if row != last:
+            for col in range(1, width + 1):
+                ws.cell(row=row, column=col).value = ws.cell(row=last, column=col).value
+            moved = keys_by_row.pop(last, None)
+            if moved is not None:
+                rows[moved] = row
+                keys_by_row[row] = moved
+        for col in range(1, width + 1):
+            ws.cell(row=last, column=col).value = None
+        last -= 1
+
+    for (day, shift_type), (start_hour, end_hour) in changed.items():
+        row = rows.get((day, shift_type))
+        if row is None:
+            last += 1
+            row = rows[(day, shift_type)] = last
+            ws.cell(row=row, column=1).value = day
+            ws.cell(row=row, column=2).value = shift_type
+        ws.cell(row=row, column=3).value = start_hour
+        ws.cell(row=row, column=4).value = end_hour
+
+    save_workbook(wb, path)
+    wb.close()
+
+
+# ------------------ JOURNAL ------------------
+
+@instrumented
+def save_workbook(wb, path):
+    """
+    Crash-safe save: write a temp file next to `path`, fsync it, then
+    rename it over the original so readers see the old or the new file,
+    never a half-written one.
+    """
+    tmp_path = path + ".tmp"
+    wb.save(tmp_path)
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if INSTRUMENTATION.enabled:
+        INSTRUMENTATION.count_bytes(written=file_size(path))
+
+
+def manager_to_record(manager):
+    """JSON-friendly copy of a manager dict (row_index is not persisted)."""
+    return {
+        "id": manager["id"],
+        "name": manager["name"],
+        "role": manager["role"],
+        "gender": manager["gender"],
+        "availability": {day: list(window) for day, window in manager["availability"].items()}
+    }
+
+
+def manager_from_record(record, row_index=None):
+    return Manager(
+        id=record["id"],
+        name=record["name"],
+        role=record["role"],
+        gender=record["gender"],
+        availability={day: tuple(window) for day, window in record["availability"].items()},
+        row_index=row_index,
+    )
+
+
+@instrumented_class
+class Journal:
+    """Append-only, fsync'd JSON-lines log of storage edits; a torn last line is cut off."""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = len(self._recover())
+
+    def _recover(self):
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        good_bytes = 0
+        if INSTRUMENTATION.enabled:
+            INSTRUMENTATION.count_bytes(read=file_size(self.path))
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                good_bytes += len(line)
+        if good_bytes < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good_bytes)
+        return records
+
+    def read(self):
+        if not self.count:
+            return []
+        if INSTRUMENTATION.enabled:
+            INSTRUMENTATION.count_bytes(read=file_size(self.path))
+        with open(self.path, "rb") as f:
+            return [json.loads(line) for line in f]
+
+    def append(self, records):
+        if not records:
+            return
+        data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        with open(self.path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.count += len(records)
+        if INSTRUMENTATION.enabled:
+            INSTRUMENTATION.count_bytes(written=len(data))
+
+    def clear(self):
+        """Drop all records once they are safely in the workbook."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.count = 0
+
+
+# ------------------ ROSTER SNAPSHOT ------------------
+
+# <managers.xlsx>.snapshot: a header, a small JSON block (next ID, role and
+# gender tables), then the roster column by column as little-endian
+# arrays: ids, worksheet rows, role codes, gender codes, name lengths,
+# the names as one UTF-8 string, and the times of every manager.
+SNAPSHOT_MAGIC = b"SCHEDSNP"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<8sHqqqI32s")  # magic, version, mtime_ns, size, count, meta bytes, digest
+
+
+def file_digest(path):
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _little_endian(values):
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+@instrumented
+def write_snapshot(workbook_path, managers, next_id=None):
+    """
+    Save the workbook's managers (no journal) next to it, stamped with
+    the workbook's size, mtime and hash. Skipped if an ID is not a whole
+    number; a failed write only costs the next startup a full parse.
+    """
+    managers = list(managers)
+    if not all(type(m.id) is int for m in managers):
+        return
+    names = [m.name if isinstance(m.name, str) else str(m.name) for m in managers]
+    times = array(TIMES_TYPECODE)
+    for m in managers:
+        times.extend(m.times)
+    meta = json.dumps({
+        "next_id": next_id,
+        "roles": ROLE_TABLE.values,
+        "genders": GENDER_TABLE.values,
+        "width": 2 * len(DAYS),
+    }).encode("utf-8")
+    blocks = [
+        meta,
+        _little_endian(array("q", [m.id for m in managers])).tobytes(),
+        _little_endian(array("q", [m.row_index or 0 for m in managers])).tobytes(),
+        bytes(m.role_code for m in managers),
+        bytes(m.gender_code for m in managers),
+        _little_endian(array("I", map(len, names))).tobytes(),
+        "".join(names).encode("utf-8"),
+        _little_endian(times).tobytes(),
+    ]
+
+    path = workbook_path + SNAPSHOT_SUFFIX
+    tmp_path = path + ".tmp"
+    try:
+        stat = os.stat(workbook_path)
+        header = SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, stat.st_mtime_ns, stat.st_size,
+            len(managers), len(meta), file_digest(workbook_path),
+        )
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            for block in blocks[:-2]:
+                f.write(block)
+            # The names block has no fixed size: prefix it with its length
+            f.write(struct.pack("<q", len(blocks[-2])))
+            f.write(blocks[-2])
+            f.write(blocks[-1])
+        os.replace(tmp_path, path)
+    except OSError:
+        return
+    if INSTRUMENTATION.enabled:
+        INSTRUMENTATION.count_bytes(written=file_size(path))
+
+
+def snapshot_header(workbook_path, data=None):
+    """(count, meta bytes) of the workbook's snapshot if it is fresh, else None."""
+    try:
+        stat = os.stat(workbook_path)
+        if data is None:
+            with open(workbook_path + SNAPSHOT_SUFFIX, "rb") as f:
+                data = f.read(SNAPSHOT_HEADER.size)
+    except OSError:
+        return None
+    if len(data) < SNAPSHOT_HEADER.size:
+        return None
+    magic, version, mtime_ns, size, count, meta_size, digest = SNAPSHOT_HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or size != stat.st_size:
+        return None
+    if mtime_ns != stat.st_mtime_ns and digest != file_digest(workbook_path):
+        return None
+    return count, meta_size
+
+
+@instrumented
+def read_snapshot(workbook_path):
+    """(managers, next_id) from the workbook's snapshot, or None unless it is fresh (see snapshot_header)."""
+    try:
+        with open(workbook_path + SNAPSHOT_SUFFIX, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    header = snapshot_header(workbook_path, data)
+    if header is None:
+        return None
+    count, meta_size = header
+    if INSTRUMENTATION.enabled:
+        INSTRUMENTATION.count_bytes(read=len(data))
+
+    view = memoryview(data)
+    pos = SNAPSHOT_HEADER.size
+
+    def take(nbytes):
+        nonlocal pos
+        block = view[pos:pos + nbytes]
+        pos += nbytes
+        return block
+
+    def take_array(typecode, n):
+        values = array(typecode)
+        values.frombytes(take(n * values.itemsize))
+        return _little_endian(values)
+
+    try:
+        meta = json.loads(bytes(take(meta_size)))
+        width = meta["width"]
+        if width != 2 * len(DAYS):
+            return None
+        ids = take_array("q", count)
+        rows = take_array("q", count)
+        # Codes index the tables saved with the snapshot; map them onto this process's tables
+        role_map = bytes(ROLE_TABLE.code(v) for v in meta["roles"]).ljust(256, b"\0")
+        gender_map = bytes(GENDER_TABLE.code(v) for v in meta["genders"]).ljust(256, b"\0")
+        role_codes = bytes(take(count)).translate(role_map)
+        gender_codes = bytes(take(count)).translate(gender_map)
+        name_lengths = take_array("I", count)
+        (names_size,) = struct.unpack("<q", take(8))
+        names = str(take(names_size), "utf-8")
+        times = take_array(TIMES_TYPECODE, count * width)
+    except (ValueError, KeyError, struct.error):
+        return None
+    if len(ids) != count or len(times) != count * width:
+        return None
+
+    managers = []
+    ends = accumulate(name_lengths)
+    start = 0
+    for i, end in enumerate(ends):
+        manager = Manager.__new__(Manager)
+        manager.row_index = rows[i] or None
+        manager.id = ids[i]
+        manager.name = names[start:end]
+        manager.role_code = role_codes[i]
+        manager.gender_code = gender_codes[i]
+        manager.times = times[i * width:(i + 1) * width]
+        managers.append(manager)
+        start = end
+    return managers, meta["next_id"]
+
+
+# ------------------ STORAGE BACKENDS ------------------
+
+# Every backend offers the same methods:
+#   ensure_exists(), load_managers(), load_next_manager_id(),
+#   apply_manager_changes(changed, deleted_ids, next_id=None),
+#   replace_managers(managers, next_id=None), load_shift_settings(),
+#   save_shift_settings(settings), update_shift_settings(changed, removed),
+#   load_overrides(), save_overrides(overrides),
+#   find_available(day, start, end, role=None), close()
+
+@instrumented_class
+class ExcelStorage:
+    """
+    managers.xlsx + shift_settings.xlsx (the original format).
+
+    Edits go to a journal next to each workbook and are folded in by compact().
+    Saves of managers.xlsx also write its binary snapshot, which loads read while fresh.
+    """
+
+    name = "Excel"
+
+    def __init__(self, managers_path=None, shift_settings_path=None):
+        self.managers_path = managers_path or get_file_path(MANAGERS_EXCEL_FILENAME)
+        self.shift_settings_path = shift_settings_path or get_file_path(SHIFT_SETTINGS_EXCEL_FILENAME)
+        self.managers_journal = Journal(self.managers_path + JOURNAL_SUFFIX)
+        self.shift_settings_journal = Journal(self.shift_settings_path + JOURNAL_SUFFIX)
+        self.rows = None   # manager ID -> worksheet row, built on first load
+        self.row_ids = {}  # worksheet row -> manager ID
+        self.last_row = 1
+        self.meta = None   # the workbook's Meta values, when known without opening it
+
+    def ensure_exists(self):
+        # A fresh snapshot vouches for the workbook, which is slow to open when large
+        if snapshot_header(self.managers_path) is None:
+            create_managers_excel_if_missing(self.managers_path)
+        create_shift_settings_excel_if_missing(self.shift_settings_path)
+        # Fold in edits left behind by a crash
+        self.compact()
+
+    def _index_rows(self, rows):
+        self.rows = rows
+        self.row_ids = {row: manager_id for manager_id, row in rows.items()}
+        self.last_row = max(self.row_ids, default=1)
+
+    def load_managers(self):
+        snapshot = read_snapshot(self.managers_path)
+        if snapshot is not None:
+            managers, next_id = snapshot
+            self.meta = {"next_manager_id": next_id}
+        else:
+            managers = load_all_managers(self.managers_path)
+            self.meta = read_meta(self.managers_path)
+        self._index_rows({m["id"]: m["row_index"] for m in managers})
+
+        ops = self.managers_journal.read()
+        if not ops:
+            return managers
+
+        by_id = {m["id"]: m for m in managers}
+        for op in ops:
+            if op["op"] == "upsert":
+                manager_id = op["manager"]["id"]
+                by_id[manager_id] = manager_from_record(op["manager"], self.rows.get(manager_id))
+            elif op["op"] == "delete":
+                by_id.pop(op["id"], None)
+        return list(by_id.values())
+
+    def load_next_manager_id(self):
+        meta = self.meta if self.meta is not None else read_meta(self.managers_path)
+        next_id = meta.get("next_manager_id")
+        for op in self.managers_journal.read():
+            if op["op"] == "next_id":
+                next_id = op["value"]
+        return next_id
+
+    def apply_manager_changes(self, changed, deleted_ids, next_id=None):
+        """Journal changed and deleted managers; compact when the journal grows."""
+        ops = [{"op": "delete", "id": manager_id} for manager_id in deleted_ids]
+        ops.extend({"op": "upsert", "manager": manager_to_record(m)} for m in changed)
+        if next_id is not None:
+            ops.append({"op": "next_id", "value": next_id})
+        self.managers_journal.append(ops)
+
+        if self.managers_journal.count >= JOURNAL_COMPACT_EVERY:
+            self.compact()
+
+    def _delete_row(self, ws, manager_id):
+        """Move the last row into the deleted one and blank the last row."""
+        row = self.rows.pop(manager_id, None)
+        if row is None:
+            return
+        del self.row_ids[row]
+
+        last = self.last_row
+        width = len(MANAGER_HEADERS)
+        if row != last:
+            moved_id = self.row_ids.pop(last)
+            for col in range(1, width + 1):
+                ws.cell(row=row, column=col).value = ws.cell(row=last, column=col).value
+            self.rows[moved_id] = row
+            self.row_ids[row] = moved_id
+        for col in range(1, width + 1):
+            ws.cell(row=last, column=col).value = None
+
+        # Skip over blank rows the file may already contain
+        self.last_row = last - 1
+        while self.last_row > 1 and self.last_row not in self.row_ids:
+            self.last_row -= 1
+
+    def _upsert_row(self, ws, manager):
+        row = self.rows.get(manager["id"])
+        if row is None:
+            self.last_row += 1
+            row = self.last_row
+            self.rows[manager["id"]] = row
+            self.row_ids[row] = manager["id"]
+        write_manager_row(ws, row, manager)
+
+    def compact(self):
+        """Apply journalled edits to the workbooks with one atomic save each."""
+        ops = self.managers_journal.read()
+        if ops:
+            if self.rows is None:
+                self._index_rows({m["id"]: m["row_index"] for m in iter_managers(self.managers_path)})
+
+            wb = read_workbook(self.managers_path)
+            ws = wb[MANAGERS_SHEET_NAME]
+            next_id = None
+            try:
+                for op in ops:
+                    if op["op"] == "delete":
+                        self._delete_row(ws, op["id"])
+                    elif op["op"] == "upsert":
+                        self._upsert_row(ws, manager_from_record(op["manager"]))
+                    elif op["op"] == "next_id":
+                        next_id = op["value"]
+                if next_id is not None:
+                    write_meta(wb, {"next_manager_id": next_id})
+                save_workbook(wb, self.managers_path)
+                self._save_snapshot(wb, ws)
+            except Exception:
+                # The row index no longer matches the file; rebuild it next time
+                self.rows = None
+                raise
+            finally:
+                wb.close()
+            self.managers_journal.clear()
+
+        ops = self.shift_settings_journal.read()
+        if ops:
+            full, changed, removed = self._net_shift_changes(ops)
+            if full is not None:
+                write_all_shift_settings(full, self.shift_settings_path)
+            else:
+                write_shift_settings_delta(changed, removed, self.shift_settings_path)
+            self.shift_settings_journal.clear()
+
+    def replace_managers(self, managers, next_id=None):
+        """Overwrite the whole Managers sheet (and drop any journalled edits)."""
+        wb = read_workbook(self.managers_path)
+        ws = wb[MANAGERS_SHEET_NAME]
+        if ws.max_row > 1:
+            ws.delete_rows(2, ws.max_row - 1)
+
+        rows = {}
+        for row, manager in enumerate(managers, start=2):
+            write_manager_row(ws, row, manager)
+            rows[manager["id"]] = row
+        self._index_rows(rows)
+
+        if next_id is not None:
+            write_meta(wb, {"next_manager_id": next_id})
+
+        save_workbook(wb, self.managers_path)
+        self._save_snapshot(wb, ws)
+        wb.close()
+        self.managers_journal.clear()
+
+    def _save_snapshot(self, wb, ws):
+        """Snapshot the workbook just saved, from its still-open sheet."""
+        self.meta = workbook_meta(wb)
+        rows = ws.iter_rows(min_row=2, max_col=len(MANAGER_HEADERS), values_only=True)
+        write_snapshot(self.managers_path, managers_from_rows(rows), self.meta.get("next_manager_id"))
+
+    @staticmethod
+    def _net_shift_changes(ops):
+        """Collapse journalled shift-setting ops into (full, changed, removed)."""
+        full = None
+        changed = {}
+        removed = set()
+        for op in ops:
+            if op["op"] == "settings":
+                full = {(day, shift_type): (start, end) for day, shift_type, start, end in op["rows"]}
+                changed = {}
+                removed = set()
+                continue
+            for day, shift_type, start, end in op["set"]:
+                changed[(day, shift_type)] = (start, end)
+                removed.discard((day, shift_type))
+            for day, shift_type in op["remove"]:
+                removed.add((day, shift_type))
+                changed.pop((day, shift_type), None)
+
+        if full is not None:
+            for key in removed:
+                full.pop(key, None)
+            full.update(changed)
+        return full, changed, removed
+
+    def load_shift_settings(self):
+        ops = self.shift_settings_journal.read()
+        full, changed, removed = self._net_shift_changes(ops)
+        if full is not None:
+            return full
+        settings = load_all_shift_settings(self.shift_settings_path)
+        for key in removed:
+            settings.pop(key, None)
+        settings.update(changed)
+        return settings
+
+    def _append_shift_op(self, op):
+        self.shift_settings_journal.append([op])
+        if self.shift_settings_journal.count >= JOURNAL_COMPACT_EVERY:
+            self.compact()
+
+    def save_shift_settings(self, settings):
+        rows = [[day, shift_type, start, end] for (day, shift_type), (start, end) in settings.items()]
+        self._append_shift_op({"op": "settings", "rows": rows})
+
+    def update_shift_settings(self, changed, removed):
+        """Journal only the rows that changed; compaction writes them as a delta."""
+        self._append_shift_op({
+            "op": "shift_delta",
+            "set": [[day, shift_type, start, end] for (day, shift_type), (start, end) in changed.items()],
+            "remove": [list(key) for key in removed],
+        })
+
+    def load_overrides(self):
+        wb = read_workbook(self.managers_path, read_only=True)
+        try:
+            if OVERRIDES_SHEET_NAME not in wb.sheetnames:
+                return AvailabilityOverrides()
+            entries = []
+            rows = wb[OVERRIDES_SHEET_NAME].iter_rows(min_row=2, max_col=len(OVERRIDE_HEADERS), values_only=True)
+            for values in rows:
+                values = tuple(values) + (None,) * (len(OVERRIDE_HEADERS) - len(values))
+                manager_id, first, last, start, end, note = values
+                if manager_id is None or first is None:
+                    continue
+                entries.append((manager_id, first, last or first, (start, end), note))
+            return AvailabilityOverrides(entries)
+        finally:
+            wb.close()
+
+    def save_overrides(self, overrides):
+        """Rewrite the Overrides sheet of managers.xlsx."""
+        wb = read_workbook(self.managers_path)
+        if OVERRIDES_SHEET_NAME in wb.sheetnames:
+            del wb[OVERRIDES_SHEET_NAME]
+        ws = wb.create_sheet(OVERRIDES_SHEET_NAME)
+        ws.append(OVERRIDE_HEADERS)
+        for cell in ws[1]:
+            cell.font = Font(bold=True)
+        for manager_id, first, last, (start, end), note in overrides.entries():
+            ws.append([manager_id, first, last, start, end, note])
+        for col in ("B", "C"):
+            ws.column_dimensions[col].width = 12
+        ws.column_dimensions["F"].width = 30
+        save_workbook(wb, self.managers_path)
+        self._save_snapshot(wb, wb[MANAGERS_SHEET_NAME])
+        wb.close()
+
+    def find_available(self, day, start, end, role=None):
+        """IDs of managers free for the whole window; scans every row."""
+        required = window_mask(day, start, end)
+        return [
+            m["id"] for m in self.load_managers()
+            if (role is None or m["role"] == role)
+            and manager_mask(m) & required == required
+        ]
+
+    def close(self):
+        self.compact()
+
+
+@instrumented_class
+class SQLiteStorage:
+    """
+    Single SQLite file with indexed managers, availability and shift settings.
+    Times are stored as text; from_hour/to_hour (REAL) back find_available().
+    """
+
+    name = "SQLite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS managers (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            role TEXT NOT NULL,
+            gender TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS managers_role ON managers (role);
+
+        CREATE TABLE IF NOT EXISTS availability (
+            manager_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            start_hour TEXT,
+            end_hour TEXT,
+            from_hour REAL NOT NULL,
+            to_hour REAL NOT NULL,
+            PRIMARY KEY (manager_id, day)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS availability_window ON availability (day, from_hour, to_hour);
+
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value
+        );
+
+        CREATE TABLE IF NOT EXISTS shift_settings (
+            day TEXT NOT NULL,
+            shift_type TEXT NOT NULL,
+            start_hour TEXT,
+            end_hour TEXT,
+            PRIMARY KEY (day, shift_type)
+        );
+
+        CREATE TABLE IF NOT EXISTS overrides (
+            manager_id INTEGER NOT NULL,
+            first_day TEXT NOT NULL,
+            last_day TEXT NOT NULL,
+            start_hour TEXT,
+            end_hour TEXT,
+            note TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (manager_id, first_day)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path=None):
+        self.path = path or get_file_path(SQLITE_FILENAME)
+        # Opened on the Tk thread but only ever used from the app's worker thread
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def ensure_exists(self):
+        pass  # the schema is created on connect
+
+    def load_managers(self):
+        managers = {}
+        for manager_id, name, role, gender in self.conn.execute(
+            "SELECT id, name, role, gender FROM managers ORDER BY id"
+        ):
+            managers[manager_id] = Manager(id=manager_id, name=name, role=role, gender=gender)
+        for manager_id, day, start_hour, end_hour in self.conn.execute(
+            "SELECT manager_id, day, start_hour, end_hour FROM availability"
+        ):
+            managers[manager_id].set_window(day, start_hour, end_hour)
+        return list(managers.values())
+
+    def load_next_manager_id(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'next_manager_id'").fetchone()
+        return None if row is None else row[0]
+
+    def _save_next_id(self, next_id):
+        if next_id is not None:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('next_manager_id', ?)", (next_id,)
+            )
+
+    def _insert_managers(self, managers):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO managers (id, name, role, gender) VALUES (?, ?, ?, ?)",
+            [(m["id"], m["name"], m["role"], m["gender"]) for m in managers]
+        )
+        rows = []
+        for m in managers:
+            m = as_manager(m)
+            for day, window, minutes in zip(DAYS, m.windows(), m.minute_windows()):
+                span = minutes_span(*minutes)
+                if span is None:
+                    continue
+                rows.append((m.id, day) + window + (span[0] / 60, span[1] / 60))
+        self.conn.executemany("INSERT INTO availability VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def apply_manager_changes(self, changed, deleted_ids, next_id=None):
+        """Upsert changed managers and delete removed ones in one transaction."""
+        gone = [(m["id"],) for m in changed] + [(i,) for i in deleted_ids]
+        with self.conn:
+            self.conn.executemany("DELETE FROM availability WHERE manager_id = ?", gone)
+            self.conn.executemany("DELETE FROM managers WHERE id = ?", [(i,) for i in deleted_ids])
+            self._insert_managers(changed)
+            self._save_next_id(next_id)
+
+    def replace_managers(self, managers, next_id=None):
+        with self.conn:
+            self.conn.execute("DELETE FROM availability")
+            self.conn.execute("DELETE FROM managers")
+            self._insert_managers(managers)
+            self._save_next_id(next_id)
+
+    def load_shift_settings(self):
+        return {
+            (day, shift_type): (normalize_time(start_hour), normalize_time(end_hour))
+            for day, shift_type, start_hour, end_hour in self.conn.execute(
+                "SELECT day, shift_type, start_hour, end_hour FROM shift_settings ORDER BY rowid"
+            )
+        }
+
+    def save_shift_settings(self, settings):
+        with self.conn:
+            self.conn.execute("DELETE FROM shift_settings")
+            self.conn.executemany(
+                "INSERT INTO shift_settings VALUES (?, ?, ?, ?)",
+                [(day, shift_type, start, end) for (day, shift_type), (start, end) in settings.items()]
+            )
+
+    def update_shift_settings(self, changed, removed):
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM shift_settings WHERE day = ? AND shift_type = ?", list(removed)
+            )
+            # Upsert in place so rows keep their position (rowid)
+            self.conn.executemany(
+                "INSERT INTO shift_settings VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (day, shift_type) DO UPDATE"
+                " SET start_hour = excluded.start_hour, end_hour = excluded.end_hour",
+                [(day, shift_type, start, end) for (day, shift_type), (start, end) in changed.items()]
+            )
+
+    def load_overrides(self):
+        return AvailabilityOverrides(
+            (manager_id, first, last, (start, end), note)
+            for manager_id, first, last, start, end, note in self.conn.execute(
+                "SELECT manager_id, first_day, last_day, start_hour, end_hour, note FROM overrides"
+            )
+        )
+
+    def save_overrides(self, overrides):
+        with self.conn:
+            self.conn.execute("DELETE FROM overrides")
+            self.conn.executemany(
+                "INSERT INTO overrides VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (manager_id, first.isoformat(), last.isoformat(), start, end, note)
+                    for manager_id, first, last, (start, end), note in overrides.entries()
+                ]
+            )
+
+    def find_available(self, day, start, end, role=None):
+        """IDs of managers free for the whole window, answered from the index."""
+        span = minutes_span(parse_time(start), parse_time(end))
+        if day not in DAY_INDEX or span is None:
+            return []
+        first, last = span[0] / 60, span[1] / 60
+        # An overnight window from the day before can cover the early hours
+        previous = DAYS[DAY_INDEX[day] - 1]
+        sql = (
+            "SELECT DISTINCT a.manager_id FROM availability a JOIN managers m ON m.id = a.manager_id"
+            " WHERE (a.day = ? AND a.from_hour <= ? AND a.to_hour >= ?"
+            " OR a.day = ? AND a.from_hour <= ? AND a.to_hour >= ?)"
+        )
+        params = [day, first, last, previous, first + HOURS_PER_DAY, last + HOURS_PER_DAY]
+        if role is not None:
+            sql += " AND m.role = ?"
+            params.append(role)
+        return [row[0] for row in self.conn.execute(sql, params)]
+
+    def close(self):
+        self.conn.close()
+
+
+def open_storage(backend=None):
+    """Storage for `backend` ("excel" or "sqlite"), defaulting to STORAGE_BACKEND."""
+    backend = (backend or STORAGE_BACKEND).lower()
+    if backend == "excel":
+        return ExcelStorage()
+    if backend == "sqlite":
+        return SQLiteStorage()
+    raise ValueError(f"Unknown storage backend: {backend!r}")
+
+
+@instrumented
+def copy_storage(source, target):
+    """Import/export: replace target's managers, shift settings and overrides with source's."""
+    target.ensure_exists()
+    managers = source.load_managers()
+    target.replace_managers(managers, next_manager_id(managers, source.load_next_manager_id()))
+    target.save_shift_settings(source.load_shift_settings())
+    target.save_overrides(source.load_overrides())
+
+
+# ------------------ MANAGER REPOSITORY ------------------
+
+def next_manager_id(managers, stored_next_id):
+    """
+    The persisted ID counter, falling back to a one-off scan for files
+    written before the counter existed (or edited by hand).
+    """
+    scanned = get_next_manager_id(managers)
+    try:
+        return max(int(stored_next_id), scanned)
+    except (TypeError, ValueError):
+        return scanned
+
+
+@instrumented_class
+class ManagerRepository:
+    """
+    In-memory managers with batched writes: flush() sends every pending change at once.
+    IDs are never reused; a lock lets flush() run on a worker thread.
+    """
+
+    def __init__(self, managers, storage, next_id=None):
+        self.storage = storage
+        self.managers = Roster(managers)
+        self.next_id = next_manager_id(managers, next_id)
+        self.dirty = set()
+        self.deleted_ids = set()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, storage):
+        return cls(storage.load_managers(), storage, storage.load_next_manager_id())
+
+    def all(self):
+        with self.lock:
+            return list(self.managers)
+
+    def get(self, manager_id):
+        return self.managers.get(manager_id)
+
+    def has_changes(self):
+        return bool(self.dirty or self.deleted_ids)
+
+    def add(self, manager_data):
+        """Store a new manager under the next free ID and return it."""
+        with self.lock:
+            manager = Manager.from_mapping(manager_data, id=self.next_id, row_index=None)
+            self.next_id += 1
+            self.managers.put(manager)
+            self.dirty.add(manager.id)
+        return manager
+
+    def update(self, manager_id, manager_data):
+        """Replace an existing manager's fields and return the new record."""
+        with self.lock:
+            old = self.managers.get(manager_id)
+            manager = Manager.from_mapping(manager_data, id=manager_id, row_index=old.row_index)
+            self.managers.put(manager)
+            self.dirty.add(manager_id)
+        return manager
+
+    def delete(self, manager_id):
+        with self.lock:
+            manager = self.managers.remove(manager_id)
+            self.dirty.discard(manager_id)
+            self.deleted_ids.add(manager_id)
+        return manager
+
+    def flush(self):
+        """Write all pending changes with a single storage call."""
+        with self.lock:
+            if not self.has_changes():
+                return
+            changed = [self.managers.get(i) for i in self.dirty]
+            deleted_ids = self.deleted_ids
+            next_id = self.next_id
+            self.dirty = set()
+            self.deleted_ids = set()
+
+        try:
+            self.storage.apply_manager_changes(changed, deleted_ids, next_id)
+        except Exception:
+            # Keep the changes pending so the next flush retries them
+            with self.lock:
+                self.dirty.update(m.id for m in changed if m.id in self.managers)
+                self.deleted_ids.update(deleted_ids)
+            raise
+
+
+# ------------------ OPEN STORE ------------------
+
+def open_store(path):
+    """
+    Storage for one store on disk: a SQLite .db file, or a folder holding
+    managers.xlsx and shift_settings.xlsx.
+    """
+    if os.path.isdir(path):
+        return ExcelStorage(
+            os.path.join(path, MANAGERS_EXCEL_FILENAME),
+            os.path.join(path, SHIFT_SETTINGS_EXCEL_FILENAME),
+        )
+    return SQLiteStorage(path)
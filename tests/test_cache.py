@@ -0,0 +1,52 @@
+import os
+
+from scheduler_core import ScheduleCache, ScheduleSolver, cached_schedule
+from tests.test_solver import RULES, make_roster, make_settings
+
+
+def test_unchanged_inputs_are_a_hit(tmp_path):
+    cache = ScheduleCache(str(tmp_path))
+    managers, settings = make_roster(30), make_settings()
+    schedule, solver = cached_schedule(managers, settings, RULES, cache)
+    assert solver.cache_status == "miss"
+
+    again, solver = cached_schedule(managers, settings, RULES, cache)
+    assert solver is None
+    assert again == schedule
+
+    solver = ScheduleSolver(managers, settings, RULES)
+    assert solver.solve(cache) == schedule
+    assert solver.cache_status == "hit"
+
+
+def test_changed_day_reuses_the_other_days(tmp_path):
+    cache = ScheduleCache(str(tmp_path))
+    managers, settings = make_roster(30), make_settings()
+    first = ScheduleSolver(managers, settings, RULES).solve(cache)
+
+    settings[("Mon", "close")] = (14, 18)
+    solver = ScheduleSolver(managers, settings, RULES)
+    schedule = solver.solve(cache)
+    assert solver.cache_status == "partial"
+    assert all(schedule[key] == first[key] for key in settings if key[0] == "Sun")
+
+
+def test_eviction_drops_the_least_recently_used(tmp_path):
+    cache = ScheduleCache(str(tmp_path), max_entries=3)
+    for n in range(3):
+        cache.put(f"k{n}", [n])
+        os.utime(os.path.join(tmp_path, f"k{n}.json"), (n, n))
+    assert cache.get("k0") == [0]  # refreshes k0, so k1 is now the oldest
+
+    cache.put("k3", [3])
+    assert cache.get("k1") is None
+    assert [cache.get(f"k{n}") for n in (0, 2, 3)] == [[0], [2], [3]]
+    assert len(os.listdir(tmp_path)) == 3
+
+
+def test_rewriting_an_entry_does_not_evict(tmp_path):
+    cache = ScheduleCache(str(tmp_path), max_entries=2)
+    cache.put("a", [1])
+    cache.put("b", [2])
+    cache.put("a", [3])
+    assert cache.get("a") == [3] and cache.get("b") == [2]
@@ -0,0 +1,51 @@
+import json
+
+import schedule_cli
+from benchmark import generate_managers_file, generate_shift_settings_file
+from scheduler_core import Manager, SQLiteStorage
+
+
+def make_stores(folder):
+    north = folder / "north"
+    north.mkdir()
+    generate_managers_file(str(north / "managers.xlsx"), 20)
+    generate_shift_settings_file(str(north / "shift_settings.xlsx"))
+
+    storage = SQLiteStorage(str(folder / "south.db"))
+    storage.replace_managers(
+        [Manager(id=1, name="Ana", role="admin", gender="F", availability={"Mon": (6, 20)})], next_id=2,
+    )
+    storage.save_shift_settings({("Mon", "open"): (7, 10), ("Tue", "close"): (15, 18)})
+    storage.close()
+
+
+def test_generate_stores_dir_in_parallel(tmp_path, capsys):
+    stores, out = tmp_path / "stores", tmp_path / "out"
+    stores.mkdir()
+    make_stores(stores)
+
+    status = schedule_cli.main(
+        ["generate", "--stores-dir", str(stores), "--out-dir", str(out), "-j", "2", "--no-cache"]
+    )
+    assert status == 0
+    assert "2/2 stores" in capsys.readouterr().err
+
+    north = json.loads((out / "north.json").read_text())
+    assert north["store"] == "north" and len(north["shifts"]) == 35
+    south = json.loads((out / "south.json").read_text())
+    assert [(row["day"], row["manager_id"]) for row in south["shifts"]] == [("Mon", 1), ("Tue", None)]
+    assert south["uncovered"] == 1
+
+
+def test_generate_reports_a_broken_store(tmp_path, capsys):
+    stores = tmp_path / "stores"
+    stores.mkdir()
+    make_stores(stores)
+    (stores / "north" / "shift_settings.xlsx").unlink()
+
+    status = schedule_cli.main(
+        ["generate", "--stores-dir", str(stores), "--out-dir", str(tmp_path / "out"), "-j", "2", "--no-cache"]
+    )
+    assert status == 1
+    assert "north: not found" in capsys.readouterr().err
+    assert (tmp_path / "out" / "south.json").exists()
@@ -0,0 +1,71 @@
+from scheduler_core import DAYS, CoverageMatrix
+from tests.test_solver import RULES, make_roster, make_settings
+
+
+def nonzero(matrix):
+    return {role: counts for role, counts in matrix.available.items() if any(counts)}
+
+
+def assert_same(matrix, fresh):
+    assert nonzero(matrix) == nonzero(fresh)
+    assert matrix.hour_shifts == fresh.hour_shifts
+    assert matrix.gaps() == fresh.gaps()
+
+
+def test_available_counts_match_the_roster():
+    managers = make_roster(30)
+    matrix = CoverageMatrix(managers, make_settings(), RULES)
+    for hour in range(0, 7 * 24, 5):
+        day, at = DAYS[hour // 24], hour % 24
+        for role, counts in matrix.available.items():
+            expected = sum(
+                1 for m in managers
+                if m["role"] == role and m["availability"][day][0] is not None
+                and m["availability"][day][0] <= at and at + 1 <= m["availability"][day][1]
+            )
+            assert counts[hour] == expected, (role, day, at)
+
+
+def test_incremental_edits_match_a_fresh_build():
+    managers = make_roster(30, seed=2)
+    settings = make_settings()
+    matrix = CoverageMatrix(managers, settings, RULES)
+
+    changed = dict(managers[0], role="area", availability=dict(managers[0]["availability"], Mon=(0, 24)))
+    managers[0] = changed
+    matrix.update_manager(changed)
+
+    added = dict(managers[1], id=99, availability={day: (18, 23) for day in DAYS})
+    managers.append(added)
+    matrix.update_manager(added)
+
+    removed = managers.pop(2)
+    matrix.remove_manager(removed["id"])
+
+    settings[("Wed", "close")] = (16, 22)
+    settings.pop(("Thu", "open"))
+    settings[("Fri", "night")] = (20, 23)
+    matrix.update_settings(settings)
+
+    assert_same(matrix, CoverageMatrix(managers, settings, RULES))
+
+
+def test_gaps_report_uncovered_hours():
+    managers = [
+        {"id": 1, "name": "A", "role": "admin", "gender": "F",
+         "availability": dict({day: (None, None) for day in DAYS}, Mon=(8, 12))},
+        {"id": 2, "name": "B", "role": "shift", "gender": "M",
+         "availability": {day: (6, 20) for day in DAYS}},
+    ]
+    settings = {("Mon", "open"): (7, 10), ("Mon", "close"): (15, 18), ("Tue", "open"): (7, 10)}
+    matrix = CoverageMatrix(managers, settings, RULES)
+
+    gaps = matrix.gaps()
+    assert [(g["day"], g["start"], g["end"], g["shifts"]) for g in gaps] == [
+        ("Mon", 7, 8, ["open"]),
+        ("Tue", 7, 10, ["open"]),
+    ]
+    assert all(g["eligible"] == 0 for g in gaps)
+
+    matrix.update_manager(dict(managers[0], availability={day: (6, 12) for day in DAYS}))
+    assert matrix.gaps() == []
@@ -0,0 +1,68 @@
+import random
+
+from scheduler_core import FAIRNESS_METRICS, FairnessOptimizer, ScheduleSolver
+from tests.test_solver import RULES, assert_hard_rules, make_roster, make_settings
+
+
+def full_objective(optimizer, load):
+    """The objective recomputed from every manager's load vector."""
+    total = 0.0
+    for role in optimizer.size:
+        loads = [load.get(m.id, [0] * len(FAIRNESS_METRICS))
+                 for m in optimizer.solver.managers.values() if m.role == role]
+        for i, weight in enumerate(optimizer.weights):
+            mean = sum(x[i] for x in loads) / len(loads)
+            total += weight * sum((x[i] - mean) ** 2 for x in loads)
+    return total
+
+
+def role_totals(solver):
+    totals = {}
+    for key, manager_id in solver.schedule().items():
+        if manager_id is not None:
+            role = solver.managers[manager_id].role
+            totals[role] = totals.get(role, 0) + solver.shift_hours[key]
+    return totals
+
+
+def test_delta_matches_a_full_recompute():
+    solver = ScheduleSolver(make_roster(40, seed=3), make_settings(), RULES)
+    solver.solve()
+    optimizer = FairnessOptimizer(solver)
+    assert abs(optimizer.objective() - full_objective(optimizer, optimizer.load)) < 1e-6
+
+    rng = random.Random(0)
+    held = [key for key, manager_id in solver.assignment.items() if manager_id is not None]
+    for _ in range(200):
+        key = rng.choice(held)
+        current = solver.assignment[key]
+        other = rng.choice([manager_id for manager_id in solver.managers if manager_id != current])
+        vector = optimizer.vectors[key]
+        changes = [(current, [-v for v in vector]), (other, vector)]
+
+        load = {manager_id: list(x) for manager_id, x in optimizer.load.items()}
+        for manager_id, change in changes:
+            x = load.setdefault(manager_id, [0] * len(FAIRNESS_METRICS))
+            for i, d in enumerate(change):
+                x[i] += d
+        expected = full_objective(optimizer, load) - full_objective(optimizer, optimizer.load)
+        assert abs(optimizer._delta(changes) - expected) < 1e-6
+
+
+def test_balance_keeps_hard_rules_and_role_totals():
+    solver = ScheduleSolver(make_roster(25, seed=4), make_settings(), RULES)
+    solver.solve()
+    filled = {key for key, manager_id in solver.schedule().items() if manager_id is not None}
+    totals = role_totals(solver)
+    genders = {day: len(solver._missing_genders(day)) for day in solver.day_shifts}
+
+    optimizer = FairnessOptimizer(solver)
+    report = optimizer.run(0.5)
+    assert report["objective_after"] <= report["objective_before"]
+    assert report["moves"] + report["swaps"] > 0
+
+    assert_hard_rules(solver)
+    assert {key for key, manager_id in solver.schedule().items() if manager_id is not None} == filled
+    assert role_totals(solver) == totals
+    assert all(len(solver._missing_genders(day)) <= genders[day] for day in genders)
+    assert abs(optimizer.objective() - full_objective(optimizer, optimizer.load)) < 1e-6
@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+
+from scheduler_core import AvailabilityOverrides, HorizonScheduler
+
+from tests.test_solver import RULES, make_roster, make_settings
+
+MONDAY = date(2024, 5, 6)
+
+
+def make_horizon(managers):
+    settings = make_settings()
+    overrides = AvailabilityOverrides()
+    busy = sorted(m["id"] for m in managers)[:6]
+    for n, manager_id in enumerate(busy):
+        week = MONDAY + timedelta(weeks=n % 3 + 1)
+        overrides.add(manager_id, week, week + timedelta(days=6), (None, None), "leave")
+    return HorizonScheduler(managers, settings, overrides, RULES)
+
+
+def test_override_weeks_do_not_depend_on_order():
+    managers = make_roster(40, seed=3)
+    weeks = [MONDAY + timedelta(weeks=n) for n in range(4)]
+
+    forward = make_horizon(managers)
+    in_order = {week: forward.week_schedule(week) for week in weeks}
+    backward = make_horizon(managers)
+    reversed_order = {week: backward.week_schedule(week) for week in reversed(weeks)}
+    assert in_order == reversed_order
+
+    # The template is untouched by the override weeks computed from it
+    assert forward.solver.schedule() == forward.template
+    assert in_order[MONDAY] == forward.template
+
+
+def test_override_week_respects_leave():
+    managers = make_roster(40, seed=3)
+    horizon = make_horizon(managers)
+    for week, schedule in horizon.schedule(MONDAY, 4):
+        away = {manager_id for manager_id, days in horizon.overrides.week(week).items() if days}
+        assert not away & set(schedule.values())
+
+
+def test_weeks_are_independent_dicts():
+    horizon = make_horizon(make_roster(40, seed=3))
+    first, second = horizon.week_schedule(MONDAY), horizon.week_schedule(MONDAY + timedelta(weeks=4))
+    first[("Mon", "open")] = "edited"
+    assert second[("Mon", "open")] != "edited"
+    assert horizon.week_schedule(MONDAY)[("Mon", "open")] != "edited"
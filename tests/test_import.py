@@ -0,0 +1,99 @@
+from scheduler_core import Manager, ManagerImport, read_manager_rows, validate_manager
+
+
+def roster():
+    return [
+        Manager(id=1, name="Ana", role="admin", gender="F", availability={"Mon": (9, 17), "Tue": (9, 17), "Fri": (12, 20)}),
+        Manager(id=2, name="Ben", role="shift", gender="M", availability={"Wed": (6, 14)}),
+        Manager(id=3, name="Ben", role="area", gender="M", availability={}),
+    ]
+
+
+def row(line, **values):
+    return line, {key.replace("__", "_"): value for key, value in values.items()}
+
+
+def test_validate_manager_reports_every_problem():
+    manager, errors = validate_manager("  ", "boss", "x", {"Mon": ("9", None), "Tue": ("25", "3"), "Wed": (8, 8)})
+    assert manager is None
+    assert len(errors) == 5
+
+    manager, errors = validate_manager(" Ana ", "Admin", "f", {"Mon": ("9", "17:30"), "Sun": ("22", "6")})
+    assert errors == []
+    assert (manager.name, manager.role, manager.gender) == ("Ana", "admin", "F")
+    assert manager.availability["Mon"] == (9, "17:30") and manager.availability["Tue"] == (None, None)
+
+
+def test_new_updated_and_unchanged_rows():
+    rows = [
+        row(2, Name="Cleo", Role="area", Gender="F"),
+        row(3, ID="2", Name="Ben", Role="admin", Gender="M", Wed__start=6, Wed__end=14),
+        row(4, Name="Ana", Role="admin", Gender="F", Mon__start=9, Mon__end=17, Tue__start=9, Tue__end=17),
+    ]
+    batch = ManagerImport(rows, roster())
+    assert batch.errors == []
+    assert [m.name for m in batch.added] == ["Cleo"]
+    assert [(m.id, m.role) for m in batch.updated] == [(2, "admin")]
+    assert batch.unchanged == 1
+
+
+def test_duplicates_and_ambiguous_names_are_errors():
+    rows = [
+        row(2, ID=1, Name="Ana", Role="admin", Gender="F"),
+        row(3, ID="1.0", Name="Ana B", Role="admin", Gender="F"),
+        row(4, Name="Dora", Role="shift", Gender="F"),
+        row(5, Name="DORA ", Role="shift", Gender="F"),
+        row(6, Name="Ben", Role="shift", Gender="M"),
+        row(7, ID=99, Name="Eve", Role="shift", Gender="F"),
+        row(8, ID="x", Name="Finn", Role="shift", Gender="M"),
+    ]
+    batch = ManagerImport(rows, roster())
+    assert [error.split(":")[0] for error in batch.errors] == ["line 3", "line 5", "line 6", "line 7", "line 8"]
+    assert "line 6: 'Ben' matches managers 2, 3; give the ID." in batch.errors
+
+
+def test_apply_refuses_batch_with_errors():
+    batch = ManagerImport([row(2, Name="", Role="shift", Gender="M")], roster())
+    try:
+        batch.apply(None)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("apply() ran with errors")
+
+
+def test_read_manager_rows_maps_headers(tmp_path):
+    path = tmp_path / "managers.csv"
+    path.write_text("name,ROLE,gender,Mon start,Mon-end,Notes\nAna,admin,F,9,17,x\n,,,,,\nBen,shift,M,,,\n",
+                    encoding="utf-8")
+    assert read_manager_rows(str(path)) == [
+        (2, {"Name": "Ana", "Role": "admin", "Gender": "F", "Mon_start": "9", "Mon_end": "17"}),
+        (4, {"Name": "Ben", "Role": "shift", "Gender": "M", "Mon_start": "", "Mon_end": ""}),
+    ]
+
+
+def test_update_keeps_days_missing_from_the_file(tmp_path):
+    path = tmp_path / "partial.csv"
+    path.write_text("Name,Role,Gender,Mon_start,Mon_end,Tue_start,Tue_end\nAna,admin,F,10,14,,\nCleo,area,F,8,12,,\n",
+                    encoding="utf-8")
+    batch = ManagerImport.read(str(path), roster())
+    assert batch.errors == []
+
+    (ana,) = batch.updated
+    assert ana.availability["Mon"] == (10, 14)
+    assert ana.availability["Tue"] == (None, None)  # blank cell in a column the file has
+    assert ana.availability["Fri"] == (12, 20)
+
+    # A new manager has nothing to keep: absent days are off
+    (cleo,) = batch.added
+    assert cleo.availability["Wed"] == (None, None)
+
+
+def test_short_rows_blank_the_missing_cells(tmp_path):
+    path = tmp_path / "short.csv"
+    path.write_text("Name,Role,Gender,Mon_start,Mon_end\nAna,admin,F\n", encoding="utf-8")
+    assert read_manager_rows(str(path)) == [
+        (2, {"Name": "Ana", "Role": "admin", "Gender": "F", "Mon_start": None, "Mon_end": None}),
+    ]
+    (ana,) = ManagerImport.read(str(path), roster()).updated
+    assert ana.availability["Mon"] == (None, None) and ana.availability["Tue"] == (9, 17)
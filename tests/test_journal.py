@@ -0,0 +1,35 @@
+from scheduler_core import Journal
+
+
+def test_replay_returns_appended_records(tmp_path):
+    path = str(tmp_path / "managers.xlsx.journal")
+    journal = Journal(path)
+    journal.append([{"op": "upsert", "id": 1}, {"op": "delete", "id": 2}])
+    journal.append([{"op": "upsert", "id": 3}])
+
+    reopened = Journal(path)
+    assert reopened.count == 3
+    assert reopened.read() == [{"op": "upsert", "id": 1}, {"op": "delete", "id": 2}, {"op": "upsert", "id": 3}]
+
+
+def test_torn_last_line_is_cut_off(tmp_path):
+    path = str(tmp_path / "managers.xlsx.journal")
+    Journal(path).append([{"op": "upsert", "id": 1}])
+    with open(path, "ab") as f:
+        f.write(b'{"op": "upsert", "id"')  # crash mid-append
+
+    journal = Journal(path)
+    assert journal.read() == [{"op": "upsert", "id": 1}]
+
+    # Appends after recovery start on a clean line
+    journal.append([{"op": "delete", "id": 1}])
+    assert Journal(path).read() == [{"op": "upsert", "id": 1}, {"op": "delete", "id": 1}]
+
+
+def test_clear_removes_file(tmp_path):
+    path = tmp_path / "shift_settings.xlsx.journal"
+    journal = Journal(str(path))
+    journal.append([{"op": "set"}])
+    journal.clear()
+    assert not path.exists()
+    assert journal.count == 0 and journal.read() == []
@@ -0,0 +1,46 @@
+from datetime import date
+
+from scheduler_core import AvailabilityOverrides
+
+
+def spans(overrides, manager_id=1):
+    return [(first.day, last.day, window) for mid, first, last, window, _ in overrides.entries() if mid == manager_id]
+
+
+def test_add_trims_overlapped_entries():
+    overrides = AvailabilityOverrides()
+    overrides.add(1, "2024-05-01", "2024-05-10", (None, None), "leave")
+    overrides.add(1, "2024-05-04", "2024-05-06", (9, 13), "half days")
+    assert spans(overrides) == [(1, 3, (None, None)), (4, 6, (9, 13)), (7, 10, (None, None))]
+
+    # Covering several entries replaces them and trims the edges
+    overrides.add(1, date(2024, 5, 2), date(2024, 5, 8), (6, 12))
+    assert spans(overrides) == [(1, 1, (None, None)), (2, 8, (6, 12)), (9, 10, (None, None))]
+    assert overrides.lookup(1, "2024-05-05") == (6, 12)
+    assert overrides.lookup(1, "2024-05-11") is None
+
+
+def test_remove_splits_and_drops():
+    overrides = AvailabilityOverrides([(1, "2024-05-01", "2024-05-10", (None, None), ""),
+                                       (2, "2024-05-01", "2024-05-02", (8, 16), "")])
+    overrides.remove(1, "2024-05-04", "2024-05-05")
+    assert spans(overrides) == [(1, 3, (None, None)), (6, 10, (None, None))]
+    assert overrides.lookup(1, "2024-05-04") is None
+
+    overrides.remove(1, "2024-04-01", "2024-06-01")
+    assert spans(overrides) == []
+    assert len(overrides) == 1 and 1 not in overrides.intervals
+
+
+def test_week_view():
+    overrides = AvailabilityOverrides([(1, "2024-05-05", "2024-05-07", (7, 12), "")])
+    assert overrides.week("2024-05-06") == {1: {"Mon": (7, 12), "Tue": (7, 12)}}
+
+
+def test_end_before_start_is_rejected():
+    try:
+        AvailabilityOverrides().add(1, "2024-05-02", "2024-05-01", (None, None))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("reversed range accepted")
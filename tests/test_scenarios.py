@@ -0,0 +1,62 @@
+from scheduler_core import BASELINE_SCENARIO_NAME, Manager, Scenario, evaluate_scenarios
+
+from tests.test_solver import RULES, make_roster, make_settings
+
+
+def make_managers(count, seed):
+    return [Manager.from_mapping(m) for m in make_roster(count, seed)]
+
+
+def build_scenarios(managers, settings):
+    base = {m.id: m for m in managers}
+    off = Scenario("Two off", base, settings)
+    off.set_off(managers[0].id)
+    off.set_off(managers[1].id, ["Mon", "Tue"])
+    shifts = Scenario("Shifts", base, settings)
+    shifts.set_shift(("Sat", "open"), (6, 11))
+    shifts.remove_shift(("Sun", "close"))
+    shifts.add_manager(Manager(name="Temp", role="admin", gender="F", availability={"Sat": (5, 12)}))
+    return [off, shifts]
+
+
+def summary(results):
+    return [(r["name"], r["changes"], r["schedule"], r["coverage_gaps"], r["changed"]) for r in results]
+
+
+def test_scenarios_leave_the_base_alone():
+    managers = make_managers(30, seed=5)
+    before = [(m.id, m.availability) for m in managers]
+    settings = make_settings()
+    results = evaluate_scenarios(managers, settings, build_scenarios(managers, settings), RULES)
+
+    assert [r["name"] for r in results] == [BASELINE_SCENARIO_NAME, "Two off", "Shifts"]
+    assert results[0]["changed"] == 0
+    assert [(m.id, m.availability) for m in managers] == before
+    assert settings == make_settings()
+    assert managers[0].id not in results[1]["schedule"].values()
+    assert ("Sun", "close") not in results[2]["schedule"]
+
+
+def test_process_pool_matches_in_process():
+    managers = make_managers(30, seed=5)
+    settings = make_settings()
+    scenarios = build_scenarios(managers, settings)
+    serial = evaluate_scenarios(managers, settings, scenarios, RULES, workers=1)
+    parallel = evaluate_scenarios(managers, settings, scenarios, RULES, workers=2)
+    assert summary(parallel) == summary(serial)
+
+
+def test_scenarios_are_evaluated_over_the_given_base():
+    managers = make_managers(30, seed=5)
+    settings = make_settings()
+    stale = build_scenarios(managers[:10], {})
+    fresh = build_scenarios(managers, settings)
+    assert summary(evaluate_scenarios(managers, settings, stale, RULES)) == \
+        summary(evaluate_scenarios(managers, settings, fresh, RULES))
+
+
+def test_overlay_carries_roles_by_value():
+    scenario = Scenario("Odd role", {}, {})
+    scenario.add_manager(Manager(name="Guest", role="visiting", gender="F"))
+    _, _, manager_changes, _ = scenario.overlay()
+    assert manager_changes[-1]["role"] == "visiting"
@@ -0,0 +1,76 @@
+import random
+import time
+
+from benchmark import random_manager
+from scheduler_core import DAYS, ManagerSearchIndex
+
+
+def manager(manager_id, name, role="shift", gender="F", **availability):
+    windows = {day: (None, None) for day in DAYS}
+    windows.update(availability)
+    return {"id": manager_id, "name": name, "role": role, "gender": gender, "availability": windows}
+
+
+def make_index():
+    return ManagerSearchIndex([
+        manager(1, "Anna Byrne", "admin", Tue=(13, 23)),
+        manager(2, "Annette Kelly", "shift", "F", Tue=("13:30", 23), Fri=(22, 6)),
+        manager(3, "Brian Annan", "area", "M", Mon=(9, 17)),
+        manager(4, "Ciara Walsh", "shift", "F", Tue=(8, 12)),
+    ])
+
+
+def test_prefix_queries():
+    index = make_index()
+    assert index.search("ann") == [1, 2, 3]
+    assert index.search("ANNA") == [1, 3]
+    assert index.search("ann kel") == [2]
+    assert index.search("zoe") == []
+    assert index.search("  ") == [1, 2, 3, 4]
+
+
+def test_role_and_gender_queries():
+    index = make_index()
+    assert index.search("role:shift") == [2, 4]
+    assert index.search("role:Admin") == [1]
+    assert index.search("gender:m") == [3]
+    assert index.search("role:shift ann") == [2]
+    assert index.search("role:nobody") == []
+
+
+def test_availability_queries():
+    index = make_index()
+    assert index.search("tue") == [1, 2, 4]
+    assert index.search("tue:13-23") == [1]
+    assert index.search("tue:14-20") == [1, 2]
+    assert index.search("tue:14") == []  # from 14:00 to midnight
+    assert index.search("tue:13:30-23") == [1, 2]
+    assert index.search("fri:23-5") == [2]
+    assert index.search("mon:8-17") == []
+    assert index.search("tue:bad") == []
+
+
+def test_edits_update_the_index():
+    index = make_index()
+    index.update(manager(1, "Zoe Byrne", "area", "F", Mon=(8, 18)))
+    index.remove(4)
+    index.add(manager(5, "Anna Quinn", "shift", "M", Tue=(9, 10)))
+    assert index.search("ann") == [2, 3, 5]
+    assert index.search("zoe role:area mon:9-17") == [1]
+    assert index.search("tue") == [2, 5]
+    assert index.search("role:admin") == []
+    assert len(index) == 4
+
+
+def test_search_is_fast_on_a_large_roster():
+    rng = random.Random(0)
+    index = ManagerSearchIndex(random_manager(rng, manager_id) for manager_id in range(1, 20001))
+    for query in ("manager 12", "role:shift gender:f", "tue", "role:area tue:9-17 gender:m"):
+        best = min(timed_search(index, query) for _ in range(3))
+        assert best < 0.01, (query, best)
+
+
+def timed_search(index, query):
+    start = time.perf_counter()
+    index.search(query)
+    return time.perf_counter() - start
@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+import pytest
+
+import schedule_server
+from scheduler_core import SQLiteStorage
+
+
+def test_failed_first_solve_is_retried_from_scratch(tmp_path, monkeypatch):
+    server = schedule_server.ScheduleServer(SQLiteStorage(str(tmp_path / "store.db")))
+    server.state.load()
+    solver_class = schedule_server.ScheduleSolver
+
+    class FailingSolver(solver_class):
+        def solve(self, cache=None):
+            raise RuntimeError("solver crashed")
+
+    async def requests():
+        monkeypatch.setattr(schedule_server, "ScheduleSolver", FailingSolver)
+        with pytest.raises(RuntimeError):
+            await server.schedule_body()
+        assert server.solver is None and server.state.solver_edits is None
+
+        monkeypatch.setattr(schedule_server, "ScheduleSolver", solver_class)
+        return json.loads(await server.schedule_body())
+
+    try:
+        body = asyncio.run(requests())
+    finally:
+        server.solver_pool.shutdown()
+        server.io.shutdown()
+        server.state.storage.close()
+    assert body["uncovered"] == len(body["shifts"])  # empty roster: nothing covered
+
+
+def test_shift_edits_accept_the_stores_custom_types():
+    settings = {("Mon", "stocktake"): (6, 9), ("Tue", "open"): (7, 10)}
+    edits = schedule_server.shift_edits_from_body([
+        {"day": "Mon", "shift_type": "stocktake", "start": 5, "end": "08:30"},
+        {"day": "Wed", "shift_type": "open", "start": None, "end": None},
+    ], settings)
+    assert edits == {("Mon", "stocktake"): (5, "08:30"), ("Wed", "open"): None}
+
+    with pytest.raises(schedule_server.HTTPError) as raised:
+        schedule_server.shift_edits_from_body([
+            {"day": "Tue", "shift_type": "stocktake", "start": 6, "end": 9},
+            {"day": "Mon", "shift_type": ["open"], "start": 6, "end": 9},
+        ], settings)
+    assert len(raised.value.errors) == 2
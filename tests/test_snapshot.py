@@ -0,0 +1,74 @@
+import os
+
+from scheduler_core import SNAPSHOT_SUFFIX, ExcelStorage, Manager, read_snapshot, write_snapshot
+
+
+def write_workbook(tmp_path):
+    path = tmp_path / "managers.xlsx"
+    path.write_bytes(b"workbook bytes")
+    return str(path)
+
+
+def sample_managers():
+    return [
+        Manager(id=1, name="Ana", role="admin", gender="F", availability={"Mon": (9, 17), "Sat": ("22:30", 6)},
+                row_index=2),
+        Manager(id=7, name="Zoë Łukasz", role="area", gender="M", availability={}, row_index=3),
+        Manager(id=12, name="", role="shift", gender="F", availability={"Sun": (None, 12)}, row_index=None),
+    ]
+
+
+def test_round_trip(tmp_path):
+    path = write_workbook(tmp_path)
+    managers = sample_managers()
+    write_snapshot(path, managers, next_id=13)
+
+    loaded, next_id = read_snapshot(path)
+    assert next_id == 13
+    assert [(m.id, m.row_index, m.name, m.role, m.gender, m.availability) for m in loaded] == [
+        (m.id, m.row_index, m.name, m.role, m.gender, m.availability) for m in managers
+    ]
+
+
+def test_stale_after_workbook_changes(tmp_path):
+    path = write_workbook(tmp_path)
+    write_snapshot(path, sample_managers(), next_id=13)
+    with open(path, "ab") as f:
+        f.write(b" edited")
+    assert read_snapshot(path) is None
+
+
+def test_touched_workbook_still_fresh(tmp_path):
+    path = write_workbook(tmp_path)
+    write_snapshot(path, sample_managers(), next_id=13)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert read_snapshot(path) is not None
+
+
+def test_truncated_snapshot_is_ignored(tmp_path):
+    path = write_workbook(tmp_path)
+    write_snapshot(path, sample_managers(), next_id=13)
+    with open(path + SNAPSHOT_SUFFIX, "r+b") as f:
+        f.truncate(os.path.getsize(path + SNAPSHOT_SUFFIX) - 5)
+    assert read_snapshot(path) is None
+
+
+def test_excel_storage_writes_snapshots_only_when_saving(tmp_path):
+    managers_path = str(tmp_path / "managers.xlsx")
+    storage = ExcelStorage(managers_path, str(tmp_path / "shift_settings.xlsx"))
+    storage.ensure_exists()
+    storage.replace_managers(sample_managers()[:2], next_id=8)
+    assert read_snapshot(managers_path) is not None
+
+    # An outside edit makes it stale; loading reads the workbook and leaves the folder alone
+    os.remove(managers_path + SNAPSHOT_SUFFIX)
+    reader = ExcelStorage(managers_path, str(tmp_path / "shift_settings.xlsx"))
+    assert [m.name for m in reader.load_managers()] == ["Ana", "Zoë Łukasz"]
+    assert reader.load_next_manager_id() == 8
+    assert not os.path.exists(managers_path + SNAPSHOT_SUFFIX)
+
+    reader.apply_manager_changes([], [7])
+    reader.close()
+    loaded, next_id = read_snapshot(managers_path)
+    assert [m.id for m in loaded] == [1] and next_id == 8
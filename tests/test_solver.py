@@ -0,0 +1,87 @@
+import random
+
+from scheduler_core import DAYS, GENDERS, ROLES, SHIFT_TYPES, ScheduleSolver
+
+RULES = {"shift_roles": {"open": ["admin", "area"]}, "max_weekly_hours": 12}
+SHIFT_WINDOWS = {"delivery": (6, 9), "open": (7, 10), "close": (15, 18), "early shift": (8, 12), "mid shift": (11, 15)}
+
+
+def make_roster(count, seed=0):
+    rng = random.Random(seed)
+    managers = []
+    for manager_id in range(1, count + 1):
+        availability = {day: (None, None) for day in DAYS}
+        for day in DAYS:
+            if rng.random() < 0.8:
+                start = rng.randrange(5, 13)
+                availability[day] = (start, start + rng.randrange(4, 11))
+        managers.append({
+            "id": manager_id, "name": f"Manager {manager_id}", "role": rng.choice(ROLES),
+            "gender": rng.choice(GENDERS), "availability": availability,
+        })
+    return managers
+
+
+def make_settings():
+    return {(day, shift_type): SHIFT_WINDOWS[shift_type] for day in DAYS for shift_type in SHIFT_TYPES}
+
+
+def assert_hard_rules(solver):
+    held = {}
+    for (day, shift_type), manager_id in solver.schedule().items():
+        if manager_id is None:
+            continue
+        manager = solver.managers[manager_id]
+        start, end = solver.settings[(day, shift_type)]
+        free_from, free_to = manager["availability"][day]
+        assert free_from is not None and free_from <= start and end <= free_to, (manager_id, day, shift_type)
+        roles = solver.rules["shift_roles"].get(shift_type)
+        assert not roles or manager["role"] in roles, (manager_id, shift_type)
+        held.setdefault(manager_id, []).append((day, start, end))
+
+    for manager_id, shifts in held.items():
+        for i, (day, start, end) in enumerate(shifts):
+            for other_day, other_start, other_end in shifts[:i]:
+                overlap = day == other_day and start < other_end and other_start < end
+                assert not overlap, f"manager {manager_id} holds overlapping shifts"
+        assert sum(end - start for _, start, end in shifts) <= solver.rules["max_weekly_hours"], manager_id
+
+
+def test_solve_respects_hard_rules():
+    solver = ScheduleSolver(make_roster(40), make_settings(), RULES)
+    schedule = solver.solve()
+    assert set(schedule) == set(make_settings())
+    assert any(manager_id is not None for manager_id in schedule.values())
+    assert_hard_rules(solver)
+
+
+def test_incremental_edits_keep_hard_rules():
+    managers = make_roster(40, seed=1)
+    solver = ScheduleSolver(managers, make_settings(), RULES)
+    solver.solve()
+
+    # Take the busiest manager off every day, then drop another one entirely
+    busiest = max(solver.assigned_shifts, key=lambda mid: len(solver.assigned_shifts[mid]))
+    off = dict(solver.managers[busiest])
+    off["availability"] = {day: (None, None) for day in DAYS}
+    solver.update_manager(off)
+    assert busiest not in solver.schedule().values()
+    assert_hard_rules(solver)
+
+    solver.remove_manager(managers[0]["id"])
+    assert managers[0]["id"] not in solver.schedule().values()
+    assert_hard_rules(solver)
+
+    solver.update_shift(("Mon", "close"), (14, 20))
+    solver.update_shift(("Tue", "open"), None)
+    assert ("Tue", "open") not in solver.schedule()
+    assert_hard_rules(solver)
+
+
+def test_manager_with_no_candidates_leaves_shift_open():
+    manager = {"id": 1, "name": "Only", "role": "shift", "gender": "F",
+               "availability": {day: (6, 12) if day == "Mon" else (None, None) for day in DAYS}}
+    solver = ScheduleSolver([manager], {("Mon", "open"): (7, 10), ("Mon", "delivery"): (6, 9)}, RULES)
+    schedule = solver.solve()
+    assert schedule[("Mon", "open")] is None  # role not allowed
+    assert schedule[("Mon", "delivery")] == 1
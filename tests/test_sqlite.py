@@ -0,0 +1,24 @@
+from scheduler_core import Manager, SQLiteStorage
+
+
+def test_times_round_trip(tmp_path):
+    path = str(tmp_path / "store.db")
+    storage = SQLiteStorage(path)
+    manager = Manager(id=1, name="Ana", role="admin", gender="F",
+                      availability={"Mon": (9, "17:30"), "Fri": ("22:15", 6), "Sun": (None, 12)})
+    storage.replace_managers([manager], next_id=2)
+    storage.save_shift_settings({("Mon", "open"): ("06:45", 10), ("Tue", "close"): (None, None)})
+    storage.close()
+
+    storage = SQLiteStorage(path)
+    try:
+        (loaded,) = storage.load_managers()
+        assert loaded.availability == manager.availability
+        assert storage.load_shift_settings() == {("Mon", "open"): ("06:45", 10), ("Tue", "close"): (None, None)}
+        assert storage.find_available("Mon", 9, "17:30") == [1]
+        assert storage.find_available("Mon", 9, 18) == []
+        assert storage.find_available("Sat", 1, 5) == [1]  # Friday's overnight window
+        types = dict(storage.conn.execute("SELECT name, type FROM pragma_table_info('availability')").fetchall())
+        assert (types["start_hour"], types["from_hour"]) == ("TEXT", "REAL")
+    finally:
+        storage.close()
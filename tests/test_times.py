@@ -0,0 +1,47 @@
+import pytest
+
+from scheduler_core import ExcelStorage, Manager, format_time, minutes_span, parse_time, parse_window
+
+
+def test_parse_and_format_round_trip():
+    for value in (0, 9, "9", "17:30", "06:45", "22:15", 24):
+        minutes = parse_time(value)
+        assert parse_time(format_time(minutes)) == minutes
+    assert format_time(parse_time("17:30")) == "17:30"
+    assert format_time(parse_time("17:00")) == 17
+    assert parse_time("") is None
+    for bad in ("17:5", "25", "noon"):
+        with pytest.raises(ValueError):
+            parse_time(bad)
+
+
+def test_parse_window():
+    assert parse_window("17:30", "") == ("17:30", None)
+    assert parse_window(22, "06:15") == (22, "06:15")
+    with pytest.raises(ValueError):
+        parse_window("17:20", 23)
+
+
+def test_overnight_span_ends_the_next_day():
+    assert minutes_span(parse_time("22:15"), parse_time(6)) == (22 * 60 + 15, 30 * 60)
+    assert minutes_span(parse_time(9), parse_time("17:30")) == (9 * 60, 17 * 60 + 30)
+    assert minutes_span(None, None) is None
+
+
+def test_excel_round_trip(tmp_path):
+    storage = ExcelStorage(str(tmp_path / "managers.xlsx"), str(tmp_path / "shift_settings.xlsx"))
+    storage.ensure_exists()
+    manager = Manager(id=1, name="Ana", role="admin", gender="F",
+                      availability={"Mon": (9, "17:30"), "Fri": ("22:15", 6), "Sun": (None, 12)})
+    storage.replace_managers([manager], next_id=2)
+    settings = {("Mon", "open"): ("06:45", 10), ("Fri", "close"): ("21:30", "01:15")}
+    storage.save_shift_settings(settings)
+    storage.close()
+
+    storage = ExcelStorage(str(tmp_path / "managers.xlsx"), str(tmp_path / "shift_settings.xlsx"))
+    try:
+        (loaded,) = storage.load_managers()
+        assert loaded.availability == manager.availability
+        assert storage.load_shift_settings() == settings
+    finally:
+        storage.close()